@@ -0,0 +1,81 @@
+"""Microbenchmark of the per-call client overhead: url building, OAuth1
+signing and header building
+
+No requests are sent. Run from the repository root::
+
+    python benchmarks/client_overhead.py [--number N]
+"""
+import argparse
+import timeit
+
+import requests
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+
+def legacy_url(client, path):
+    """``Client.url`` before endpoint urls were compiled"""
+    if not path.startswith("/"):
+        path = "/%s" % path
+    if not path.endswith("/"):
+        path += "/"
+    return "%s%s%s" % (client.base_url, path, client.api_version)
+
+
+def cases():
+    client = Client(
+        "key", "secret", oauth_token="token", oauth_secret="token-secret"
+    )
+    oauth2 = ShapewaysOauth2Client()
+    oauth2.access_token = "TOKEN"
+    routes = client._routes
+    session = requests.Session()
+    url = routes.url("price")
+    sign = client.oauth.client.sign
+
+    return [
+        ("url: legacy static path",
+         lambda: legacy_url(client, "/price/")),
+        ("url: Client.url static path",
+         lambda: client.url("/price/")),
+        ("url: legacy format + assembly",
+         lambda: legacy_url(client, "/models/%s/files/%s/" % (86, 1))),
+        ("url: routes.path + Client.url",
+         lambda: client.url(routes.path("model_file", 86, 1))),
+        ("url: routes.url",
+         lambda: routes.url("model_file", 86, 1)),
+        ("url: oauth2 legacy concat",
+         lambda: oauth2.api_url + "/model/{model_id}/v1".format(model_id=86)),
+        ("oauth1: sign url",
+         lambda: sign(url, http_method="POST")),
+        ("oauth1: prepare signed request",
+         lambda: session.prepare_request(requests.Request(
+             "POST", url, data="{}", auth=client.oauth,
+             headers={"Content-Type": "application/json"}
+         ))),
+        ("oauth2: bearer headers",
+         oauth2._auth_headers),
+        ("oauth2: prepare request",
+         lambda: session.prepare_request(requests.Request(
+             "POST", url, data="{}", headers=oauth2._auth_headers()
+         ))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000,
+                        help="calls per case (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per case, the fastest is reported")
+    args = parser.parse_args()
+
+    print("%-34s %12s" % ("case", "usec/call"))
+    for name, func in cases():
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print("%-34s %12.3f" % (name, best / args.number * 1e6))
+
+
+if __name__ == "__main__":
+    main()
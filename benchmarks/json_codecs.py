@@ -0,0 +1,90 @@
+"""Benchmark of the JSON codecs in :mod:`shapeways.codec` on realistic
+payloads
+
+Every installed codec is timed encoding and decoding each payload, next to
+the ``json.dumps`` / ``response.json()`` path the clients use without a
+codec. Run from the repository root::
+
+    python benchmarks/json_codecs.py [--number N]
+"""
+import argparse
+import base64
+import json
+import os
+import timeit
+
+from shapeways.codec import available_codecs, get_codec
+
+
+def model(model_id):
+    return {
+        "modelId": model_id,
+        "modelVersion": 3,
+        "title": "Articulated dragon %d" % model_id,
+        "fileName": "dragon_%d.stl" % model_id,
+        "contentLength": 1834221,
+        "fileMd5Checksum": "0f343b0931126a20f133d67c2b018a3b",
+        "description": u"Print-in-place articulated dragon, \u00e9dition %d" % model_id,
+        "isPublic": True,
+        "isForSale": model_id % 2 == 0,
+        "printable": True,
+        "materials": dict(
+            (str(material), {
+                "materialId": material, "isActive": True,
+                "markup": 0.0, "price": 12.31 + material,
+            }) for material in (6, 25, 26, 62, 75, 76, 77, 78)
+        ),
+        "urls": {
+            "publicProductUrl": {
+                "address": "https://www.shapeways.com/product/%d" % model_id,
+            },
+        },
+        "tags": ["dragon", "articulated", "toy"],
+    }
+
+
+def payloads():
+    data = base64.b64encode(os.urandom(3 * 1024 * 1024)).decode("ascii")
+    return [
+        ("price request", {
+            "volume": 1.2e-05, "area": 0.0061, "xBoundMin": -0.01,
+            "xBoundMax": 0.01, "yBoundMin": -0.01, "yBoundMax": 0.01,
+            "zBoundMin": 0.0, "zBoundMax": 0.02, "materials": [6, 25, 62],
+        }),
+        ("models page (100)", {
+            "result": "success", "models": [model(i) for i in range(100)],
+        }),
+        ("upload body (4 MB base64)", {
+            "file": data, "fileName": "dragon.stl", "hasRightsToModel": True,
+            "acceptTermsAndConditions": True, "uploadScale": 0.001,
+        }),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20,
+                        help="calls per case (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per case, the fastest is reported")
+    args = parser.parse_args()
+
+    def best(func):
+        return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number
+
+    print("%-26s %-18s %12s %12s" % ("payload", "codec", "dumps usec", "loads usec"))
+    for name, payload in payloads():
+        encoded = json.dumps(payload).encode("utf-8")
+        dumps = best(lambda: json.dumps(payload).encode("utf-8"))
+        loads = best(lambda: json.loads(encoded.decode("utf-8")))
+        print("%-26s %-18s %12.1f %12.1f" % (name, "json (no codec)", dumps * 1e6, loads * 1e6))
+        for codec_name in available_codecs():
+            codec = get_codec(codec_name)
+            encoded = codec.dumps(payload)
+            dumps = best(lambda: codec.dumps(payload))
+            loads = best(lambda: codec.loads(encoded))
+            print("%-26s %-18s %12.1f %12.1f" % (name, codec_name, dumps * 1e6, loads * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Memory held by model records as plain dicts and as
+:class:`shapeways.results.Model` objects
+
+Run from the repository root::
+
+    python benchmarks/result_memory.py [--records N]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from shapeways.results import Model
+
+from json_codecs import model
+
+
+def measure(documents, build):
+    tracemalloc.start()
+    start = time.time()
+    try:
+        records = [build(json.loads(document)) for document in documents]
+        elapsed = time.time() - start
+        return tracemalloc.get_traced_memory()[0], elapsed, records
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000,
+                        help="model records held (default: %(default)s)")
+    args = parser.parse_args()
+
+    documents = [json.dumps(model(i)) for i in range(args.records)]
+    print("%-8s %14s %14s %10s" % ("records", "bytes", "bytes/record", "build s"))
+    for name, build in (("dict", dict), ("Model", Model)):
+        size, elapsed, records = measure(documents, build)
+        print("%-8s %14d %14.0f %10.2f" % (name, size, size / float(len(records)), elapsed))
+        del records
+
+
+if __name__ == "__main__":
+    main()
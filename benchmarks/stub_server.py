@@ -0,0 +1,123 @@
+"""In-process HTTP stub of the API used by the benchmarks
+
+The stub serves precomputed, realistic JSON payloads over HTTP/1.1 with
+keep-alive, so the benchmarks measure the clients and the network stack
+rather than the server. Request bodies are read and discarded in chunks.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from json_codecs import model
+
+
+def material(material_id):
+    return {
+        "materialId": material_id,
+        "title": "Material %d" % material_id,
+        "supportsColorFiles": material_id % 2,
+        "printerId": material_id % 5,
+        "swatch": "https://images.shapeways.com/swatch/%d.jpg" % material_id,
+        "restrictions": {"minWallThickness": 0.7, "minBoundingBox": 0.6},
+    }
+
+
+def models_page(page_size):
+    return {"result": "success", "models": [model(i) for i in range(page_size)]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, don't wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _drain(self):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+    def _reply(self):
+        self._drain()
+        payloads = self.server.payloads
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/oauth2/token"):
+            body = payloads["token"]
+        elif self.command != "GET":
+            body = payloads["success"]
+        elif path in ("/models/v1", "/model/v1"):
+            body = payloads["models"]
+        elif path.startswith("/materials"):
+            body = payloads["materials"]
+        elif path.startswith("/model"):
+            body = payloads["model"]
+        else:
+            body = payloads["success"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubServer(object):
+    """The stub, listening on a free port of 127.0.0.1 while in use
+
+    .. code:: python
+
+        with StubServer(page_size=1000) as server:
+            client.base_url = server.url
+    """
+
+    def __init__(self, page_size=100):
+        self.page_size = page_size
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        single = dict(model(1), result="success")
+        self._server.payloads = dict(
+            (name, json.dumps(payload).encode("utf-8")) for name, payload in (
+                ("token", {"access_token": "TOKEN", "expires_in": 3600}),
+                ("success", {"result": "success"}),
+                ("models", models_page(self.page_size)),
+                ("model", single),
+                ("materials", {
+                    "result": "success",
+                    "materials": dict((str(i), material(i)) for i in range(100)),
+                }),
+            )
+        )
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
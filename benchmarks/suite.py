@@ -0,0 +1,255 @@
+"""Benchmark suite running both clients against an in-process stub server
+
+Measures the per-call overhead, the throughput at increasing concurrency,
+the peak memory of uploads versus the file size and the decode time of
+large model pages, for :class:`shapeways.client.Client` and
+:class:`shapeways.oauth2_client.ShapewaysOauth2Client`. Results are
+written as JSON and can be compared against a baseline to catch
+regressions. Run from the repository root::
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --compare results.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from shapeways import __version__
+from shapeways.client import Client
+from shapeways.codec import available_codecs, get_codec
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+from stub_server import StubServer, models_page
+
+CONCURRENCY = (1, 4, 16, 64, 256)
+UPLOAD_SIZES = (1, 4, 16)
+PAGE_SIZES = (100, 1000, 5000)
+PARAMS = {"hasRightsToModel": True, "acceptTermsAndConditions": True}
+
+
+def clients(url, pool_maxsize=10):
+    client = Client(
+        "key", "secret", oauth_token="token", oauth_secret="token-secret",
+        pool_maxsize=pool_maxsize
+    )
+    client.base_url = url
+    oauth2 = ShapewaysOauth2Client(api_url=url, pool_maxsize=pool_maxsize)
+    oauth2.access_token = "TOKEN"
+    return [
+        ("Client", client, "get_model_info"),
+        ("ShapewaysOauth2Client", oauth2, "get_single_model"),
+    ]
+
+
+def record(name, value, unit, better, **params):
+    return dict(params, name=name, value=value, unit=unit, better=better)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def call_overhead(url, calls):
+    results = []
+    for name, client, method in clients(url):
+        call = getattr(client, method)
+        call(1)
+        timings = []
+        for i in range(calls):
+            start = time.perf_counter()
+            call(i)
+            timings.append(time.perf_counter() - start)
+        for label, value in (
+                ("mean", sum(timings) / len(timings)),
+                ("p50", percentile(timings, 0.5)),
+                ("p99", percentile(timings, 0.99)),
+        ):
+            results.append(record(
+                "call_overhead", value * 1e6, "usec", "lower",
+                client=name, method=method, statistic=label
+            ))
+        client.close()
+    return results
+
+
+def throughput(url, calls, levels):
+    results = []
+    for concurrency in levels:
+        for name, client, method in clients(url, pool_maxsize=concurrency):
+            count = max(calls, concurrency * 4)
+            start = time.perf_counter()
+            failed = sum(
+                not item.ok for item in client.map(method, range(count), concurrency=concurrency)
+            )
+            elapsed = time.perf_counter() - start
+            results.append(record(
+                "throughput", count / elapsed, "calls/s", "higher",
+                client=name, method=method, concurrency=concurrency, failed=failed
+            ))
+            client.close()
+    return results
+
+
+def upload_memory(url, sizes):
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        for megabytes in sizes:
+            path = os.path.join(directory, "model_%d.stl" % megabytes)
+            with open(path, "wb") as data:
+                for _ in range(megabytes):
+                    data.write(os.urandom(1024 * 1024))
+            size = os.path.getsize(path)
+            (_, client, _), (_, oauth2, _) = clients(url)
+            cases = [
+                ("Client", "add_model_stream",
+                 lambda: client.add_model_stream(path, PARAMS)),
+                ("ShapewaysOauth2Client", "upload_model",
+                 lambda: oauth2.upload_model(path)),
+            ]
+            for name, method, upload in cases:
+                upload()
+                tracemalloc.start()
+                try:
+                    start = time.perf_counter()
+                    upload()
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                results.append(record(
+                    "upload_peak_memory", peak, "bytes", "lower",
+                    client=name, method=method, file_bytes=size
+                ))
+                results.append(record(
+                    "upload_throughput", size / elapsed / 1e6, "MB/s", "higher",
+                    client=name, method=method, file_bytes=size
+                ))
+            client.close()
+            oauth2.close()
+    finally:
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+    return results
+
+
+def json_decode(page_sizes, repeat):
+    results = []
+    for page_size in page_sizes:
+        document = json.dumps(models_page(page_size)).encode("utf-8")
+        codecs = [("json (no codec)", lambda: json.loads(document.decode("utf-8")))]
+        for codec_name in available_codecs():
+            codec = get_codec(codec_name)
+            codecs.append((codec_name, lambda codec=codec: codec.loads(document)))
+        for codec_name, decode in codecs:
+            best = min(_timed(decode) for _ in range(repeat))
+            results.append(record(
+                "json_decode", best * 1e3, "msec", "lower",
+                codec=codec_name, page_size=page_size, page_bytes=len(document)
+            ))
+        with StubServer(page_size=page_size) as server:
+            for name, client, _ in clients(server.url):
+                client.get_models()
+                best = min(_timed(client.get_models) for _ in range(repeat))
+                results.append(record(
+                    "get_models_page", best * 1e3, "msec", "lower",
+                    client=name, page_size=page_size
+                ))
+                client.close()
+    return results
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(quick=False):
+    calls = 200 if quick else 2000
+    levels = CONCURRENCY[:3] if quick else CONCURRENCY
+    sizes = UPLOAD_SIZES[:1] if quick else UPLOAD_SIZES
+    pages = PAGE_SIZES[:2] if quick else PAGE_SIZES
+    results = []
+    with StubServer() as server:
+        results.extend(call_overhead(server.url, calls))
+        results.extend(throughput(server.url, calls, levels))
+        results.extend(upload_memory(server.url, sizes))
+    results.extend(json_decode(pages, 3 if quick else 10))
+    return {
+        "meta": {
+            "shapeways": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "codecs": available_codecs(),
+            "quick": quick,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def _key(result):
+    return tuple(sorted(
+        (key, value) for key, value in result.items()
+        if key not in ("value", "failed")
+    ))
+
+
+def compare(baseline, current, tolerance):
+    """Find the results that got worse than ``baseline`` by more than
+    ``tolerance``, a fraction of the baseline value
+    """
+    previous = dict((_key(result), result) for result in baseline["results"])
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_key(result))
+        if old is None or not old["value"]:
+            continue
+        change = (result["value"] - old["value"]) / float(old["value"])
+        if result["better"] == "higher":
+            change = -change
+        if change > tolerance:
+            regressions.append(dict(result, baseline=old["value"], change=change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer calls, concurrency levels and sizes")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="exit with status 1 when results regressed from this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed regression as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = run(quick=args.quick)
+    document = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(document + "\n")
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare) as data:
+            baseline = json.load(data)
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            sys.stderr.write("regression: %s\n" % json.dumps(regression, sort_keys=True))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
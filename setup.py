@@ -10,7 +10,15 @@ setup(
     author="Shapeways",
     author_email="api@shapeways.com",
     packages=find_packages(),
-    install_requires=["oauthlib==0.6.0", "requests-oauthlib==0.4.0"],
+    install_requires=[
+        "oauthlib==0.6.0", "requests-oauthlib==0.4.0",
+        'futures; python_version < "3"',
+    ],
+    extras_require={
+        "async": ['aiohttp; python_version >= "3.5"'],
+        "geometry": ["numpy"],
+        "fastjson": ["orjson"],
+    },
     description="",
     license="MIT",
     url='https://github.com/Shapeways/python-shapeways',
@@ -19,6 +27,10 @@ setup(
         "Programming Language :: Python",
         "Programming Language :: Python :: 2.6",
         "Programming Language :: Python :: 2.7",
+        "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
         "License :: OSI Approved :: MIT License",
     ],
 )
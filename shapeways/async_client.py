@@ -0,0 +1,1007 @@
+"""asyncio clients for the Shapeways API
+
+Requires `aiohttp <https://docs.aiohttp.org>`_ (``pip install shapeways[async]``)
+and Python 3.
+
+:class:`shapeways.async_client.AsyncClient` and
+:class:`shapeways.async_client.AsyncShapewaysOauth2Client` expose the same
+methods as :class:`shapeways.client.Client` and
+:class:`shapeways.oauth2_client.ShapewaysOauth2Client`, but every API call
+returns an awaitable. All calls made by a client share one pooled
+:class:`aiohttp.ClientSession`, so a single event loop can keep many requests
+in flight.
+
+.. code:: python
+
+    async with AsyncClient("key", "secret", oauth_token, oauth_secret) as client:
+        infos = await asyncio.gather(
+            *[client.get_model_info(model_id) for model_id in model_ids]
+        )
+"""
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import json
+import time
+from timeit import default_timer
+from urllib.parse import urlencode, parse_qs
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from requests_oauthlib import OAuth1
+
+from shapeways.batch import BatchResult, DEFAULT_CONCURRENCY
+from shapeways.bulk import (
+    ByteBudget, UploadResult, UploadStats, encoded_size, read_upload,
+    upload_sources, DEFAULT_MAX_BYTES, DEFAULT_READERS
+)
+from shapeways.client import Client
+from shapeways.download import (
+    Base64FieldDecoder, download_result, DEFAULT_CHUNK_SIZE as DOWNLOAD_CHUNK_SIZE
+)
+from shapeways.instrument import body_size
+from shapeways.results import typed_response
+from shapeways.upload import JsonUploadBody
+from shapeways.oauth2_client import ShapewaysOauth2Client, StatusError
+
+
+def create_async_session(pool_connections, pool_maxsize, keep_alive=True):
+    """Create an :class:`aiohttp.ClientSession` with a sized connection pool
+
+    Must be called from within a running event loop.
+
+    :param pool_connections: the number of hosts connections are pooled for
+    :type pool_connections: int
+    :param pool_maxsize: the maximum number of open connections per host
+    :type pool_maxsize: int
+    :param keep_alive: whether connections should be kept open between
+        requests
+    :type keep_alive: bool
+    :returns: a new pooled session
+    :rtype: :class:`aiohttp.ClientSession`
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp is required for the asyncio clients")
+    connector = aiohttp.TCPConnector(
+        limit=pool_connections * pool_maxsize, limit_per_host=pool_maxsize,
+        force_close=not keep_alive
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def _call(func, args, kwargs):
+    try:
+        return await func(*args, **kwargs), None
+    except Exception as error:
+        return None, error
+
+
+async def run_async_batch(calls, concurrency=DEFAULT_CONCURRENCY):
+    """asyncio version of :func:`shapeways.batch.run_batch`
+
+    :param calls: iterable of ``(key, func, args, kwargs)`` tuples where
+        ``func`` returns an awaitable
+    :type calls: iterable
+    :param concurrency: the maximum number of calls in flight
+    :type concurrency: int
+    :returns: an async generator of :class:`shapeways.batch.BatchResult` in
+        completion order
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    calls = iter(calls)
+    pending = {}
+    try:
+        while True:
+            for key, func, args, kwargs in calls:
+                pending[asyncio.ensure_future(_call(func, args, kwargs))] = key
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result, error = task.result()
+                yield BatchResult(pending.pop(task), result, error)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def run_async_bulk_upload(
+        client, sources, params=None, concurrency=DEFAULT_CONCURRENCY,
+        readers=DEFAULT_READERS, max_bytes=DEFAULT_MAX_BYTES, stats=None
+):
+    """asyncio version of :func:`shapeways.bulk.bulk_upload`
+
+    Files are read on a pool of ``readers`` threads, uploads run on the
+    event loop.
+
+    :param client: the client to upload with
+    :type client: :class:`shapeways.async_client.AsyncClient`
+    :returns: an async generator of :class:`shapeways.bulk.UploadResult` in
+        completion order
+    """
+    if concurrency < 1 or readers < 1:
+        raise ValueError("concurrency and readers must be at least 1")
+    loop = asyncio.get_event_loop()
+    sources = upload_sources(sources, params)
+    budget = ByteBudget(max_bytes)
+    stats = stats if stats is not None else UploadStats()
+    stats.started = stats._clock()
+    stats.finished = None
+    reading = {}
+    uploading = {}
+    executor = ThreadPoolExecutor(max_workers=readers)
+    exhausted = False
+    slots = asyncio.Semaphore(concurrency)
+
+    async def upload(contents, upload_params, reserved):
+        try:
+            async with slots:
+                return await _call(client.add_model_stream, (contents, upload_params), {})
+        finally:
+            contents.close()
+            budget.release(reserved)
+
+    try:
+        while True:
+            while not exhausted and len(reading) < readers * 2:
+                try:
+                    source, file_params = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                reading[loop.run_in_executor(
+                    executor, read_upload, source, file_params, budget
+                )] = source
+            if not reading and not uploading:
+                return
+            done, _ = await asyncio.wait(
+                list(reading) + list(uploading), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                if future in reading:
+                    source = reading.pop(future)
+                    try:
+                        contents, upload_params, size, digest, reserved = future.result()
+                    except Exception as error:
+                        stats.failed += 1
+                        yield UploadResult(source, None, error, None, None)
+                        continue
+                    stats.encoded_bytes += encoded_size(size)
+                    stats.peak_buffered = budget.peak
+                    task = asyncio.ensure_future(upload(contents, upload_params, reserved))
+                    uploading[task] = (source, size, digest)
+                else:
+                    source, size, digest = uploading.pop(future)
+                    result, error = future.result()
+                    item = UploadResult(source, result, error, size, digest)
+                    if item.ok:
+                        stats.files += 1
+                        stats.bytes += size
+                    else:
+                        stats.failed += 1
+                    yield item
+    finally:
+        stats.finished = stats._clock()
+        for future in list(reading) + list(uploading):
+            future.cancel()
+        budget.close()
+        executor.shutdown(wait=False)
+
+
+async def aiter_items(fetch_page, limit=None, start_page=1, prefetch=True):
+    """asyncio version of :func:`shapeways.pagination.iter_items`
+
+    :param fetch_page: coroutine function taking a page number and returning
+        the list of items on that page
+    :returns: an async generator of items
+    """
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    page = start_page
+    task = asyncio.ensure_future(fetch_page(page))
+    try:
+        while True:
+            items = await task
+            if not items:
+                return
+            task = asyncio.ensure_future(fetch_page(page + 1)) if prefetch else None
+            for item in items:
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            page += 1
+            if task is None:
+                task = asyncio.ensure_future(fetch_page(page))
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def send_async_request(request, method, limiter=None, retry=None):
+    """asyncio version of :func:`shapeways.retry.send_request`
+
+    :param request: coroutine function making one attempt and returning
+        ``(status, headers, body)``
+    :type request: callable
+    :param method: the lower case http method of the request
+    :type method: str
+    :param limiter: rate limiter to wait on before every attempt
+    :type limiter: :class:`shapeways.retry.TokenBucket` or None
+    :param retry: policy deciding which attempts are retried
+    :type retry: :class:`shapeways.retry.RetryPolicy` or None
+    :returns: ``(status, body)`` of the last attempt
+    :rtype: tuple
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            delay = limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+        try:
+            status, headers, body = await request()
+        except aiohttp.ClientError as error:
+            if retry is None or not retry.should_retry(
+                    method, attempt, error=error,
+                    connect_error=isinstance(error, aiohttp.ClientConnectorError)
+            ):
+                raise
+            await asyncio.sleep(retry.delay(attempt))
+        else:
+            if retry is None or not retry.should_retry(method, attempt, status=status):
+                return status, body
+            await asyncio.sleep(retry.delay(attempt, headers.get("Retry-After")))
+        attempt += 1
+
+
+def _attempt_started(info):
+    """Count an attempt of a request reported to an instrumentation
+
+    :returns: the start time of the attempt
+    :rtype: float
+    """
+    if info is not None:
+        info.attempts += 1
+    return default_timer()
+
+
+async def _read_body(info, started, response):
+    """Read the body of ``response``, timing the wait for its headers and
+    the download of the body when the request is reported
+    """
+    if info is None:
+        return await response.read()
+    received = default_timer()
+    info.wait = received - started
+    body = await response.read()
+    info.download = default_timer() - received
+    return body
+
+
+def _finish_report(instrumentation, info, status, body, data=None, error=None):
+    """Complete the :class:`shapeways.instrument.RequestInfo` of a request"""
+    info.status = status
+    info.bytes_received = None if body is None else len(body)
+    info.bytes_sent = body_size(data)
+    instrumentation.finish(info, error)
+
+
+def _async_body(body, headers):
+    """Adapt a streaming :class:`shapeways.upload.JsonUploadBody` for aiohttp
+
+    aiohttp sends bodies of unknown size chunked, so the length of the body
+    is set as ``Content-Length``.
+
+    :returns: the data and the headers to send
+    :rtype: tuple
+    """
+    if not isinstance(body, JsonUploadBody):
+        return body, headers
+    headers = dict(headers or {})
+    headers["Content-Length"] = str(len(body))
+    return _upload_chunks(body), headers
+
+
+async def _upload_chunks(body):
+    """Read and encode the chunks of an upload off the event loop"""
+    loop = asyncio.get_event_loop()
+    chunks = iter(body)
+    while True:
+        chunk = await loop.run_in_executor(None, next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+class _AsyncSessionMixin(object):
+    """Lazily created, pooled :class:`aiohttp.ClientSession` handling
+
+    aiohttp sessions are bound to an event loop, so the session is created on
+    the first request rather than in the constructor.
+    """
+    __slots__ = ()
+
+    def _create_session(self, pool_connections, pool_maxsize, keep_alive):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the asyncio clients")
+        self._pool_settings = (pool_connections, pool_maxsize, keep_alive)
+        return None
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = create_async_session(*self._pool_settings)
+        return self.session
+
+    async def close(self):
+        """Release the pooled connections held by this client
+
+        A session passed into the constructor is shared and is left open.
+        """
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with asyncio clients")
+
+    def __exit__(self, exc_type, exc_value, traceback):  # pragma: no cover
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    def _typed(self, endpoint, result):
+        """Convert an awaitable or decoded result to typed results when
+        :attr:`typed` is set
+        """
+        if not self.typed:
+            return result
+        if not inspect.isawaitable(result):
+            return typed_response(endpoint, result)
+
+        async def convert():
+            return typed_response(endpoint, await result)
+        return convert()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _journaled(self, method, args, key, call):
+        """Make an awaitable mutating call through :attr:`journal`"""
+        journal = self.journal
+        if journal is None:
+            return await call()
+        key, recorded = journal.begin(method, args, key=key, owner=self._credentials_key())
+        if recorded is not None:
+            return recorded.response
+        try:
+            response = await call()
+        except Exception as error:
+            # could not connect, so the request was never sent
+            sent = False if isinstance(error, aiohttp.ClientConnectorError) else None
+            journal.fail(key, error, sent=sent)
+            raise
+        journal.complete(key, response)
+        return response
+
+    def map(self, method, keys, concurrency=DEFAULT_CONCURRENCY):
+        """asyncio version of :meth:`shapeways.batch.BatchMixin.map`
+
+        .. code:: python
+
+            async for item in client.map("get_model_info", model_ids, concurrency=64):
+                print(item.key, item.ok)
+
+        :returns: an async generator of :class:`shapeways.batch.BatchResult`
+        """
+        func = getattr(self, method)
+        return run_async_batch(
+            ((key, func, (key,), {}) for key in keys), concurrency=concurrency
+        )
+
+    def batch(self, calls, concurrency=DEFAULT_CONCURRENCY):
+        """asyncio version of :meth:`shapeways.batch.BatchMixin.batch`
+
+        :returns: an async generator of :class:`shapeways.batch.BatchResult`
+        """
+        def expand():
+            for call in calls:
+                kwargs = call[2] if len(call) > 2 else {}
+                yield call, getattr(self, call[0]), tuple(call[1]), kwargs
+        return run_async_batch(expand(), concurrency=concurrency)
+
+
+class AsyncClient(_AsyncSessionMixin, Client):
+    """asyncio version of :class:`shapeways.client.Client`
+
+    Every API method (``get_models``, ``get_model_info``, ``get_price``,
+    ``add_model``, ...) as well as ``connect``, ``verify`` and ``verify_url``
+    returns an awaitable. Requests are signed with OAuth v1 exactly like the
+    blocking client.
+
+    .. code:: python
+
+        client = AsyncClient("key", "secret")
+        url = await client.connect()
+        # redirect user to `url`
+        await client.verify_url(response_url)
+        info = await client.get_api_info()
+        await client.close()
+    """
+    __slots__ = ["_pool_settings"]
+
+    async def _send(
+            self, method, path, oauth, params=None, body=None, headers=None,
+            received=None
+    ):
+        """Sign and send a request, returning the raw response body
+
+        The request waits on :attr:`limiter` and is retried as allowed by
+        :attr:`retry`.
+
+        :param method: the http method to use
+        :type method: str
+        :param path: the api path to call e.g. ``/api/``
+        :type path: str
+        :param oauth: the OAuth credentials to sign the request with
+        :type oauth: :class:`requests_oauthlib.OAuth1`
+        :param body: the request body to use
+        :type body: str or None
+        :param params: dict of query string parameters to use
+        :type params: dict or None
+        :param headers: dict of extra request headers to send
+        :type headers: dict or None
+        :param received: the headers of the response are appended to this
+            list
+        :type received: list or None
+        :returns: the response status and raw body
+        :rtype: tuple
+        """
+        url = self.url(path)
+        if params:
+            url = "%s?%s" % (url, urlencode(params))
+        session = self._get_session()
+        instrumentation = self.instrumentation
+        info = None
+        if instrumentation is not None:
+            info = instrumentation.start(method, url, self._routes)
+
+        async def request():
+            started = _attempt_started(info)
+            # signed per attempt, so every retry gets a fresh nonce
+            signed_url, signed = self._sign(method, url, oauth, headers)
+            data, signed = _async_body(body, signed)
+            async with session.request(
+                method, signed_url, headers=signed, data=data
+            ) as response:
+                if received is not None:
+                    received.append(response.headers)
+                return response.status, response.headers, await _read_body(
+                    info, started, response
+                )
+        if info is None:
+            return await send_async_request(
+                request, method.lower(), limiter=self.limiter, retry=self.retry
+            )
+        try:
+            status, content = await send_async_request(
+                request, method.lower(), limiter=self.limiter, retry=self.retry
+            )
+        except Exception as error:
+            _finish_report(instrumentation, info, None, None, body, error)
+            raise
+        _finish_report(instrumentation, info, status, content, body)
+        return status, content
+
+    @staticmethod
+    def _sign(method, url, oauth, headers=None):
+        """Sign a request with OAuth
+
+        :returns: the signed url and the headers to send
+        :rtype: tuple
+        """
+        signed_url, signed, _ = oauth.client.sign(url, http_method=method)
+        # requests_oauthlib configures the signer to return utf-8 bytes
+        signed = dict((_to_str(k), _to_str(v)) for k, v in signed.items())
+        if headers:
+            signed.update(headers)
+        return yarl.URL(_to_str(signed_url), encoded=True), signed
+
+    def _decode(self, status, body):
+        """Decode a response body like :meth:`shapeways.client.Client._json`"""
+        try:
+            if self.codec is None:
+                return json.loads(body.decode("utf-8"))
+            return self.codec.loads(body)
+        except ValueError:
+            return {"result": "failure", "reason": "HTTP %s" % status}
+
+    async def connect(self):
+        """Get an OAuth request token and authentication url
+
+        :returns: the authentication url that the user must visit or None
+            on error
+        :rtype: str or None
+        """
+        _, body = await self._send("POST", "/oauth1/request_token/", self.oauth)
+        data = parse_qs(body.decode("utf-8"))
+        self.oauth_secret = data.get("oauth_token_secret", [None])[0]
+        return data.get("authentication_url", [None])[0]
+
+    async def verify(self, oauth_token, oauth_verifier):
+        """Get an access token and setup OAuth credentials for further use
+
+        :param oauth_token: the ``oauth_token`` parameter from the
+            authentication callback
+        :type oauth_token: str
+        :param oauth_verifier: the ``oauth_verifier`` parameter from the
+            authentication callback
+        :type oauth_verifier: str
+        """
+        access_oauth = OAuth1(
+            self.consumer_key,
+            client_secret=self.consumer_secret,
+            resource_owner_key=oauth_token,
+            resource_owner_secret=self.oauth_secret,
+            verifier=oauth_verifier
+        )
+        _, body = await self._send("POST", "/oauth1/access_token/", access_oauth)
+        data = parse_qs(body.decode("utf-8"))
+        self.oauth_token = data.get("oauth_token", [None])[0]
+        self.oauth_secret = data.get("oauth_token_secret", [None])[0]
+        self.oauth = OAuth1(
+            self.consumer_key,
+            client_secret=self.consumer_secret,
+            resource_owner_key=self.oauth_token,
+            resource_owner_secret=self.oauth_secret,
+        )
+
+    def iter_models(self, limit=None, start_page=1, prefetch=True):
+        """asyncio version of :meth:`shapeways.client.Client.iter_models`
+
+        .. code:: python
+
+            async for model in client.iter_models():
+                print(model["modelId"])
+
+        :returns: an async generator of model records
+        """
+        return aiter_items(
+            self._models_page, limit=limit, start_page=start_page,
+            prefetch=prefetch
+        )
+
+    def bulk_upload(
+            self, sources, params=None, concurrency=DEFAULT_CONCURRENCY,
+            readers=DEFAULT_READERS, max_bytes=DEFAULT_MAX_BYTES, stats=None
+    ):
+        """asyncio version of :meth:`shapeways.client.Client.bulk_upload`
+
+        .. code:: python
+
+            async for item in client.bulk_upload("meshes/", params, concurrency=32):
+                print(item.source, item.ok)
+
+        :returns: an async generator of :class:`shapeways.bulk.UploadResult`
+        """
+        return run_async_bulk_upload(
+            self, sources, params, concurrency=concurrency, readers=readers,
+            max_bytes=max_bytes, stats=stats
+        )
+
+    async def download_model_file(
+            self, model_id, file_version, dest, progress=None,
+            chunk_size=DOWNLOAD_CHUNK_SIZE
+    ):
+        """asyncio version of :meth:`shapeways.client.Client.download_model_file`
+
+        The response is decoded as it arrives; decoding and writing to
+        ``dest`` run in the default executor, off the event loop.
+
+        :returns: the file information (without the file data), the number
+            of bytes written and the download duration
+        :rtype: :class:`shapeways.download.DownloadResult`
+        :raises: :class:`ValueError` when the request failed or the response
+            holds no file data
+        """
+        loop = asyncio.get_event_loop()
+        url = "%s?%s" % (
+            self._routes.url("model_file", model_id, file_version),
+            urlencode({"file": 1})
+        )
+        if self.limiter is not None:
+            delay = self.limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+        signed_url, headers = self._sign("GET", url, self.oauth)
+        start = time.time()
+        async with self._get_session().get(signed_url, headers=headers) as response:
+            if response.status != 200:
+                raise ValueError("download failed with HTTP %s: %r" % (
+                    response.status, self._decode(response.status, await response.read())
+                ))
+            out = dest
+            if isinstance(dest, str):
+                out = await loop.run_in_executor(None, open, dest, "wb")
+            try:
+                decoder = Base64FieldDecoder(out)
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await loop.run_in_executor(None, decoder.feed, chunk)
+                    if progress is not None:
+                        progress(decoder.bytes_written)
+                return await loop.run_in_executor(None, download_result, decoder, start)
+            finally:
+                if out is not dest:
+                    out.close()
+
+    async def _models_page(self, page):
+        return (await self.get_models(page=page)).get("models") or []
+
+    async def _cached_get(self, endpoint, path):
+        cache = self.cache
+        if cache is None or not cache.caches(endpoint):
+            return await self._get(path)
+        key = cache.key(
+            endpoint, self.url(path),
+            credentials=self._credentials_key()
+        )
+        result = cache.get(key)
+        if result is None:
+            result = await self._get(path)
+            if result.get("result") != "failure":
+                cache.set(key, result)
+        else:
+            self._cache_hit("get", path)
+        return result
+
+    async def _indexed_upload(self, digest, params, upload, target=None):
+        uploads = self.uploads
+        scale = params.get("uploadScale", 1.0)
+        owner = self._credentials_key()
+        recorded = uploads.lookup(digest, scale, target, owner)
+        if recorded is not None:
+            model_id = recorded.get("modelId", target)
+            if not uploads.verify or await self._model_exists(model_id):
+                return recorded
+            uploads.forget(model_id)
+        response = await upload()
+        if uploads.succeeded(response):
+            uploads.record(digest, response, scale, target, owner)
+        return response
+
+    async def _model_exists(self, model_id):
+        return (await self.get_model_info(model_id)).get("result") == "success"
+
+    async def _quoted_price(self, params):
+        key = self.quotes.quote_key(params)
+        result = self.quotes.get(key)
+        if result is None:
+            result = await self._post(
+                self._routes.path("price"), body=self._dumps(params)
+            )
+            if result.get("result") != "failure":
+                self.quotes.set(key, result)
+        else:
+            self._cache_hit("post", self._routes.path("price"))
+        return result
+
+    async def _get(self, path, params=None):
+        coalescer = self.coalescer
+        if coalescer is None:
+            return await self._get_once(path, params)
+        key = coalescer.key(
+            self.url(path), params, credentials=self._credentials_key()
+        )
+        return await coalescer.acall(key, lambda: self._get_once(path, params))
+
+    async def _get_once(self, path, params=None):
+        validators = self.validators
+        if validators is None:
+            return self._decode(*await self._send("GET", path, self.oauth, params=params))
+        key = validators.key(
+            self.url(path), params, credentials=self._credentials_key()
+        )
+        received = []
+        status, body = await self._send(
+            "GET", path, self.oauth, params=params,
+            headers=validators.headers(key), received=received
+        )
+        if status == 304:
+            result = validators.not_modified(key)
+            if result is not None:
+                return result
+            # evicted while the request was in flight
+            status, body = await self._send(
+                "GET", path, self.oauth, params=params, received=received
+            )
+        result = self._decode(status, body)
+        if status == 200:
+            validators.store(key, received[-1], result, len(body))
+        return result
+
+    async def _delete(self, url, params=None):
+        return self._decode(*await self._send("DELETE", url, self.oauth, params=params))
+
+    async def _post(self, url, body=None, params=None, headers=None):
+        return self._decode(*await self._send(
+            "POST", url, self.oauth, params=params, body=body, headers=headers
+        ))
+
+    async def _put(self, url, body=None, params=None):
+        return self._decode(
+            *await self._send("PUT", url, self.oauth, params=params, body=body)
+        )
+
+
+class AsyncShapewaysOauth2Client(_AsyncSessionMixin, ShapewaysOauth2Client):
+    """
+    asyncio version of :class:`shapeways.oauth2_client.ShapewaysOauth2Client`
+
+    Every endpoint method, as well as :meth:`authenticate`, returns an awaitable.
+    """
+
+    async def authenticate(self, client_id, client_secret):
+        """
+        Authenticate your application and retrieve a bearer token
+
+        :type client_id: str
+        :type client_secret: str
+        :return: True for success, false for Failure
+        :rtype: bool
+        """
+        if self.tokens is not None:
+            self._credentials = (client_id, client_secret)
+            try:
+                await self._refresh_token()
+            except RuntimeError as error:
+                self._credentials = None
+                print("Error: " + str(error))
+                return False
+            self.client_id = client_id
+            return True
+
+        status, content = await self._post_credentials(client_id, client_secret)
+        if status == 200:
+            self.client_id = client_id
+            self.access_token = self._loads(content)['access_token']
+            return True
+        print("Error: status code " + str(status))
+        print(content)
+        return False
+
+    async def _post_credentials(self, client_id, client_secret):
+        """
+        Internal function - post the client credentials to the token endpoint
+        :return: the response status and raw body
+        :rtype: tuple
+        """
+        auth_post_data = {
+            'grant_type': 'client_credentials'
+        }
+        credentials = base64.b64encode('{}:{}'.format(client_id, client_secret).encode('utf-8'))
+        headers = {
+            'Authorization': 'Basic ' + credentials.decode('ascii')
+        }
+        session = self._get_session()
+
+        async def request():
+            async with session.post(self._routes.url('token'), data=auth_post_data,
+                                    headers=headers) as response:
+                return response.status, response.headers, await response.read()
+        return await send_async_request(request, 'post', limiter=self.limiter, retry=self.retry)
+
+    async def _request_token(self):
+        """
+        Internal function - asyncio version of ShapewaysOauth2Client._request_token
+        :rtype: dict
+        """
+        status, content = await self._post_credentials(*self._credentials)
+        if status != 200:
+            raise RuntimeError("Token request threw status {}".format(status))
+        return self._loads(content)
+
+    async def _refresh_token(self):
+        """
+        Internal function - refresh the access token through the token manager when due
+
+        The manager blocks on its locks, so a refresh runs on an executor thread and posts
+        the credentials on the event loop.
+        """
+        client_id = self._credentials[0]
+        access_token = self.tokens.current(client_id)
+        if access_token is None:
+            loop = asyncio.get_event_loop()
+
+            def fetch():
+                return asyncio.run_coroutine_threadsafe(self._request_token(), loop).result()
+            access_token = await loop.run_in_executor(None, self.tokens.get, client_id, fetch)
+        self.access_token = access_token
+
+    def _token(self):
+        # refreshed by _refresh_token before every request
+        return self.access_token
+
+    def _check_status(self, status):
+        """
+        Internal function - raise for an unsuccessful status, dropping a rejected token
+        """
+        if status != 200:
+            if status == 401 and self.tokens is not None:
+                self.tokens.invalidate(self.access_token)
+            raise StatusError(status)
+
+    async def _execute(self, method, url, data=None, params=None, headers=None,
+                       validated=None):
+        """
+        Internal function - execute request and validate
+        :param validated: validators key the request is made conditional on
+        :rtype: list()
+        """
+        if self.tokens is not None and self._credentials is not None:
+            await self._refresh_token()
+        extra = headers
+        if headers:
+            headers = dict(self._auth_headers(), **headers)
+        else:
+            headers = self._auth_headers()
+        if validated is not None:
+            headers.update(self.validators.headers(validated))
+        received = []
+        session = self._get_session()
+        instrumentation = self.instrumentation
+        info = None
+        if instrumentation is not None:
+            info = instrumentation.start(method, url, self._routes)
+
+        async def request():
+            started = _attempt_started(info)
+            body, sent = _async_body(data, headers)
+            async with session.request(method, url, headers=sent, data=body,
+                                       params=params) as response:
+                received.append(response.headers)
+                return response.status, response.headers, await _read_body(
+                    info, started, response)
+        if info is None:
+            status, content = await send_async_request(request, method.lower(),
+                                                       limiter=self.limiter, retry=self.retry)
+            result = self._response(status, content, received, validated)
+        else:
+            status = content = None
+            try:
+                status, content = await send_async_request(request, method.lower(),
+                                                           limiter=self.limiter, retry=self.retry)
+                decoding = default_timer()
+                result = self._response(status, content, received, validated)
+                info.decode = default_timer() - decoding
+            except Exception as error:
+                _finish_report(instrumentation, info, status, content, data, error)
+                raise
+            _finish_report(instrumentation, info, status, content, data)
+        if result is None:
+            # not modified, but evicted while the request was in flight
+            return await self._execute(method, url, data, params, extra)
+        return result
+
+    def _response(self, status, content, received, validated):
+        """
+        Internal function - check and decode a response, revalidating against the stored
+        validators of a conditional request
+        :returns: the content, None for a 304 reply whose stored content was evicted
+        """
+        if validated is not None and status == 304:
+            return self.validators.not_modified(validated)
+        self._check_status(status)
+        result = self._validate_content(self._loads(content))
+        if validated is not None:
+            self.validators.store(validated, received[-1], result, len(content))
+        return result
+
+    def _loads(self, content):
+        """
+        Internal function - decode a response body with the codec
+        """
+        if self.codec is None:
+            return json.loads(content.decode('utf-8'))
+        return self.codec.loads(content)
+
+    def _execute_get(self, url, **params):
+        coalescer = self.coalescer
+        if coalescer is None:
+            return self._execute_get_once(url, **params)
+        key = coalescer.key(url, params.get('params'), credentials=self._credentials_key(),
+                            body=params.get('data'))
+        return coalescer.acall(key, lambda: self._execute_get_once(url, **params))
+
+    def _execute_get_once(self, url, **params):
+        validators = self.validators
+        if validators is None:
+            return self._execute('GET', url, **params)
+        key = validators.key(url, credentials=self._credentials_key())
+        return self._execute('GET', url, validated=key, **params)
+
+    async def _cached_get(self, endpoint, url, **params):
+        cache = self.cache
+        if cache is None or not cache.caches(endpoint):
+            return await self._execute_get(url, **params)
+        key = cache.key(endpoint, url, credentials=self._credentials_key())
+        content = cache.get(key)
+        if content is None:
+            content = await self._execute_get(url, **params)
+            cache.set(key, content)
+        elif self.instrumentation is not None:
+            self.instrumentation.cached('get', url, self._routes)
+        return content
+
+    async def _indexed_upload(self, digest, upload):
+        uploads = self.uploads
+        owner = self._credentials_key()
+        recorded = uploads.lookup(digest, owner=owner)
+        if recorded is not None:
+            model_id = recorded.get("modelId")
+            if not uploads.verify or await self._model_exists(model_id):
+                return recorded
+            uploads.forget(model_id)
+        response = await upload()
+        if uploads.succeeded(response):
+            uploads.record(digest, response, owner=owner)
+        return response
+
+    async def _model_exists(self, model_id):
+        try:
+            await self.get_single_model(model_id)
+        except RuntimeError:
+            return False
+        return True
+
+    def _execute_delete(self, url, **params):
+        return self._execute('DELETE', url, **params)
+
+    def _execute_post(self, url, **params):
+        return self._execute('POST', url, **params)
+
+    def _execute_put(self, url, **params):
+        return self._execute('PUT', url, **params)
+
+    async def get_materials(self):
+        """
+        Get our material list
+
+        :return: list of materials
+        :rtype: list()
+        """
+        content = await self._cached_get('materials', self._routes.url('materials'))
+        return self._typed('materials', content)['materials']
+
+    async def get_models(self, page_count=1):
+        """
+        Use your bearer token to retrieve a list of your models
+
+        :return: list of models
+        :rtype: list()
+        """
+        content = await self._execute_get(url=self._routes.url('models') + '?page=' + str(page_count))
+        return self._typed('models', content['models'])
+
+    def iter_models(self, limit=None, start_page=1, prefetch=True):
+        """
+        asyncio version of :meth:`shapeways.oauth2_client.ShapewaysOauth2Client.iter_models`
+
+        :return: async generator of models
+        """
+        return aiter_items(self.get_models, limit=limit, start_page=start_page, prefetch=prefetch)
@@ -0,0 +1,131 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchResult(namedtuple("BatchResult", ["key", "result", "error"])):
+    """The outcome of a single call made by a batch
+
+    ``key`` is the input the call was made for (e.g. the model id given to
+    :meth:`shapeways.batch.BatchMixin.map`), ``result`` is the value returned
+    by the call and ``error`` the exception it raised, if any.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Whether the call completed without raising"""
+        return self.error is None
+
+
+def _call(func, args, kwargs):
+    try:
+        return func(*args, **kwargs), None
+    except Exception as error:
+        return None, error
+
+
+def run_batch(calls, concurrency=DEFAULT_CONCURRENCY):
+    """Run ``calls`` on a bounded thread pool, yielding results as they finish
+
+    At most ``concurrency`` calls are in flight at once and the ``calls``
+    iterable is consumed lazily, so arbitrarily long inputs use constant
+    memory. An exception raised by a call is returned in its
+    :class:`shapeways.batch.BatchResult` instead of aborting the batch.
+
+    :param calls: iterable of ``(key, func, args, kwargs)`` tuples
+    :type calls: iterable
+    :param concurrency: the maximum number of calls in flight
+    :type concurrency: int
+    :returns: a generator of :class:`shapeways.batch.BatchResult` in
+        completion order
+    :rtype: generator
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    calls = iter(calls)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            while True:
+                for key, func, args, kwargs in calls:
+                    future = executor.submit(_call, func, args, kwargs)
+                    pending[future] = key
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result, error = future.result()
+                    yield BatchResult(pending.pop(future), result, error)
+        finally:
+            # the consumer stopped early, don't start anything new
+            for future in pending:
+                future.cancel()
+
+
+class BatchMixin(object):
+    """Fan-out helpers shared by the API clients
+
+    The calls run on a bounded worker pool and share the client's pooled
+    session. Size the client's ``pool_maxsize`` to at least ``concurrency``
+    so every worker can keep its connection alive.
+    """
+    __slots__ = ()
+
+    def map(self, method, keys, concurrency=DEFAULT_CONCURRENCY):
+        """Call ``method`` once for every item in ``keys``
+
+        .. code:: python
+
+            for item in client.map("get_model_info", model_ids, concurrency=16):
+                if item.ok:
+                    save(item.key, item.result)
+                else:
+                    log(item.key, item.error)
+
+        :param method: the name of the client method to call, e.g.
+            ``"get_model_info"``
+        :type method: str
+        :param keys: the arguments to call ``method`` with, one per call
+        :type keys: iterable
+        :param concurrency: the maximum number of calls in flight
+        :type concurrency: int
+        :returns: a generator of :class:`shapeways.batch.BatchResult` in
+            completion order, keyed by the input item
+        :rtype: generator
+        """
+        func = getattr(self, method)
+        return run_batch(
+            ((key, func, (key,), {}) for key in keys), concurrency=concurrency
+        )
+
+    def batch(self, calls, concurrency=DEFAULT_CONCURRENCY):
+        """Make a mixed batch of calls
+
+        .. code:: python
+
+            calls = [
+                ("get_material", (6,)),
+                ("get_model", (86,)),
+                ("delete_model", (87,)),
+            ]
+            for item in client.batch(calls):
+                print(item.key, item.ok)
+
+        :param calls: iterable of ``(method, args)`` or
+            ``(method, args, kwargs)`` tuples
+        :type calls: iterable
+        :param concurrency: the maximum number of calls in flight
+        :type concurrency: int
+        :returns: a generator of :class:`shapeways.batch.BatchResult` in
+            completion order, keyed by the call tuple
+        :rtype: generator
+        """
+        def expand():
+            for call in calls:
+                kwargs = call[2] if len(call) > 2 else {}
+                yield call, getattr(self, call[0]), tuple(call[1]), kwargs
+        return run_batch(expand(), concurrency=concurrency)
@@ -0,0 +1,372 @@
+"""Parallel upload of many model files
+
+:func:`bulk_upload` runs the upload of a directory or manifest of model
+files as a pipeline: a pool of reader threads reads and hashes the files
+while a pool of upload threads base64 encodes and sends them with
+:meth:`shapeways.client.Client.add_model_stream`. A byte budget caps the
+file data held by both stages, so memory stays bounded however fast the
+files can be read, and results are streamed as uploads finish.
+
+.. code:: python
+
+    stats = UploadStats()
+    params = {"hasRightsToModel": True, "acceptTermsAndConditions": True}
+    for item in client.bulk_upload("meshes/", params, stats=stats):
+        if not item.ok:
+            log(item.source, item.error or item.result)
+    print("%.1f files/s %.1f MB/s" % (stats.files_per_second, stats.megabytes_per_second))
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from shapeways.batch import DEFAULT_CONCURRENCY
+from shapeways.compat import string_types
+from shapeways.upload import DEFAULT_CHUNK_SIZE
+
+#: Bytes of file data held by the read and upload stages at most
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+#: Reader threads reading and hashing files
+DEFAULT_READERS = 2
+
+#: Files picked up when uploading a directory
+MODEL_EXTENSIONS = (
+    ".stl", ".obj", ".x3d", ".x3db", ".x3dv", ".wrl", ".dae", ".zip",
+)
+
+
+class UploadResult(namedtuple(
+        "UploadResult", ["source", "result", "error", "size", "digest"]
+)):
+    """The outcome of the upload of a single file
+
+    ``source`` is the path uploaded, ``result`` the upload response,
+    ``error`` the exception raised reading or uploading the file, if any,
+    ``size`` the size of the file and ``digest`` the hex encoded sha256 of
+    its contents.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Whether the file was read and the API accepted it"""
+        return (
+            self.error is None and
+            not (isinstance(self.result, dict) and self.result.get("result") == "failure")
+        )
+
+
+class UploadStats(object):
+    """Aggregate throughput of a :func:`bulk_upload`, updated as it runs"""
+    __slots__ = [
+        "files", "failed", "bytes", "encoded_bytes", "peak_buffered",
+        "started", "finished", "_clock",
+    ]
+
+    def __init__(self, clock=time.time):
+        self.files = 0
+        self.failed = 0
+        self.bytes = 0
+        self.encoded_bytes = 0
+        self.peak_buffered = 0
+        self.started = None
+        self.finished = None
+        self._clock = clock
+
+    @property
+    def elapsed(self):
+        """Seconds since the upload started, until it finished"""
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else self._clock()
+        return end - self.started
+
+    @property
+    def files_per_second(self):
+        elapsed = self.elapsed
+        return self.files / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        """Throughput of the file contents, in MB (10 ** 6 bytes) per second"""
+        elapsed = self.elapsed
+        return self.bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "encoded_bytes": self.encoded_bytes,
+            "peak_buffered": self.peak_buffered,
+            "elapsed": self.elapsed,
+            "files_per_second": self.files_per_second,
+            "megabytes_per_second": self.megabytes_per_second,
+        }
+
+
+class ByteBudget(object):
+    """Blocking budget of bytes held in memory
+
+    :meth:`acquire` blocks until the bytes fit in the budget. A request
+    larger than the whole budget is let through once nothing else is held,
+    so single large files still make progress. Once the budget is closed
+    :meth:`acquire` raises :class:`RuntimeError` instead of blocking.
+
+    :param limit: the bytes that can be held at once
+    :type limit: int
+    """
+    __slots__ = ["limit", "used", "peak", "closed", "_condition"]
+
+    def __init__(self, limit):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, size):
+        with self._condition:
+            while not self.closed and self.used and self.used + size > self.limit:
+                self._condition.wait()
+            if self.closed:
+                raise RuntimeError("the byte budget is closed")
+            self.used += size
+            self.peak = max(self.peak, self.used)
+
+    def release(self, size):
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+    def close(self):
+        """Wake up and fail every :meth:`acquire` waiting on the budget"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+def encoded_size(size):
+    """The length of the base64 encoding of ``size`` bytes"""
+    return (size + 2) // 3 * 4
+
+
+def held_size(size):
+    """The bytes held in memory to read and upload a file of ``size`` bytes
+
+    The contents of the file are held until its upload is done, plus a chunk
+    of the file and its base64 encoding while the upload is sent, see
+    :class:`shapeways.upload.JsonUploadBody`.
+    """
+    chunk = min(size, DEFAULT_CHUNK_SIZE)
+    return size + chunk + encoded_size(chunk)
+
+
+def directory_sources(path, extensions=MODEL_EXTENSIONS):
+    """The model files below a directory, in a stable order
+
+    :param path: the directory to walk
+    :type path: str
+    :param extensions: the file extensions to pick up, all files when
+        ``None``
+    :type extensions: tuple or None
+    :returns: a generator of file paths
+    :rtype: generator
+    """
+    for root, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            if extensions is None or name.lower().endswith(extensions):
+                yield os.path.join(root, name)
+
+
+def manifest_sources(path):
+    """The uploads listed in a manifest
+
+    The manifest holds one JSON object per line, with the path of the file
+    (relative to the manifest) in ``file`` and any other ``add_model``
+    parameters for that file, e.g.
+    ``{"file": "cube.stl", "title": "Cube", "uploadScale": 0.001}``.
+
+    :param path: the manifest file
+    :type path: str
+    :returns: a generator of ``(path, params)`` tuples
+    :rtype: generator
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path) as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line:
+                continue
+            params = json.loads(line)
+            source = params.pop("file")
+            yield os.path.join(base, source), params
+
+
+def upload_sources(sources, params=None):
+    """Expand the ``sources`` of a :func:`bulk_upload` to ``(path, params)``
+    tuples
+
+    :param sources: a directory, or an iterable of file paths or
+        ``(path, params)`` tuples
+    :type sources: str or iterable
+    :param params: parameters shared by every file, per file parameters
+        take precedence
+    :type params: dict or None
+    :returns: a generator of ``(path, params)`` tuples
+    :rtype: generator
+    """
+    if isinstance(sources, string_types):
+        sources = directory_sources(sources)
+    shared = params or {}
+    for source in sources:
+        if isinstance(source, tuple):
+            source, extra = source
+            yield source, dict(shared, **extra)
+        else:
+            yield source, shared
+
+
+def read_upload(source, params, budget):
+    """Read and hash a file for
+    :meth:`shapeways.client.Client.add_model_stream`
+
+    The :func:`shapeways.bulk.held_size` of the file is taken from
+    ``budget`` before the file is read and must be released once the upload
+    is done. The contents are base64 encoded a chunk at a time as they are
+    sent, so no full size encoded copy or JSON body is ever built.
+
+    :returns: ``(contents, params, size, digest, reserved)`` where
+        ``contents`` is a file object of the contents of the file
+    :rtype: tuple
+    """
+    reserved = held_size(os.path.getsize(source))
+    budget.acquire(reserved)
+    try:
+        with open(source, "rb") as data:
+            contents = data.read()
+        params = dict(params)
+        params.setdefault("fileName", os.path.basename(source))
+        size = len(contents)
+        digest = hashlib.sha256(contents).hexdigest()
+        return io.BytesIO(contents), params, size, digest, reserved
+    except Exception:
+        budget.release(reserved)
+        raise
+
+
+def _upload(upload, contents, params, budget, reserved):
+    try:
+        return upload(contents, params), None
+    except Exception as error:
+        return None, error
+    finally:
+        contents.close()
+        budget.release(reserved)
+
+
+def bulk_upload(
+        client, sources, params=None, concurrency=DEFAULT_CONCURRENCY,
+        readers=DEFAULT_READERS, max_bytes=DEFAULT_MAX_BYTES, stats=None
+):
+    """Upload many model files through a read/encode and upload pipeline
+
+    Reading happens on ``readers`` threads and uploads on ``concurrency``
+    threads, so the uplink is kept busy while the next files are read. At
+    most ``max_bytes`` of file data and encoding buffers are held by the
+    stages, and ``sources`` is consumed lazily. Errors reading
+    or uploading a file are returned in its
+    :class:`shapeways.bulk.UploadResult` instead of aborting the upload.
+
+    Uploads go through :meth:`shapeways.client.Client.add_model_stream`, so
+    a client's ``uploads`` index and ``retry`` policy apply to each file.
+
+    :param client: the client to upload with
+    :type client: :class:`shapeways.client.Client`
+    :param sources: a directory (see
+        :func:`shapeways.bulk.directory_sources`) or an iterable of file
+        paths or ``(path, params)`` tuples (see
+        :func:`shapeways.bulk.manifest_sources`)
+    :type sources: str or iterable
+    :param params: ``add_model`` parameters shared by every file, e.g.
+        ``hasRightsToModel``; per file parameters take precedence
+    :type params: dict or None
+    :param concurrency: the maximum number of uploads in flight
+    :type concurrency: int
+    :param readers: the number of threads reading files
+    :type readers: int
+    :param max_bytes: the bytes of file data held in memory at most
+    :type max_bytes: int
+    :param stats: updated with the throughput as the upload runs
+    :type stats: :class:`shapeways.bulk.UploadStats` or None
+    :returns: a generator of :class:`shapeways.bulk.UploadResult` in
+        completion order
+    :rtype: generator
+    """
+    if concurrency < 1 or readers < 1:
+        raise ValueError("concurrency and readers must be at least 1")
+    sources = upload_sources(sources, params)
+    budget = ByteBudget(max_bytes)
+    stats = stats if stats is not None else UploadStats()
+    stats.started = stats._clock()
+    stats.finished = None
+    reading = {}
+    uploading = {}
+    read_pool = ThreadPoolExecutor(max_workers=readers)
+    upload_pool = ThreadPoolExecutor(max_workers=concurrency)
+    exhausted = False
+    try:
+        while True:
+            # keep the readers busy, the budget holds them back
+            while not exhausted and len(reading) < readers * 2:
+                try:
+                    source, file_params = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                reading[read_pool.submit(read_upload, source, file_params, budget)] = source
+            if not reading and not uploading:
+                return
+            done, _ = wait(list(reading) + list(uploading), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in reading:
+                    source = reading.pop(future)
+                    try:
+                        contents, upload_params, size, digest, reserved = future.result()
+                    except Exception as error:
+                        stats.failed += 1
+                        yield UploadResult(source, None, error, None, None)
+                        continue
+                    stats.encoded_bytes += encoded_size(size)
+                    stats.peak_buffered = budget.peak
+                    uploading[upload_pool.submit(
+                        _upload, client.add_model_stream, contents, upload_params,
+                        budget, reserved
+                    )] = (source, size, digest)
+                else:
+                    source, size, digest = uploading.pop(future)
+                    result, error = future.result()
+                    item = UploadResult(source, result, error, size, digest)
+                    if item.ok:
+                        stats.files += 1
+                        stats.bytes += size
+                    else:
+                        stats.failed += 1
+                    yield item
+    finally:
+        stats.finished = stats._clock()
+        # the consumer stopped early, don't start anything new
+        for future in list(reading) + list(uploading):
+            future.cancel()
+        budget.close()
+        read_pool.shutdown(wait=False)
+        upload_pool.shutdown(wait=False)
@@ -0,0 +1,382 @@
+import threading
+import time
+from collections import OrderedDict
+
+#: Default time to live, in seconds, of the reference data endpoints
+DEFAULT_TTLS = {
+    "materials": 3600,
+    "material": 3600,
+    "printers": 3600,
+    "printer": 3600,
+    "categories": 3600,
+    "category": 3600,
+}
+
+
+class ResponseCache(object):
+    """Size bounded, thread safe LRU cache of API responses with per
+    endpoint expiry
+
+    Only endpoints with a TTL are cached. Responses from endpoints listed in
+    ``shared`` are the same for every user and are cached once, all other
+    endpoints are cached separately per set of credentials. A single cache
+    can be shared by several clients.
+
+    .. code:: python
+
+        cache = ResponseCache(ttls={"materials": 600, "category": 86400})
+        client = Client("key", "secret", cache=cache)
+        client.get_materials()  # network
+        client.get_materials()  # cache
+        cache.invalidate("materials")
+        print(cache.stats())
+
+    Cached responses are returned as is, treat them as read only.
+    """
+    __slots__ = [
+        "ttls", "maxsize", "shared", "clock", "hits", "misses", "evictions",
+        "_entries", "_lock",
+    ]
+
+    def __init__(self, ttls=None, maxsize=1024, shared=None, clock=time.time):
+        """Constructor for a new :class:`shapeways.cache.ResponseCache`
+
+        :param ttls: dict of endpoint name to time to live in seconds,
+            defaults to :data:`shapeways.cache.DEFAULT_TTLS`
+        :type ttls: dict or None
+        :param maxsize: the maximum number of responses to hold, the least
+            recently used response is evicted first
+        :type maxsize: int
+        :param shared: endpoint names whose responses are not user specific,
+            defaults to the endpoints in :data:`shapeways.cache.DEFAULT_TTLS`
+        :type shared: iterable or None
+        :param clock: function returning the current time in seconds
+        :type clock: callable
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self.shared = frozenset(DEFAULT_TTLS if shared is None else shared)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def caches(self, endpoint):
+        """Whether responses from ``endpoint`` are cached
+
+        :param endpoint: the endpoint name e.g. ``"materials"``
+        :type endpoint: str
+        :rtype: bool
+        """
+        return bool(self.ttls.get(endpoint))
+
+    def key(self, endpoint, url, params=None, credentials=None):
+        """Build the cache key for a request
+
+        :param endpoint: the endpoint name e.g. ``"material"``
+        :type endpoint: str
+        :param url: the full url of the request
+        :type url: str
+        :param params: the query string parameters of the request
+        :type params: dict or None
+        :param credentials: identifies the user the request is made for,
+            ignored for shared endpoints
+        :type credentials: hashable
+        :rtype: tuple
+        """
+        if endpoint in self.shared:
+            credentials = None
+        if params:
+            params = tuple(sorted(params.items()))
+        return endpoint, credentials, url, params or None
+
+    def get(self, key, default=None):
+        """Get a cached response, counting the lookup as a hit or miss
+
+        :param key: a key from :meth:`shapeways.cache.ResponseCache.key`
+        :type key: tuple
+        :param default: returned when there is no fresh entry for ``key``
+        :returns: the cached response or ``default``
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > self.clock():
+                # re-insert to mark as most recently used
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store a response using the TTL of the key's endpoint
+
+        :param key: a key from :meth:`shapeways.cache.ResponseCache.key`
+        :type key: tuple
+        :param value: the response to store
+        """
+        ttl = self.ttls.get(key[0])
+        if not ttl:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self.clock() + ttl, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, endpoint=None, credentials=None):
+        """Drop cached responses
+
+        :param endpoint: only drop responses from this endpoint
+        :type endpoint: str or None
+        :param credentials: only drop responses cached for these credentials
+        :type credentials: hashable
+        :returns: the number of responses dropped
+        :rtype: int
+        """
+        with self._lock:
+            if endpoint is None and credentials is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            stale = [
+                key for key in self._entries
+                if (endpoint is None or key[0] == endpoint) and
+                (credentials is None or key[1] == credentials)
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        """Drop every cached response and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Get the cache counters
+
+        :returns: ``hits``, ``misses``, ``evictions``, ``size`` and
+            ``hit_rate``
+        :rtype: dict
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+            }
+
+
+class ValidatorCache(object):
+    """Size bounded, thread safe store of HTTP validators for conditional
+    GET requests
+
+    The ``ETag`` and ``Last-Modified`` headers of successful GET responses
+    are kept together with the decoded response. Later GETs for the same url
+    send ``If-None-Match`` / ``If-Modified-Since`` and a ``304 Not Modified``
+    reply is answered from the stored response, skipping both the body
+    transfer and the JSON decode.
+
+    .. code:: python
+
+        validators = ValidatorCache()
+        client = Client("key", "secret", validators=validators)
+        client.get_models(page=1)  # 200, validators stored
+        client.get_models(page=1)  # 304, served from the store
+        print(validators.stats())
+
+    Stored responses are returned as is, treat them as read only.
+    """
+    __slots__ = [
+        "maxsize", "revalidated", "modified", "bytes_saved", "_entries",
+        "_lock",
+    ]
+
+    def __init__(self, maxsize=1024):
+        """Constructor for a new :class:`shapeways.cache.ValidatorCache`
+
+        :param maxsize: the maximum number of responses to hold, the least
+            recently used response is evicted first
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self.revalidated = 0
+        self.modified = 0
+        self.bytes_saved = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, url, params=None, credentials=None):
+        """Build the store key for a request
+
+        :param url: the full url of the request
+        :type url: str
+        :param params: the query string parameters of the request
+        :type params: dict or None
+        :param credentials: identifies the user the request is made for
+        :type credentials: hashable
+        :rtype: tuple
+        """
+        if params:
+            params = tuple(sorted(params.items()))
+        return credentials, url, params or None
+
+    def headers(self, key):
+        """Get the conditional request headers for ``key``
+
+        :param key: a key from :meth:`shapeways.cache.ValidatorCache.key`
+        :type key: tuple
+        :returns: ``If-None-Match`` and/or ``If-Modified-Since`` headers,
+            empty when nothing is stored for ``key``
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = {}
+        if entry is not None:
+            etag, last_modified = entry[0], entry[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def not_modified(self, key):
+        """Get the stored response for a ``304 Not Modified`` reply
+
+        :param key: a key from :meth:`shapeways.cache.ValidatorCache.key`
+        :type key: tuple
+        :returns: the stored response or None if it has been evicted
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+            self.revalidated += 1
+            self.bytes_saved += entry[3]
+            return entry[2]
+
+    def store(self, key, response_headers, value, size):
+        """Store the validators and decoded value of a ``200`` reply
+
+        Responses without an ``ETag`` or ``Last-Modified`` header are not
+        stored.
+
+        :param key: a key from :meth:`shapeways.cache.ValidatorCache.key`
+        :type key: tuple
+        :param response_headers: the response headers
+        :type response_headers: dict
+        :param value: the decoded response
+        :param size: the size of the response body in bytes
+        :type size: int
+        """
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            self.modified += 1
+            self._entries.pop(key, None)
+            if not (etag or last_modified):
+                return
+            self._entries[key] = (etag, last_modified, value, size)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every stored response and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.revalidated = self.modified = self.bytes_saved = 0
+
+    def stats(self):
+        """Get the revalidation counters
+
+        :returns: ``revalidated`` (304 replies), ``modified`` (full replies),
+            ``bytes_saved`` and ``size``
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "revalidated": self.revalidated,
+                "modified": self.modified,
+                "bytes_saved": self.bytes_saved,
+                "size": len(self._entries),
+            }
+
+
+#: The ``get_price`` parameters that describe the geometry of a model
+PRICE_PARAMETERS = (
+    "volume", "area", "xBoundMin", "xBoundMax",
+    "yBoundMin", "yBoundMax", "zBoundMin", "zBoundMax",
+)
+
+
+class QuoteCache(ResponseCache):
+    """Thread safe LRU cache of ``get_price`` quotes keyed by geometry
+
+    The key is built from the required geometry parameters quantised to
+    ``quantum`` (so ``1.0000000001`` and ``1.0`` share a quote), the
+    ``materials`` list in any order, and any other parameters as given.
+
+    .. code:: python
+
+        quotes = QuoteCache(ttl=600)
+        client = Client("key", "secret", quotes=quotes)
+        client.get_price(params)  # network
+        client.get_price(params)  # cache
+        print(quotes.stats()["hit_rate"])
+    """
+    __slots__ = ["quantum"]
+
+    def __init__(self, ttl=300, maxsize=4096, quantum=1e-6, clock=time.time):
+        """Constructor for a new :class:`shapeways.cache.QuoteCache`
+
+        :param ttl: time to live of a quote in seconds
+        :type ttl: int
+        :param maxsize: the maximum number of quotes to hold, the least
+            recently used quote is evicted first
+        :type maxsize: int
+        :param quantum: the resolution geometry values are rounded to
+        :type quantum: float
+        :param clock: function returning the current time in seconds
+        :type clock: callable
+        """
+        super(QuoteCache, self).__init__(
+            ttls={"price": ttl}, maxsize=maxsize, shared=("price",),
+            clock=clock
+        )
+        self.quantum = quantum
+
+    def quote_key(self, params):
+        """Build the canonical cache key for ``get_price`` parameters
+
+        :param params: the ``get_price`` parameters
+        :type params: dict
+        :rtype: tuple
+        """
+        quantum = self.quantum
+        geometry = tuple(
+            int(round(float(params[name]) / quantum)) for name in PRICE_PARAMETERS
+        )
+        materials = params.get("materials")
+        if materials is not None:
+            materials = tuple(sorted(materials))
+        extra = tuple(sorted(
+            (name, repr(value)) for name, value in params.items()
+            if name not in PRICE_PARAMETERS and name != "materials"
+        ))
+        return "price", None, (geometry, materials, extra), None
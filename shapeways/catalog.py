@@ -0,0 +1,413 @@
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+
+from shapeways.compat import replace_file
+
+#: Numeric material fields indexed for range queries by default
+DEFAULT_COST_FIELDS = ("price",)
+
+#: Version of the serialised catalog format
+FORMAT_VERSION = 1
+
+
+def _id(value):
+    """Normalise an id, the API sends both ``6`` and ``"6"``"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _name(value):
+    return (value or "").strip().lower()
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _records(response, field):
+    """The records of a listing response as a ``{id: dict}`` mapping"""
+    if isinstance(response, dict):
+        if response.get("result") == "failure":
+            raise RuntimeError("could not fetch %s: %r" % (field, response))
+        if field in response:
+            response = response[field]
+    if isinstance(response, dict):
+        response = list(response.values())
+    key = "materialId" if field == "materials" else "printerId"
+    records = {}
+    for record in response or ():
+        if not isinstance(record, dict):
+            # typed results
+            record = dict(record.items())
+        records[_id(record.get(key))] = record
+    return records
+
+
+class MaterialCatalog(object):
+    """Local, indexed copy of the material and printer listings
+
+    The catalog is built from :meth:`shapeways.client.Client.get_materials`
+    and :meth:`shapeways.client.Client.get_printers` and answers queries
+    from in-memory indexes without any network calls: lookups by id and
+    name are dict lookups, name prefix and cost range queries bisect sorted
+    indexes. :meth:`refresh` only re-indexes the records that changed, and
+    the catalog can be saved to disk so a process can start warm.
+
+    .. code:: python
+
+        catalog = MaterialCatalog.load("materials.json")
+        if catalog is None:
+            catalog = MaterialCatalog.from_client(client)
+            catalog.save("materials.json")
+
+        catalog.for_printer(1)
+        catalog.by_name("White Natural Versatile Plastic")
+        catalog.under(20.0, field="price")
+    """
+    __slots__ = [
+        "cost_fields", "updated", "_materials", "_printers", "_names",
+        "_sorted_names", "_costs", "_material_printers",
+        "_printer_materials", "_lock",
+    ]
+
+    def __init__(self, materials=None, printers=None, cost_fields=DEFAULT_COST_FIELDS):
+        """Constructor for a new :class:`shapeways.catalog.MaterialCatalog`
+
+        :param materials: a ``get_materials`` response or its records
+        :type materials: dict, list or None
+        :param printers: a ``get_printers`` response or its records
+        :type printers: dict, list or None
+        :param cost_fields: numeric material fields to index for
+            :meth:`under` and :meth:`between`
+        :type cost_fields: tuple
+        """
+        self.cost_fields = tuple(cost_fields)
+        self.updated = None
+        self._materials = {}
+        self._printers = {}
+        self._names = {}
+        self._sorted_names = []
+        self._costs = dict((field, []) for field in self.cost_fields)
+        self._material_printers = {}
+        self._printer_materials = {}
+        self._lock = threading.RLock()
+        if materials is not None or printers is not None:
+            self.update(materials, printers)
+
+    @classmethod
+    def from_client(cls, client, cost_fields=DEFAULT_COST_FIELDS):
+        """Build a catalog from the API
+
+        :param client: the client to fetch the listings with
+        :type client: :class:`shapeways.client.Client` or
+            :class:`shapeways.oauth2_client.ShapewaysOauth2Client`
+        :param cost_fields: numeric material fields to index
+        :type cost_fields: tuple
+        :rtype: :class:`shapeways.catalog.MaterialCatalog`
+        """
+        catalog = cls(cost_fields=cost_fields)
+        catalog.refresh(client)
+        return catalog
+
+    def __len__(self):
+        return len(self._materials)
+
+    def __contains__(self, material_id):
+        return _id(material_id) in self._materials
+
+    def __iter__(self):
+        return iter(list(self._materials.values()))
+
+    # updates
+    def refresh(self, client):
+        """Fetch the listings again and apply the differences
+
+        :param client: the client to fetch the listings with, printers are
+            only fetched when it has ``get_printers``
+        :returns: the ids ``added``, ``updated`` and ``removed``
+        :rtype: dict
+        :raises: :class:`RuntimeError` when the API reports a failure, the
+            catalog is left unchanged
+        """
+        # fail before fetching the printers
+        materials = _records(client.get_materials(), "materials")
+        printers = None
+        if hasattr(client, "get_printers"):
+            printers = client.get_printers()
+        return self.update(materials, printers)
+
+    def update(self, materials=None, printers=None, replace=True):
+        """Apply listings, re-indexing only the records that changed
+
+        :param materials: a ``get_materials`` response or its records,
+            ``None`` to leave the materials alone
+        :type materials: dict, list or None
+        :param printers: a ``get_printers`` response or its records, ``None``
+            to leave the printers alone
+        :type printers: dict, list or None
+        :param replace: whether records missing from the listings are
+            removed, otherwise the listings are merged in
+        :type replace: bool
+        :returns: the material ids ``added``, ``updated`` and ``removed``
+        :rtype: dict
+        """
+        changes = {"added": [], "updated": [], "removed": []}
+        material_records = None if materials is None else _records(materials, "materials")
+        printer_records = None if printers is None else _records(printers, "printers")
+        with self._lock:
+            if material_records is not None:
+                if replace:
+                    for material_id in list(self._materials):
+                        if material_id not in material_records:
+                            self._unindex_material(material_id)
+                            changes["removed"].append(material_id)
+                for material_id, record in material_records.items():
+                    current = self._materials.get(material_id)
+                    if current == record:
+                        continue
+                    if current is not None:
+                        self._unindex_material(material_id)
+                        changes["updated"].append(material_id)
+                    else:
+                        changes["added"].append(material_id)
+                    self._index_material(material_id, record)
+            if printer_records is not None:
+                if replace:
+                    for printer_id in list(self._printers):
+                        if printer_id not in printer_records:
+                            self._unindex_printer(printer_id)
+                for printer_id, record in printer_records.items():
+                    if self._printers.get(printer_id) != record:
+                        self._unindex_printer(printer_id)
+                        self._index_printer(printer_id, record)
+            self.updated = time.time()
+        return changes
+
+    def _index_material(self, material_id, record):
+        self._materials[material_id] = record
+        name = _name(record.get("title"))
+        if name:
+            self._names[name] = material_id
+            bisect.insort(self._sorted_names, (name, material_id))
+        for field, index in self._costs.items():
+            value = _number(record.get(field))
+            if value is not None:
+                bisect.insort(index, (value, material_id))
+        printer_id = record.get("printerId")
+        if printer_id is not None:
+            self._material_printers.setdefault(_id(printer_id), set()).add(material_id)
+
+    def _unindex_material(self, material_id):
+        record = self._materials.pop(material_id)
+        name = _name(record.get("title"))
+        if name:
+            if self._names.get(name) == material_id:
+                del self._names[name]
+            _remove(self._sorted_names, (name, material_id))
+        for field, index in self._costs.items():
+            value = _number(record.get(field))
+            if value is not None:
+                _remove(index, (value, material_id))
+        printer_id = record.get("printerId")
+        if printer_id is not None:
+            members = self._material_printers.get(_id(printer_id))
+            if members is not None:
+                members.discard(material_id)
+
+    def _index_printer(self, printer_id, record):
+        self._printers[printer_id] = record
+        materials = record.get("materials") or ()
+        if isinstance(materials, dict):
+            materials = materials.keys()
+        self._printer_materials[printer_id] = set(
+            _id(material.get("materialId") if isinstance(material, dict) else material)
+            for material in materials
+        )
+
+    def _unindex_printer(self, printer_id):
+        self._printers.pop(printer_id, None)
+        self._printer_materials.pop(printer_id, None)
+
+    # queries
+    def get(self, material_id):
+        """Look up a material by id
+
+        :param material_id: the material id
+        :type material_id: int or str
+        :returns: the material record or ``None``
+        :rtype: dict or None
+        """
+        return self._materials.get(_id(material_id))
+
+    def printer(self, printer_id):
+        """Look up a printer by id
+
+        :param printer_id: the printer id
+        :type printer_id: int or str
+        :returns: the printer record or ``None``
+        :rtype: dict or None
+        """
+        return self._printers.get(_id(printer_id))
+
+    def by_name(self, title):
+        """Look up a material by its title, ignoring case
+
+        :param title: the material title
+        :type title: str
+        :returns: the material record or ``None``
+        :rtype: dict or None
+        """
+        material_id = self._names.get(_name(title))
+        return None if material_id is None else self._materials.get(material_id)
+
+    def search(self, prefix):
+        """Find the materials whose titles start with ``prefix``, ignoring
+        case
+
+        :param prefix: the start of the title
+        :type prefix: str
+        :returns: material records ordered by title
+        :rtype: list
+        """
+        prefix = _name(prefix)
+        with self._lock:
+            names = self._sorted_names
+            start = bisect.bisect_left(names, (prefix,))
+            found = []
+            for name, material_id in names[start:]:
+                if not name.startswith(prefix):
+                    break
+                found.append(self._materials[material_id])
+        return found
+
+    def for_printer(self, printer_id):
+        """Find the materials that can be printed on a printer
+
+        :param printer_id: the printer id
+        :type printer_id: int or str
+        :returns: material records ordered by id
+        :rtype: list
+        """
+        printer_id = _id(printer_id)
+        with self._lock:
+            ids = self._material_printers.get(printer_id, set()) | \
+                self._printer_materials.get(printer_id, set())
+            return [
+                self._materials[material_id] for material_id in sorted(ids, key=str)
+                if material_id in self._materials
+            ]
+
+    def between(self, low=None, high=None, field=None):
+        """Find the materials with ``low <= field <= high``
+
+        :param low: the lowest value, unbounded when ``None``
+        :type low: float or None
+        :param high: the highest value, unbounded when ``None``
+        :type high: float or None
+        :param field: one of :attr:`cost_fields`, defaults to the first
+        :type field: str or None
+        :returns: material records ordered by ``field``
+        :rtype: list
+        :raises: :class:`KeyError` when ``field`` is not indexed
+        """
+        index = self._costs[field or self.cost_fields[0]]
+        with self._lock:
+            start = 0 if low is None else bisect.bisect_left(index, (low,))
+            end = len(index) if high is None else bisect.bisect_left(index, (high, _Infinity()))
+            return [self._materials[material_id] for _, material_id in index[start:end]]
+
+    def under(self, threshold, field=None):
+        """Find the materials with ``field <= threshold``
+
+        :param threshold: the highest value
+        :type threshold: float
+        :param field: one of :attr:`cost_fields`, defaults to the first
+        :type field: str or None
+        :returns: material records ordered by ``field``
+        :rtype: list
+        """
+        return self.between(high=threshold, field=field)
+
+    # serialisation
+    def save(self, path):
+        """Write the catalog to ``path``
+
+        The file is replaced atomically, so concurrent readers see either
+        the old or the new catalog.
+
+        :param path: the file to write
+        :type path: str
+        """
+        with self._lock:
+            state = {
+                "version": FORMAT_VERSION,
+                "updated": self.updated,
+                "cost_fields": list(self.cost_fields),
+                "materials": list(self._materials.values()),
+                "printers": list(self._printers.values()),
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as out:
+                json.dump(state, out)
+            replace_file(temporary, path)
+        except Exception:
+            os.unlink(temporary)
+            raise
+
+    @classmethod
+    def load(cls, path, max_age=None):
+        """Read a catalog written by :meth:`save`
+
+        :param path: the file to read
+        :type path: str
+        :param max_age: ignore catalogs saved more than this many seconds
+            ago
+        :type max_age: float or None
+        :returns: the catalog, or ``None`` when the file is missing, stale
+            or of another format version
+        :rtype: :class:`shapeways.catalog.MaterialCatalog` or None
+        """
+        try:
+            with open(path) as data:
+                state = json.load(data)
+        except (IOError, OSError, ValueError):
+            return None
+        if state.get("version") != FORMAT_VERSION:
+            return None
+        updated = state.get("updated")
+        if max_age is not None and (updated is None or time.time() - updated > max_age):
+            return None
+        catalog = cls(
+            state["materials"], state["printers"],
+            cost_fields=state.get("cost_fields", DEFAULT_COST_FIELDS)
+        )
+        catalog.updated = updated
+        return catalog
+
+
+class _Infinity(object):
+    """Compares greater than any id, to bisect past equal cost values"""
+    __slots__ = ()
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+def _remove(index, entry):
+    position = bisect.bisect_left(index, entry)
+    if position < len(index) and index[position] == entry:
+        del index[position]
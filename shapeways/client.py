@@ -7,9 +7,27 @@ else:
 
 import json
 from requests_oauthlib import OAuth1
-import requests
 
-class Client(object):
+from shapeways.batch import BatchMixin, DEFAULT_CONCURRENCY
+from shapeways.bulk import bulk_upload, DEFAULT_MAX_BYTES, DEFAULT_READERS
+from shapeways.codec import get_codec
+from shapeways.compat import string_types
+from shapeways.dedup import base64_digest, file_digest
+from shapeways.download import (
+    decode_stream, DEFAULT_CHUNK_SIZE as DOWNLOAD_CHUNK_SIZE
+)
+from shapeways.pagination import iter_items
+from shapeways.results import typed_response
+from shapeways.retry import send_request
+from shapeways.routes import Routes
+from shapeways.session import (
+    create_session, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+)
+from shapeways.upload import (
+    JsonUploadBody, upload_params, DEFAULT_CHUNK_SIZE
+)
+
+class Client(BatchMixin):
     """Api client for the Shapeways API http://developers.shapeways.com
 
     The API uses OAuth v1 to authenticate clients, so the following steps
@@ -31,14 +49,47 @@ class Client(object):
         client.verify_url(response_url)
         # make api requests
         info = client.get_api_info()
+
+    Every request is sent through a pooled :class:`requests.Session` so
+    connections to the API are kept alive and reused between calls. Either
+    pass in a shared ``session`` or let the client create its own, in which
+    case :meth:`shapeways.client.Client.close` (or using the client as a
+    context manager) releases its connections.
+
+    .. code:: python
+
+        with Client("key", "secret", pool_maxsize=32) as client:
+            info = client.get_api_info()
+
+    Many calls can be fanned out over the pool with
+    :meth:`shapeways.batch.BatchMixin.map` and
+    :meth:`shapeways.batch.BatchMixin.batch`.
+
+    Requests can be throttled with a (shared)
+    :class:`shapeways.retry.TokenBucket` and retried after ``429`` and
+    ``5xx`` replies with a :class:`shapeways.retry.RetryPolicy`.
+
+    .. code:: python
+
+        client = Client(
+            "key", "secret", limiter=TokenBucket(rate=5), retry=RetryPolicy()
+        )
     """
     __slots__ = [
-        "base_url", "api_version", "consumer_key", "consumer_secret",
-        "oauth_token", "oauth_secret", "oauth", "callback_url",
+        "_base_url", "_api_version", "_routes", "consumer_key",
+        "consumer_secret", "oauth_token", "oauth_secret", "oauth",
+        "callback_url", "session", "_owns_session", "cache", "validators",
+        "quotes", "uploads", "limiter", "retry", "codec", "typed", "journal",
+        "instrumentation", "coalescer",
     ]
     def __init__(
             self, consumer_key, consumer_secret, callback_url=None,
-            oauth_token=None, oauth_secret=None
+            oauth_token=None, oauth_secret=None, session=None,
+            pool_connections=DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True, cache=None,
+            validators=None, quotes=None, uploads=None, limiter=None,
+            retry=None, codec=None, typed=False, journal=None,
+            instrumentation=None, coalescer=None
     ):
         """Constructor for a new :class:`shapeways.client.Client`
 
@@ -55,13 +106,62 @@ class Client(object):
         :param oauth_secret: The OAuth secret obtained from calls
             to connect/verify
         :type oauth_secret: str
-
+        :param session: a shared session to send requests with, when ``None``
+            a new pooled session is created for this client
+        :type session: :class:`requests.Session` or None
+        :param pool_connections: the number of per-host connection pools to
+            cache, ignored when ``session`` is given
+        :type pool_connections: int
+        :param pool_maxsize: the maximum number of connections kept open per
+            host, ignored when ``session`` is given
+        :type pool_maxsize: int
+        :param keep_alive: whether connections should be kept open between
+            requests, ignored when ``session`` is given
+        :type keep_alive: bool
+        :param cache: cache for the reference data endpoints (materials,
+            printers and categories), disabled when ``None``
+        :type cache: :class:`shapeways.cache.ResponseCache` or None
+        :param validators: store of ``ETag``/``Last-Modified`` validators used
+            to revalidate GET requests, disabled when ``None``
+        :type validators: :class:`shapeways.cache.ValidatorCache` or None
+        :param quotes: cache of :meth:`shapeways.client.Client.get_price`
+            quotes keyed by geometry, disabled when ``None``
+        :type quotes: :class:`shapeways.cache.QuoteCache` or None
+        :param uploads: index of uploaded file contents, uploads of content
+            found in the index are skipped, disabled when ``None``
+        :type uploads: :class:`shapeways.dedup.UploadIndex` or None
+        :param limiter: rate limiter every request waits on, may be shared
+            between clients, disabled when ``None``
+        :type limiter: :class:`shapeways.retry.TokenBucket` or None
+        :param retry: policy for retrying throttled and failed requests,
+            disabled when ``None``
+        :type retry: :class:`shapeways.retry.RetryPolicy` or None
+        :param codec: JSON codec for request bodies and responses, ``"auto"``
+            for the fastest installed one, see :mod:`shapeways.codec`; the
+            standard library is used when ``None``
+        :type codec: str, :class:`shapeways.codec.JsonCodec` or None
+        :param typed: whether models, materials, printers, categories and the
+            cart are returned as compact :mod:`shapeways.results` objects
+            instead of dicts
+        :type typed: bool
+        :param journal: write-ahead journal of ``add_to_cart`` and
+            ``update_model_info`` calls, calls that already completed are
+            not sent again, disabled when ``None``
+        :type journal: :class:`shapeways.journal.OperationJournal` or None
+        :param instrumentation: hooks every request is reported to, see
+            :mod:`shapeways.instrument`, disabled when ``None``
+        :type instrumentation: :class:`shapeways.instrument.Instrumentation`
+            or None
+        :param coalescer: collapses identical concurrent GET requests into
+            one, may be shared between clients, disabled when ``None``
+        :type coalescer: :class:`shapeways.coalesce.RequestCoalescer` or None
         """
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
         self.callback_url = callback_url
-        self.base_url = "https://api.shapeways.com"
-        self.api_version = "v1"
+        self._base_url = "https://api.shapeways.com"
+        self._api_version = "v1"
+        self._routes = Routes(self._base_url, self._api_version)
         self.oauth_token = oauth_token
         self.oauth_secret = oauth_secret
         self.oauth = OAuth1(
@@ -71,6 +171,68 @@ class Client(object):
             resource_owner_key=self.oauth_token,
             resource_owner_secret=self.oauth_secret,
         )
+        self._owns_session = session is None
+        if session is None:
+            session = self._create_session(
+                pool_connections, pool_maxsize, keep_alive
+            )
+        self.session = session
+        self.cache = cache
+        self.validators = validators
+        self.quotes = quotes
+        self.uploads = uploads
+        self.limiter = limiter
+        self.retry = retry
+        self.codec = None if codec is None else get_codec(codec)
+        self.typed = typed
+        self.journal = journal
+        self.instrumentation = instrumentation
+        self.coalescer = coalescer
+
+    def _create_session(self, pool_connections, pool_maxsize, keep_alive):
+        """Create the pooled session owned by this client
+
+        :returns: a new pooled session
+        :rtype: :class:`requests.Session`
+        """
+        return create_session(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive
+        )
+
+    def close(self):
+        """Release the pooled connections held by this client
+
+        A session passed into the constructor is shared and is left open.
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def base_url(self):
+        """The base url of the API, endpoint urls are recompiled when set"""
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url):
+        self._base_url = base_url
+        self._routes = Routes(base_url, self._api_version)
+
+    @property
+    def api_version(self):
+        """The API version, endpoint urls are recompiled when set"""
+        return self._api_version
+
+    @api_version.setter
+    def api_version(self, api_version):
+        self._api_version = api_version
+        self._routes = Routes(self._base_url, api_version)
 
     def url(self, path):
         """Generate the full url for an API path
@@ -86,12 +248,15 @@ class Client(object):
         :returns: the full url to ``path``
         :rtype: str
         """
+        url = self._routes.static.get(path)
+        if url is not None:
+            return url
         if not path.startswith("/"):
             path = "/%s" % path
         if not path.endswith("/"):
             path += "/"
 
-        return "%s%s%s" % (self.base_url, path, self.api_version)
+        return self._base_url + path + self._api_version
 
     def connect(self):
         """Get an OAuth request token and authentication url
@@ -100,8 +265,8 @@ class Client(object):
             on error
         :rtype: str or None
         """
-        response = requests.post(
-            url=self.url("/oauth1/request_token/"), auth=self.oauth
+        response = self._send(
+            "post", url=self._routes.url("request_token"), auth=self.oauth
         )
         data = parse_qs(response.text)
         self.oauth_secret = data.get("oauth_token_secret", [None])[0]
@@ -119,7 +284,7 @@ class Client(object):
         """
         url, _, qs = url.rpartition("?")
         data = parse_qs(qs)
-        self.verify(
+        return self.verify(
             data.get("oauth_token", [None])[0],
             data.get("oauth_verifier", [None])[0]
         )
@@ -146,8 +311,8 @@ class Client(object):
             resource_owner_secret=self.oauth_secret,
             verifier=oauth_verifier
         )
-        response = requests.post(
-            url=self.url("/oauth1/access_token/"),
+        response = self._send(
+            "post", url=self._routes.url("access_token"),
             auth=access_oauth
         )
         data = parse_qs(response.text)
@@ -160,9 +325,124 @@ class Client(object):
             resource_owner_secret=self.oauth_secret,
         )
 
+    def _send(self, method, **kwargs):
+        """Send a request through :attr:`session`
+
+        The request waits on :attr:`limiter` and is retried as allowed by
+        :attr:`retry`, see :func:`shapeways.retry.send_request`.
+
+        :param method: the lower case http method e.g. ``get``
+        :type method: str
+        :param kwargs: arguments for the session method
+        :returns: the response
+        :rtype: :class:`requests.Response`
+        """
+        if self.instrumentation is not None:
+            return self._instrumented(method, None, kwargs)[0]
+        return send_request(
+            getattr(self.session, method), method, limiter=self.limiter,
+            retry=self.retry, **kwargs
+        )
+
+    def _call(self, method, **kwargs):
+        """Send a request with :meth:`_send` and decode its JSON body
+
+        :param method: the lower case http method e.g. ``get``
+        :type method: str
+        :param kwargs: arguments for the session method
+        :returns: the decoded body, see :meth:`_json`
+        :rtype: dict
+        """
+        if self.instrumentation is None:
+            return self._json(self._send(method, **kwargs))
+        return self._instrumented(method, self._json, kwargs)[1]
+
+    def _instrumented(self, method, decode, kwargs):
+        """Send a request reporting it to :attr:`instrumentation`
+
+        :returns: ``(response, decoded)``
+        :rtype: tuple
+        """
+        def send(call, **kwargs):
+            return send_request(
+                call, method, limiter=self.limiter, retry=self.retry, **kwargs
+            )
+        return self.instrumentation.request(
+            self.session, method, send, routes=self._routes, decode=decode,
+            **kwargs
+        )
+
+    def _dumps(self, params):
+        """Encode a request body with :attr:`codec`
+
+        :param params: the body to encode
+        :type params: dict
+        :returns: the JSON body
+        :rtype: str or bytes
+        """
+        if self.codec is None:
+            return json.dumps(params)
+        return self.codec.dumps(params)
+
+    def _json(self, response):
+        """Decode the JSON body of ``response`` with :attr:`codec`
+
+        :returns: the decoded body, or a ``failure`` result when the body is
+            not JSON (e.g. the error page of a proxy)
+        :rtype: dict
+        """
+        try:
+            if self.codec is None:
+                return response.json()
+            return self.codec.loads(response.content)
+        except ValueError:
+            return {
+                "result": "failure",
+                "reason": "HTTP %s" % response.status_code,
+            }
+
+    def _typed(self, endpoint, result):
+        """Convert ``result`` to typed results when :attr:`typed` is set
+
+        :param endpoint: the endpoint name e.g. ``models``
+        :type endpoint: str
+        :param result: the results from the api call
+        :type result: dict
+        :returns: the converted results, see
+            :func:`shapeways.results.typed_response`
+        """
+        if not self.typed:
+            return result
+        return typed_response(endpoint, result)
+
     def _get(self, path, params=None):
         """Fetch the results from an API GET call to ``path``
 
+        When :attr:`coalescer` is set, identical calls made at the same time
+        share a single request.
+
+        :param path: the api path to fetch e.g. ``/api/``
+        :type path: str
+        :param params: dict of query string parameters to use
+        :type params: dict or None
+        :returns: the results from the api call
+        :rtype: dict
+        """
+        coalescer = self.coalescer
+        if coalescer is None:
+            return self._get_once(path, params)
+        key = coalescer.key(
+            self.url(path), params, credentials=self._credentials_key()
+        )
+        return coalescer.call(key, lambda: self._get_once(path, params))
+
+    def _get_once(self, path, params=None):
+        """Send an API GET call to ``path``
+
+        When :attr:`validators` is set the request is made conditional on the
+        validators of the last response for the same url, and a
+        ``304 Not Modified`` reply returns that stored response.
+
         :param path: the api path to fetch e.g. ``/api/``
         :type path: str
         :param params: dict of query string parameters to use
@@ -170,10 +450,69 @@ class Client(object):
         :returns: the results from the api call
         :rtype: dict
         """
-        response = requests.get(
-            url =self.url(path), auth=self.oauth, params=params
+        url = self.url(path)
+        validators = self.validators
+        if validators is None:
+            return self._call("get", url=url, auth=self.oauth, params=params)
+
+        key = validators.key(
+            url, params, credentials=self._credentials_key()
+        )
+        response = self._send(
+            "get", url=url, auth=self.oauth, params=params,
+            headers=validators.headers(key)
+        )
+        if response.status_code == 304:
+            result = validators.not_modified(key)
+            if result is not None:
+                return result
+            # evicted while the request was in flight
+            response = self._send(
+                "get", url=url, auth=self.oauth, params=params
+            )
+        result = self._json(response)
+        if response.status_code == 200:
+            validators.store(key, response.headers, result, len(response.content))
+        return result
+
+    def _cached_get(self, endpoint, path):
+        """Fetch the results from an API GET call to ``path`` through
+        :attr:`cache`
+
+        :param endpoint: the endpoint name used to pick the cache TTL e.g.
+            ``materials``
+        :type endpoint: str
+        :param path: the api path to fetch e.g. ``/materials/``
+        :type path: str
+        :returns: the results from the api call
+        :rtype: dict
+        """
+        cache = self.cache
+        if cache is None or not cache.caches(endpoint):
+            return self._get(path)
+        key = cache.key(
+            endpoint, self.url(path),
+            credentials=self._credentials_key()
         )
-        return response.json()
+        result = cache.get(key)
+        if result is None:
+            result = self._get(path)
+            if result.get("result") != "failure":
+                cache.set(key, result)
+        else:
+            self._cache_hit("get", path)
+        return result
+
+    def _cache_hit(self, method, path):
+        """Report a call answered from a cache to :attr:`instrumentation`
+
+        :param method: the lower case http method e.g. ``get``
+        :type method: str
+        :param path: the api path of the call e.g. ``/materials/``
+        :type path: str
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.cached(method, self.url(path), self._routes)
 
     def _delete(self, url, params=None):
         """Fetch the results from an API DELETE call to ``path``
@@ -185,27 +524,28 @@ class Client(object):
         :returns: the results from the api call
         :rtype: dict
         """
-        response = requests.delete(
-            url=self.url(url), auth=self.oauth, params=params
+        return self._call(
+            "delete", url=self.url(url), auth=self.oauth, params=params
         )
-        return response.json()
 
-    def _post(self, url, body=None, params=None):
+    def _post(self, url, body=None, params=None, headers=None):
         """Fetch the results from an API POST call to ``path``
 
         :param path: the api path to fetch e.g. ``/api/``
         :type path: str
         :param body: the POST body to use
-        :type body: str or None
+        :type body: str, iterable or None
         :param params: dict of query string parameters to use
         :type params: dict or None
+        :param headers: dict of extra request headers to send
+        :type headers: dict or None
         :returns: the results from the api call
         :rtype: dict
         """
-        response = requests.post(
-            url=self.url(url), auth=self.oauth, params=params, data=body
+        return self._call(
+            "post", url=self.url(url), auth=self.oauth, params=params,
+            data=body, headers=headers
         )
-        return response.json()
 
     def _put(self, url, body=None, params=None):
         """Fetch the results from an API PUT call to ``path``
@@ -219,10 +559,9 @@ class Client(object):
         :returns: the results from the api call
         :rtype: dict
         """
-        response = requests.put(
-            url=self.url(url), auth=self.oauth, params=params, data=body
+        return self._call(
+            "put", url=self.url(url), auth=self.oauth, params=params, data=body
         )
-        return response.json()
 
     def get_api_info(self):
         """Make an API call `GET /api/v1
@@ -231,7 +570,7 @@ class Client(object):
         :returns: api info
         :rtype: dict
         """
-        return self._get("/api/")
+        return self._get(self._routes.path("api"))
 
     def get_cart(self):
         """Make an API call `GET /orders/cart/v1
@@ -240,7 +579,7 @@ class Client(object):
         :returns: items currently in the cart
         :rtype: dict
         """
-        return self._get("/orders/cart/")
+        return self._typed("cart", self._get(self._routes.path("cart")))
 
     def get_material(self, material_id):
         """Make an API call `GET /materials/{material_id}/v1
@@ -251,7 +590,9 @@ class Client(object):
         :returns: specific materials info
         :rtype: dict
         """
-        return self._get("/materials/%s/" % material_id)
+        return self._typed("material", self._cached_get(
+            "material", self._routes.path("material", material_id)
+        ))
 
     def get_materials(self):
         """Make an API call `GET /materials/v1
@@ -260,7 +601,9 @@ class Client(object):
         :returns: information about all materials
         :rtype: dict
         """
-        return self._get("/materials/")
+        return self._typed("materials", self._cached_get(
+            "materials", self._routes.path("materials")
+        ))
 
     def get_models(self, page=None):
         """Make an API call `GET /models/v1
@@ -274,7 +617,38 @@ class Client(object):
             params = {
                 "page": int(page)
             }
-        return self._get("/models/", params=params)
+        return self._typed(
+            "models", self._get(self._routes.path("models"), params=params)
+        )
+
+    def iter_models(self, limit=None, start_page=1, prefetch=True):
+        """Iterate over all of the user's models, one record at a time
+
+        Pages from :meth:`shapeways.client.Client.get_models` are fetched
+        lazily until an empty page is returned. While one page is being
+        consumed the next one is fetched in the background.
+
+        .. code:: python
+
+            for model in client.iter_models(limit=1000):
+                print(model["modelId"])
+
+        :param limit: the maximum number of models to yield, all when ``None``
+        :type limit: int or None
+        :param start_page: the page to start from, used to resume a walk
+        :type start_page: int
+        :param prefetch: whether to fetch the next page in the background
+        :type prefetch: bool
+        :returns: a generator of model records
+        :rtype: generator
+        """
+        return iter_items(
+            self._models_page, limit=limit, start_page=start_page,
+            prefetch=prefetch
+        )
+
+    def _models_page(self, page):
+        return self.get_models(page=page).get("models") or []
 
     def get_model(self, model_id):
         """Make an API call `GET /models/{model_id}/v1
@@ -285,7 +659,9 @@ class Client(object):
         :returns: data for a specific model
         :rtype: dict
         """
-        return self._get("/models/%s/" % model_id)
+        return self._typed(
+            "model", self._get(self._routes.path("model", model_id))
+        )
 
     def get_model_info(self, model_id):
         """Make an API call `GET /models/{model_id}/info/v1
@@ -296,7 +672,9 @@ class Client(object):
         :returns: information for a specific model
         :rtype: dict
         """
-        return self._get("/models/%s/info/" % model_id)
+        return self._typed(
+            "model_info", self._get(self._routes.path("model_info", model_id))
+        )
 
     def delete_model(self, model_id):
         """Make an API call `DELETE /models/{model_id}/v1
@@ -307,7 +685,7 @@ class Client(object):
         :returns: information whether or not it was successful
         :rtype: dict
         """
-        return self._delete("/models/%s/" % model_id)
+        return self._delete(self._routes.path("model", model_id))
 
     def get_printers(self):
         """Make an API call `GET /printers/v1
@@ -316,7 +694,9 @@ class Client(object):
         :returns: information about all printers
         :rtype: dict
         """
-        return self._get("/printers/")
+        return self._typed("printers", self._cached_get(
+            "printers", self._routes.path("printers")
+        ))
 
     def get_printer(self, printer_id):
         """Make an API call `GET /printers/{printer_id}/v1
@@ -327,7 +707,9 @@ class Client(object):
         :returns: information about a specific printer
         :rtype: dict
         """
-        return self._get("/printers/%s/" % printer_id)
+        return self._typed("printer", self._cached_get(
+            "printer", self._routes.path("printer", printer_id)
+        ))
 
     def get_categories(self):
         """Make an API call `GET /categories/v1
@@ -336,7 +718,9 @@ class Client(object):
         :returns: information about all categories
         :rtype: dict
         """
-        return self._get("/categories/")
+        return self._typed("categories", self._cached_get(
+            "categories", self._routes.path("categories")
+        ))
 
     def get_category(self, category_id):
         """Make an API call `GET /categories/{category_id}/v1
@@ -347,7 +731,9 @@ class Client(object):
         :returns: information about a specific category
         :rtype: dict
         """
-        return self._get("/categories/%s/" % category_id)
+        return self._typed("category", self._cached_get(
+            "category", self._routes.path("category", category_id)
+        ))
 
     def get_price(self, params):
         """Make an API call `POST /price/v1
@@ -368,6 +754,9 @@ class Client(object):
 
         1. ``materials`` - list
 
+        Quotes are answered from :attr:`quotes` when a
+        :class:`shapeways.cache.QuoteCache` is configured.
+
         :param params: dict of necessary parameters to make the api call
         :type params: dict
         :returns: pricing information for the ``params`` given
@@ -385,9 +774,85 @@ class Client(object):
                 missing.append(prop)
         if missing:
             raise Exception("get_price missing required parameters: %r" % missing)
-        return self._post("/price/", body=json.dumps(params))
+        if self.quotes is None:
+            return self._post(
+                self._routes.path("price"), body=self._dumps(params)
+            )
+        return self._quoted_price(params)
+
+    def _credentials_key(self):
+        """Identify the user requests are made for in cache and index keys
 
-    def add_to_cart(self, params):
+        :rtype: tuple
+        """
+        return self.consumer_key, self.oauth_token
+
+    def _indexed_upload(self, digest, params, upload, target=None):
+        """Make an upload through :attr:`uploads`
+
+        :param digest: the content hash of the file being uploaded
+        :type digest: str
+        :param params: the upload parameters
+        :type params: dict
+        :param upload: makes the upload and returns its response
+        :type upload: callable
+        :param target: the model the file is added to, ``None`` for new
+            models
+        :type target: int or None
+        :returns: the upload response, or the recorded response of an
+            earlier upload of the same content
+        :rtype: dict
+        """
+        return self.uploads.upload(
+            digest, upload, scale=params.get("uploadScale", 1.0),
+            target=target, exists=self._model_exists, owner=self._credentials_key()
+        )
+
+    def _model_exists(self, model_id):
+        return self.get_model_info(model_id).get("result") == "success"
+
+    def _journaled(self, method, args, key, call):
+        """Make a mutating call through :attr:`journal`
+
+        :param method: the name of the client method
+        :type method: str
+        :param args: the arguments the method was called with
+        :type args: tuple
+        :param key: the idempotency key, derived from the call when ``None``
+        :type key: str or None
+        :param call: makes the request and returns its response
+        :type call: callable
+        :returns: the response, or the recorded response of a call that
+            already completed
+        :rtype: dict
+        """
+        if self.journal is None:
+            return call()
+        return self.journal.run(
+            method, call, args, key=key, owner=self._credentials_key()
+        )
+
+    def _quoted_price(self, params):
+        """Fetch a price quote through :attr:`quotes`
+
+        :param params: the validated ``get_price`` parameters
+        :type params: dict
+        :returns: pricing information for the ``params`` given
+        :rtype: dict
+        """
+        key = self.quotes.quote_key(params)
+        result = self.quotes.get(key)
+        if result is None:
+            result = self._post(
+                self._routes.path("price"), body=self._dumps(params)
+            )
+            if result.get("result") != "failure":
+                self.quotes.set(key, result)
+        else:
+            self._cache_hit("post", self._routes.path("price"))
+        return result
+
+    def add_to_cart(self, params, idempotency_key=None):
         """Make an API call `POST /orders/cart/v1
         <https://developers.shapeways.com/docs?li=dh_docs#POST_-orders-cart-v1>`_
 
@@ -402,13 +867,19 @@ class Client(object):
 
         :param params: dict of necessary parameters to make the api call
         :type params: dict
+        :param idempotency_key: the key the call is journaled under, see
+            :class:`shapeways.journal.OperationJournal`
+        :type idempotency_key: str or None
         :returns: whether or not the call was successful
         :rtype: dict
         :raises: :class:`Exception` when the required parameter is missing
         """
         if "modelId" not in params:
             raise Exception("add_to_cart missing required parameter ['modelId']")
-        return self._post("/orders/cart/", body=json.dumps(params))
+        return self._journaled(
+            "add_to_cart", (params,), idempotency_key,
+            lambda: self._post(self._routes.path("cart"), body=self._dumps(params))
+        )
 
     def add_model_file(self, model_id, params):
         """Make an API call `POST /models/{model_id}/files/v1
@@ -443,8 +914,81 @@ class Client(object):
                 missing.append(prop)
         if missing:
             raise Exception("add_model_file missing required parameters %r" % missing)
-        return self._post(
-            "/models/%s/files/" % model_id, body=json.dumps(params)
+        if self.uploads is None:
+            return self._post(
+                self._routes.path("model_files", model_id),
+                body=self._dumps(params)
+            )
+        return self._indexed_upload(
+            base64_digest(params["file"]), params,
+            lambda: self._post(
+                self._routes.path("model_files", model_id),
+                body=self._dumps(params)
+            ),
+            target=model_id
+        )
+
+    def add_model_file_stream(
+            self, model_id, source, params, progress=None,
+            chunk_size=DEFAULT_CHUNK_SIZE
+    ):
+        """Streaming version of :meth:`shapeways.client.Client.add_model_file`
+
+        The file is read, base64 encoded and sent ``chunk_size`` bytes at a
+        time instead of being loaded into memory, see
+        :class:`shapeways.upload.JsonUploadBody`.
+
+        Required Parameters:
+
+        1. ``hasRightsToModel`` - bool
+        2. ``acceptTermsAndConditions`` - bool
+
+        Optional Parameters:
+
+        1. ``fileName`` - str (defaults to the base name of ``source``)
+        2. ``uploadScale`` - float
+
+        :param model_id: the id of the model to upload the file for
+        :type model_id: int
+        :param source: path to, or binary file object of, the file to upload
+        :type source: str or file
+        :param params: dict of necessary parameters to make the api call
+        :type params: dict
+        :param progress: called as ``progress(bytes_read, total_bytes)`` as
+            the file is sent
+        :type progress: callable or None
+        :param chunk_size: the number of file bytes encoded per chunk
+        :type chunk_size: int
+        :returns: file upload information
+        :rtype: dict
+        :raises: :class:`Exception` when any of the required parameters
+            are missing
+        """
+        params = upload_params(source, params)
+        required = ["fileName", "hasRightsToModel", "acceptTermsAndConditions"]
+        missing = []
+        for prop in required:
+            if prop not in params:
+                missing.append(prop)
+        if missing:
+            raise Exception(
+                "add_model_file_stream missing required parameters %r" % missing
+            )
+        body = JsonUploadBody(
+            source, params, chunk_size=chunk_size, progress=progress
+        )
+        if self.uploads is None:
+            return self._post(
+                self._routes.path("model_files", model_id), body=body,
+                headers={"Content-Type": "application/json"}
+            )
+        return self._indexed_upload(
+            file_digest(source), params,
+            lambda: self._post(
+                self._routes.path("model_files", model_id), body=body,
+                headers={"Content-Type": "application/json"}
+            ),
+            target=model_id
         )
 
     def add_model_photo(self, model_id, params):
@@ -473,7 +1017,7 @@ class Client(object):
         if "file" not in params:
             raise Exception("add_model_photo missing required parameter ['file']")
         return self._post(
-            "/models/%s/photos/" % model_id, body=json.dumps(params)
+            self._routes.path("model_photos", model_id), body=self._dumps(params)
         )
 
     def get_model_file(self, model_id, file_version, include_file=False):
@@ -494,12 +1038,64 @@ class Client(object):
             "file": int(include_file),
         }
         return self._get(
-            "/models/%s/files/%s/" % (model_id, file_version),
+            self._routes.path("model_file", model_id, file_version),
             params=params
         )
 
+    def download_model_file(
+            self, model_id, file_version, dest, progress=None,
+            chunk_size=DOWNLOAD_CHUNK_SIZE
+    ):
+        """Download a model file to ``dest``
+
+        Streaming version of
+        :meth:`shapeways.client.Client.get_model_file` with
+        ``include_file=True``: the response is parsed as it arrives and the
+        base64 file data is decoded and written to ``dest`` a chunk at a
+        time, so memory use does not depend on the size of the file.
+
+        .. code:: python
+
+            result = client.download_model_file(86, 1, "model.stl")
+            print(result.info["fileName"], result.throughput)
 
-    def update_model_info(self, model_id, params):
+        :param model_id: the id of the model to get the file from
+        :type model_id: int
+        :param file_version: the file version of the file to fetch
+        :type file_version: int
+        :param dest: path to, or binary file object to write, the file to
+        :type dest: str or file
+        :param progress: called as ``progress(bytes_written)`` as the file
+            is downloaded
+        :type progress: callable or None
+        :param chunk_size: the number of response bytes read per chunk
+        :type chunk_size: int
+        :returns: the file information (without the file data), the number
+            of bytes written and the download duration
+        :rtype: :class:`shapeways.download.DownloadResult`
+        :raises: :class:`ValueError` when the request failed or the response
+            holds no file data
+        """
+        response = self._send(
+            "get",
+            url=self._routes.url("model_file", model_id, file_version),
+            auth=self.oauth, params={"file": 1}, stream=True
+        )
+        try:
+            if response.status_code != 200:
+                raise ValueError("download failed with HTTP %s: %r" % (
+                    response.status_code, self._json(response)
+                ))
+            chunks = response.iter_content(chunk_size=chunk_size)
+            if not isinstance(dest, string_types):
+                return decode_stream(chunks, dest, progress=progress)
+            with open(dest, "wb") as out:
+                return decode_stream(chunks, out, progress=progress)
+        finally:
+            response.close()
+
+
+    def update_model_info(self, model_id, params, idempotency_key=None):
         """Make an API call `PUT /models/{model_id}/info/v1
         <https://developers.shapeways.com/docs?li=dh_docs#PUT_-models-modelId-info-v1>`_
 
@@ -520,11 +1116,17 @@ class Client(object):
         :type model_id: int
         :param params: dict of necessary parameters to make the api call
         :type params: dict
+        :param idempotency_key: the key the call is journaled under, see
+            :class:`shapeways.journal.OperationJournal`
+        :type idempotency_key: str or None
         :returns: the model information
         :rtype: dict
         """
-        return self._put(
-            "/models/%s/info/" % model_id, body=json.dumps(params)
+        return self._journaled(
+            "update_model_info", (model_id, params), idempotency_key,
+            lambda: self._put(
+                self._routes.path("model_info", model_id), body=self._dumps(params)
+            )
         )
 
     def add_model(self, params):
@@ -565,4 +1167,120 @@ class Client(object):
                 missing.append(prop)
         if missing:
             raise Exception("add_model missing required parameters: %r" % missing)
-        return self._post("/models/", body=json.dumps(params))
+        if self.uploads is None:
+            return self._post(
+                self._routes.path("models"), body=self._dumps(params)
+            )
+        return self._indexed_upload(
+            base64_digest(params["file"]), params,
+            lambda: self._post(
+                self._routes.path("models"), body=self._dumps(params)
+            )
+        )
+
+    def add_model_stream(
+            self, source, params, progress=None, chunk_size=DEFAULT_CHUNK_SIZE
+    ):
+        """Streaming version of :meth:`shapeways.client.Client.add_model`
+
+        The file is read, base64 encoded and sent ``chunk_size`` bytes at a
+        time instead of being loaded into memory, see
+        :class:`shapeways.upload.JsonUploadBody`.
+
+        .. code:: python
+
+            def progress(sent, total):
+                print("%d/%d bytes" % (sent, total))
+
+            client.add_model_stream("large.stl", {
+                "hasRightsToModel": True,
+                "acceptTermsAndConditions": True,
+            }, progress=progress)
+
+        Required Parameters:
+
+        1. ``hasRightsToModel`` - bool
+        2. ``acceptTermsAndConditions`` - bool
+
+        Optional Parameters are the same as for
+        :meth:`shapeways.client.Client.add_model`, ``fileName`` defaults to
+        the base name of ``source``.
+
+        :param source: path to, or binary file object of, the file to upload
+        :type source: str or file
+        :param params: dict of necessary parameters to make the api call
+        :type params: dict
+        :param progress: called as ``progress(bytes_read, total_bytes)`` as
+            the file is sent
+        :type progress: callable or None
+        :param chunk_size: the number of file bytes encoded per chunk
+        :type chunk_size: int
+        :returns: model upload information
+        :rtype: dict
+        :raises: :class:`Exception` when any of the required parameters
+            are missing
+        """
+        params = upload_params(source, params)
+        required = ["fileName", "hasRightsToModel", "acceptTermsAndConditions"]
+        missing = []
+        for prop in required:
+            if prop not in params:
+                missing.append(prop)
+        if missing:
+            raise Exception(
+                "add_model_stream missing required parameters: %r" % missing
+            )
+        body = JsonUploadBody(
+            source, params, chunk_size=chunk_size, progress=progress
+        )
+        if self.uploads is None:
+            return self._post(
+                self._routes.path("models"), body=body,
+                headers={"Content-Type": "application/json"}
+            )
+        return self._indexed_upload(
+            file_digest(source), params,
+            lambda: self._post(
+                self._routes.path("models"), body=body,
+                headers={"Content-Type": "application/json"}
+            )
+        )
+
+    def bulk_upload(
+            self, sources, params=None, concurrency=DEFAULT_CONCURRENCY,
+            readers=DEFAULT_READERS, max_bytes=DEFAULT_MAX_BYTES, stats=None
+    ):
+        """Upload many model files in parallel with
+        :meth:`shapeways.client.Client.add_model_stream`
+
+        Files are read on ``readers`` threads while up to ``concurrency``
+        uploads are in flight, with at most ``max_bytes`` of file data in
+        memory, see :func:`shapeways.bulk.bulk_upload`.
+
+        .. code:: python
+
+            params = {"hasRightsToModel": True, "acceptTermsAndConditions": True}
+            for item in client.bulk_upload("meshes/", params, concurrency=16):
+                print(item.source, item.ok)
+
+        :param sources: a directory, or an iterable of file paths or
+            ``(path, params)`` tuples
+        :type sources: str or iterable
+        :param params: ``add_model`` parameters shared by every file
+        :type params: dict or None
+        :param concurrency: the maximum number of uploads in flight
+        :type concurrency: int
+        :param readers: the number of threads reading files
+        :type readers: int
+        :param max_bytes: the bytes of file data held in memory at most
+        :type max_bytes: int
+        :param stats: updated with the throughput as the upload runs
+        :type stats: :class:`shapeways.bulk.UploadStats` or None
+        :returns: a generator of :class:`shapeways.bulk.UploadResult` in
+            completion order
+        :rtype: generator
+        """
+        return bulk_upload(
+            self, sources, params, concurrency=concurrency, readers=readers,
+            max_bytes=max_bytes, stats=stats
+        )
@@ -0,0 +1,151 @@
+"""Single-flight coalescing of identical concurrent GET requests
+
+When many threads or tasks ask for the same resource at once, e.g. right
+after a cache entry expired, a :class:`RequestCoalescer` sends one request
+and hands its result (or exception) to every caller waiting on it. Requests
+are identical when their url, query parameters and credentials are, and
+only requests in flight at the same time are collapsed: nothing is kept
+once the request returns.
+
+.. code:: python
+
+    coalescer = RequestCoalescer()
+    client = Client("key", "secret", coalescer=coalescer)
+    # 50 threads calling client.get_materials() at once send one request
+    print(coalescer.stats())
+
+The waiting callers receive the very same result object as the caller that
+made the request, so results must be treated as read only.
+"""
+import threading
+
+try:
+    import asyncio
+except ImportError:  # pragma: no cover
+    asyncio = None
+
+
+class _Flight(object):
+    """A request in flight and the outcome its waiting callers get"""
+    __slots__ = ["done", "result", "error"]
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer(object):
+    """Collapses identical concurrent requests into one
+
+    Works for threads with :meth:`call` and for asyncio tasks with
+    :meth:`acall`; a single coalescer can be shared by several clients.
+    """
+    __slots__ = ["requests", "collapsed", "_flights", "_tasks", "_lock"]
+
+    def __init__(self):
+        #: requests actually sent
+        self.requests = 0
+        #: calls answered by a request another caller made
+        self.collapsed = 0
+        self._flights = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None, credentials=None, body=None):
+        """Build the key identifying a request
+
+        :param url: the full url of the request
+        :type url: str
+        :param params: the query string parameters of the request
+        :type params: dict or None
+        :param credentials: identifies the user the request is made for
+        :type credentials: hashable
+        :param body: the body sent with the request, if any
+        :type body: str, bytes or None
+        :rtype: tuple
+        """
+        if params:
+            params = tuple(sorted(params.items()))
+        return credentials, url, params or None, body
+
+    def call(self, key, fetch):
+        """Make a request, or wait for the identical one in flight
+
+        :param key: a key from :meth:`shapeways.coalesce.RequestCoalescer.key`
+        :type key: tuple
+        :param fetch: makes the request and returns its result
+        :type fetch: callable
+        :returns: the result of the request
+        :raises: the exception the request raised
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.requests += 1
+            else:
+                self.collapsed += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fetch()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def acall(self, key, fetch):
+        """asyncio version of :meth:`call`
+
+        The request runs in its own task, so a caller being cancelled does
+        not cancel it for the others waiting on it.
+
+        :param key: a key from :meth:`shapeways.coalesce.RequestCoalescer.key`
+        :type key: tuple
+        :param fetch: returns an awaitable making the request
+        :type fetch: callable
+        :returns: an awaitable of the result of the request
+        """
+        loop = asyncio.get_event_loop()
+        # tasks are bound to their loop, requests on other loops don't mix
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = asyncio.ensure_future(fetch())
+                task.add_done_callback(lambda task: self._landed(task_key, task))
+                self.requests += 1
+            else:
+                self.collapsed += 1
+        return asyncio.shield(task)
+
+    def _landed(self, task_key, task):
+        with self._lock:
+            self._tasks.pop(task_key, None)
+        if not task.cancelled():
+            # retrieved here, every waiter may have been cancelled
+            task.exception()
+
+    def stats(self):
+        """Get the coalescing counters
+
+        :returns: ``requests`` sent, ``collapsed`` calls and ``in_flight``
+            requests
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._flights) + len(self._tasks),
+            }
@@ -0,0 +1,133 @@
+"""Pluggable JSON codecs for request bodies and responses
+
+Both clients take a ``codec`` argument: ``"auto"`` picks the fastest
+installed library (`orjson <https://github.com/ijl/orjson>`_,
+`ujson <https://github.com/ultrajson/ultrajson>`_,
+`pysimdjson <https://github.com/TkTech/pysimdjson>`_, then the standard
+library), a name picks that library, and ``None`` keeps the default
+behaviour of :func:`json.dumps` bodies and :meth:`requests.Response.json`.
+
+Codecs encode straight to ``bytes`` and decode ``bytes`` without an
+intermediate ``str`` where the library allows it.
+
+.. code:: python
+
+    client = Client("key", "secret", codec="auto")
+    client.codec.name
+    # "orjson"
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover
+    simdjson = None
+
+
+class JsonCodec(object):
+    """Standard library JSON codec, the base of every codec"""
+    __slots__ = ()
+
+    #: the name the codec is registered under
+    name = "json"
+
+    def dumps(self, obj):
+        """Encode ``obj`` as JSON
+
+        :param obj: the object to encode
+        :returns: the utf-8 encoded JSON document
+        :rtype: bytes
+        """
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        """Decode a JSON document
+
+        :param data: the JSON document
+        :type data: bytes or str
+        :returns: the decoded object
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """`orjson <https://github.com/ijl/orjson>`_ codec"""
+    __slots__ = ()
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """`ujson <https://github.com/ultrajson/ultrajson>`_ codec"""
+    __slots__ = ()
+    name = "ujson"
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+class SimdjsonCodec(JsonCodec):
+    """`pysimdjson <https://github.com/TkTech/pysimdjson>`_ codec, encoding
+    falls back to the standard library
+    """
+    __slots__ = ()
+    name = "simdjson"
+
+    def loads(self, data):
+        return simdjson.loads(data)
+
+
+#: Codecs by name, fastest first
+CODECS = (
+    ("orjson", OrjsonCodec, orjson),
+    ("ujson", UjsonCodec, ujson),
+    ("simdjson", SimdjsonCodec, simdjson),
+    ("json", JsonCodec, json),
+)
+
+
+def available_codecs():
+    """The names of the codecs that can be used, fastest first
+
+    :rtype: list
+    """
+    return [name for name, _, module in CODECS if module is not None]
+
+
+def get_codec(codec="auto"):
+    """Resolve a ``codec`` argument
+
+    :param codec: ``"auto"`` for the fastest installed codec, a codec name
+        or a codec instance
+    :type codec: str or :class:`shapeways.codec.JsonCodec`
+    :returns: the codec
+    :rtype: :class:`shapeways.codec.JsonCodec`
+    :raises: :class:`ValueError` for an unknown name, :class:`ImportError`
+        when the library of the named codec is not installed
+    """
+    if not isinstance(codec, str):
+        return codec
+    for name, cls, module in CODECS:
+        if codec == "auto" and module is not None or codec == name:
+            if module is None:
+                raise ImportError("%s is not installed" % name)
+            return cls()
+    raise ValueError("unknown JSON codec %r" % codec)
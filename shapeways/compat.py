@@ -0,0 +1,22 @@
+"""Python 2 and 3 compatibility helpers"""
+import os
+import sys
+
+if sys.version_info[0] >= 3:
+    string_types = (str,)
+else:  # pragma: no cover
+    string_types = (str, unicode)  # noqa: F821
+
+
+def replace_file(source, destination):
+    """Rename ``source`` to ``destination``, overwriting ``destination``
+
+    :func:`os.replace` where available; python 2's :func:`os.rename` does
+    not overwrite on every platform, so ``destination`` is removed first.
+    """
+    if hasattr(os, "replace"):
+        os.replace(source, destination)
+    else:  # pragma: no cover
+        if os.path.exists(destination):
+            os.unlink(destination)
+        os.rename(source, destination)
@@ -0,0 +1,303 @@
+import base64
+import binascii
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from shapeways.compat import string_types
+
+#: Bytes of a file hashed per chunk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+#: Version of the :class:`shapeways.dedup.UploadIndex` database layout
+SCHEMA_VERSION = 1
+
+
+def file_digest(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Hash the contents of a file without loading it into memory
+
+    :param source: path to, or binary file object of, the file to hash; a
+        file object is returned to its current position afterwards
+    :type source: str or file
+    :param chunk_size: the number of bytes hashed per chunk
+    :type chunk_size: int
+    :returns: hex encoded sha256 of the file contents
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, string_types):
+        with open(source, "rb") as data:
+            for chunk in iter(lambda: data.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    start = source.tell()
+    try:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+    finally:
+        source.seek(start)
+    return digest.hexdigest()
+
+
+def base64_digest(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Hash the decoded contents of base64 encoded file data
+
+    The data is decoded a chunk at a time, so the digest matches
+    :func:`shapeways.dedup.file_digest` of the original file without a full
+    size decoded copy. Data that is not valid base64 is hashed as is.
+
+    :param data: base64 encoded file data
+    :type data: str or bytes
+    :returns: hex encoded sha256 of the decoded data
+    :rtype: str
+    """
+    if not isinstance(data, bytes):
+        data = data.encode("utf-8")
+    digest = hashlib.sha256()
+    step = chunk_size - chunk_size % 4
+    try:
+        for offset in range(0, len(data), step):
+            digest.update(base64.b64decode(data[offset:offset + step]))
+    except (binascii.Error, TypeError):
+        digest = hashlib.sha256(data)
+    return digest.hexdigest()
+
+
+class UploadIndex(object):
+    """Local content addressed index of uploaded model files
+
+    Maps the hash of a file's contents plus its upload scale (and, for
+    ``add_model_file``, the model it was added to) to the response of the
+    upload that produced it. Clients given an index skip the upload of
+    content they have uploaded before and return the recorded response.
+    Uploads are recorded per owner, the credentials of the client, so an
+    index shared by clients of several accounts never hands one account the
+    models of another.
+
+    The index is a SQLite database, so it can be shared between threads and
+    processes on the same host.
+
+    .. code:: python
+
+        uploads = UploadIndex("uploads.db", verify=True)
+        client = Client("key", "secret", uploads=uploads)
+        client.add_model_stream("model.stl", params)  # uploaded
+        client.add_model_stream("model.stl", params)  # recorded response
+        uploads.prune(max_age=30 * 86400)
+    """
+    __slots__ = ["path", "verify", "hits", "misses", "_connection", "_lock"]
+
+    def __init__(self, path=":memory:", verify=False, timeout=30):
+        """Constructor for a new :class:`shapeways.dedup.UploadIndex`
+
+        :param path: the SQLite database file, kept in memory by default
+        :type path: str
+        :param verify: whether to check a recorded model still exists with
+            :meth:`shapeways.client.Client.get_model_info` before skipping
+            an upload
+        :type verify: bool
+        :param timeout: seconds to wait for another process holding the
+            database lock
+        :type timeout: float
+        :raises: :class:`ValueError` when ``path`` holds an index written
+            with a different :data:`shapeways.dedup.SCHEMA_VERSION`
+        """
+        self.path = path
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False
+        )
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        exists = self._connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master"
+            " WHERE type = 'table' AND name = 'uploads'"
+        ).fetchone()[0]
+        if exists and version != SCHEMA_VERSION:
+            self._connection.close()
+            raise ValueError(
+                "%s holds an upload index of schema version %s, expected %s"
+                % (path, version, SCHEMA_VERSION)
+            )
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " owner TEXT NOT NULL, digest TEXT NOT NULL,"
+                " scale TEXT NOT NULL, target TEXT NOT NULL, model_id TEXT,"
+                " file_version TEXT, response TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (owner, digest, scale, target))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS uploads_model_id"
+                " ON uploads (model_id)"
+            )
+            self._connection.execute(
+                "PRAGMA user_version = %d" % SCHEMA_VERSION
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM uploads"
+            ).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _key(digest, scale, target, owner):
+        return (
+            json.dumps(owner), digest, repr(float(scale)),
+            "" if target is None else str(target),
+        )
+
+    def lookup(self, digest, scale=1.0, target=None, owner=None):
+        """Find the recorded upload of some content
+
+        :param digest: the content hash of the file
+        :type digest: str
+        :param scale: the ``uploadScale`` of the upload
+        :type scale: float
+        :param target: the model the file was added to, ``None`` for new
+            models
+        :type target: int or None
+        :param owner: the credentials the upload was made with
+        :type owner: str, tuple or None
+        :returns: the recorded upload response or ``None``
+        :rtype: dict or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM uploads WHERE owner = ?"
+                " AND digest = ? AND scale = ? AND target = ?",
+                self._key(digest, scale, target, owner)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def record(self, digest, response, scale=1.0, target=None, owner=None):
+        """Record the response of an upload
+
+        :param digest: the content hash of the file
+        :type digest: str
+        :param response: the upload response
+        :type response: dict
+        :param scale: the ``uploadScale`` of the upload
+        :type scale: float
+        :param target: the model the file was added to, ``None`` for new
+            models
+        :type target: int or None
+        :param owner: the credentials the upload was made with
+        :type owner: str, tuple or None
+        """
+        model_id = response.get("modelId", target)
+        file_version = response.get("fileVersion", response.get("modelVersion"))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._key(digest, scale, target, owner) + (
+                    None if model_id is None else str(model_id),
+                    None if file_version is None else str(file_version),
+                    json.dumps(response), time.time(),
+                )
+            )
+
+    def forget(self, model_id):
+        """Drop every recorded upload of, or added to, a model
+
+        :param model_id: the id of the model
+        :type model_id: int
+        :returns: the number of records dropped
+        :rtype: int
+        """
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM uploads WHERE model_id = ? OR target = ?",
+                (str(model_id), str(model_id))
+            ).rowcount
+
+    def prune(self, max_age=None, max_entries=None):
+        """Drop old records
+
+        :param max_age: drop records older than this many seconds
+        :type max_age: float or None
+        :param max_entries: keep at most this many of the newest records
+        :type max_entries: int or None
+        :returns: the number of records dropped
+        :rtype: int
+        """
+        dropped = 0
+        with self._lock, self._connection:
+            if max_age is not None:
+                dropped += self._connection.execute(
+                    "DELETE FROM uploads WHERE created < ?",
+                    (time.time() - max_age,)
+                ).rowcount
+            if max_entries is not None:
+                dropped += self._connection.execute(
+                    "DELETE FROM uploads WHERE rowid NOT IN ("
+                    " SELECT rowid FROM uploads ORDER BY created DESC LIMIT ?)",
+                    (max_entries,)
+                ).rowcount
+        return dropped
+
+    def upload(
+            self, digest, upload, scale=1.0, target=None, exists=None, owner=None
+    ):
+        """Return the recorded response for ``digest`` or call ``upload``
+
+        :param digest: the content hash of the file
+        :type digest: str
+        :param upload: makes the upload and returns its response
+        :type upload: callable
+        :param scale: the ``uploadScale`` of the upload
+        :type scale: float
+        :param target: the model the file is added to, ``None`` for new
+            models
+        :type target: int or None
+        :param exists: called with a recorded model id when :attr:`verify`
+            is set, returns whether the model still exists
+        :type exists: callable or None
+        :param owner: the credentials the upload is made with
+        :type owner: str, tuple or None
+        :returns: the upload response
+        :rtype: dict
+        """
+        recorded = self.lookup(digest, scale, target, owner)
+        if recorded is not None:
+            model_id = recorded.get("modelId", target)
+            if not self.verify or exists is None or exists(model_id):
+                return recorded
+            self.forget(model_id)
+        response = upload()
+        if self.succeeded(response):
+            self.record(digest, response, scale, target, owner)
+        return response
+
+    @staticmethod
+    def succeeded(response):
+        """Whether an upload response should be recorded
+
+        :param response: the upload response
+        :type response: dict
+        :rtype: bool
+        """
+        return isinstance(response, dict) and response.get("result") == "success"
+
+    def stats(self):
+        """Get the index counters
+
+        :returns: ``hits``, ``misses`` and ``size``
+        :rtype: dict
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
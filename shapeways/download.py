@@ -0,0 +1,254 @@
+import base64
+import binascii
+import json
+import re
+import time
+from collections import namedtuple
+
+#: Bytes of the response read per chunk
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_ESCAPE = re.compile(b"\\\\(.)", re.S)
+_WHITESPACE = b" \t\r\n"
+# escapes that can appear inside a base64 JSON string, anything else is
+# dropped (e.g. escaped line breaks)
+_ESCAPES = {
+    ord("/"): b"/",
+    ord("\\"): b"\\",
+}
+
+
+def _escaped(data, start, end):
+    """Whether ``data[end]`` is preceded by an odd number of backslashes"""
+    count = 0
+    while end - count > start and data[end - count - 1:end - count] == b"\\":
+        count += 1
+    return count % 2 == 1
+
+
+def _unescape(match):
+    return _ESCAPES.get(ord(match.group(1)), b"")
+
+
+class DownloadResult(namedtuple("DownloadResult", ["info", "bytes_written", "elapsed"])):
+    """The outcome of a streaming file download
+
+    ``info`` is the decoded API response without the file data,
+    ``bytes_written`` the size of the decoded file and ``elapsed`` the
+    duration of the download in seconds.
+    """
+    __slots__ = ()
+
+    @property
+    def throughput(self):
+        """Decoded bytes written per second"""
+        if not self.elapsed:
+            return 0.0
+        return self.bytes_written / self.elapsed
+
+
+class Base64FieldDecoder(object):
+    """Incrementally extract and decode a base64 string field of a JSON
+    object
+
+    Chunks of the JSON document are passed to
+    :meth:`shapeways.download.Base64FieldDecoder.feed` and the value of the
+    top level ``field`` is base64 decoded and written to ``out`` as it
+    arrives. Only a few bytes of the field are buffered at a time, the rest
+    of the document (which is small) is kept and returned by
+    :meth:`shapeways.download.Base64FieldDecoder.close` with ``field`` set to
+    an empty string.
+
+    .. code:: python
+
+        decoder = Base64FieldDecoder(output, field="file")
+        for chunk in chunks:
+            decoder.feed(chunk)
+        info = decoder.close()
+    """
+    __slots__ = [
+        "out", "field", "found", "bytes_written", "_rest", "_depth",
+        "_in_string", "_escape", "_expect_key", "_key", "_last_key",
+        "_await_value", "_in_value", "_value_escape", "_pending",
+    ]
+
+    def __init__(self, out, field="file"):
+        """Constructor for a new :class:`shapeways.download.Base64FieldDecoder`
+
+        :param out: binary file object the decoded field is written to
+        :type out: file
+        :param field: the name of the top level field to decode
+        :type field: str
+        """
+        self.out = out
+        self.field = field.encode("utf-8")
+        self.found = False
+        self.bytes_written = 0
+        self._rest = bytearray()
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key = None
+        self._last_key = None
+        self._await_value = False
+        self._in_value = False
+        self._value_escape = False
+        self._pending = b""
+
+    def feed(self, chunk):
+        """Process the next chunk of the JSON document
+
+        :param chunk: the next bytes of the document
+        :type chunk: bytes
+        """
+        index = 0
+        length = len(chunk)
+        while index < length:
+            if self._in_value:
+                index = self._feed_value(chunk, index)
+            else:
+                index = self._feed_document(chunk, index)
+
+    def close(self):
+        """Finish decoding and return the rest of the document
+
+        :returns: the decoded JSON object with the field set to ``""``
+        :rtype: dict
+        :raises: :class:`ValueError` when the document ended inside the field
+            or is not valid JSON
+        """
+        if self._in_value:
+            raise ValueError("document ended inside the %r field" % self.field)
+        if self._pending:
+            self._write(self._b64decode(self._pending + b"=" * (-len(self._pending) % 4)))
+            self._pending = b""
+        return json.loads(bytes(self._rest).decode("utf-8"))
+
+    def _feed_document(self, chunk, index):
+        """Scan the document outside of the field, one byte at a time"""
+        rest = self._rest
+        length = len(chunk)
+        while index < length:
+            byte = chunk[index:index + 1]
+            index += 1
+            if self._await_value and byte not in _WHITESPACE:
+                self._await_value = False
+                if byte == b"\"":
+                    rest += byte
+                    self._in_value = True
+                    self.found = True
+                    return index
+            rest += byte
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif byte == b"\\":
+                    self._escape = True
+                elif byte == b"\"":
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_key = bytes(self._key)
+                        self._key = None
+                elif self._key is not None:
+                    self._key += byte
+            elif byte == b"\"":
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._expect_key = False
+                    self._key = bytearray()
+            elif byte in b"{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and byte == b"{"
+            elif byte in b"}]":
+                self._depth -= 1
+            elif byte == b"," and self._depth == 1:
+                self._expect_key = True
+            elif byte == b":" and self._depth == 1:
+                self._await_value = self._last_key == self.field
+        return index
+
+    def _feed_value(self, chunk, index):
+        """Decode base64 data from the field until its closing quote"""
+        if self._value_escape:
+            self._value_escape = False
+            self._decode(_ESCAPES.get(ord(chunk[index:index + 1]), b""))
+            index += 1
+        end = chunk.find(b"\"", index)
+        while end != -1 and _escaped(chunk, index, end):
+            end = chunk.find(b"\"", end + 1)
+        segment = chunk[index:len(chunk) if end == -1 else end]
+        if end == -1 and _escaped(segment, 0, len(segment)):
+            # the escape sequence continues in the next chunk
+            segment = segment[:-1]
+            self._value_escape = True
+        if b"\\" in segment:
+            segment = segment.replace(b"\\/", b"/")
+            if b"\\" in segment:
+                segment = _ESCAPE.sub(_unescape, segment)
+        self._decode(segment)
+        if end == -1:
+            return len(chunk)
+        self._in_value = False
+        self._rest += b"\""
+        return end + 1
+
+    def _decode(self, data):
+        if not data:
+            return
+        data = self._pending + data
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        if usable:
+            self._write(self._b64decode(data[:usable]))
+
+    def _b64decode(self, data):
+        try:
+            return base64.b64decode(data)
+        except (binascii.Error, TypeError) as error:
+            # python 2 raises TypeError for bad padding
+            raise ValueError("invalid base64 in %r field: %s" % (self.field, error))
+
+    def _write(self, data):
+        self.out.write(data)
+        self.bytes_written += len(data)
+
+
+def decode_stream(chunks, out, field="file", progress=None):
+    """Decode the base64 ``field`` of a streamed JSON document into ``out``
+
+    :param chunks: iterable of the bytes of the JSON document
+    :type chunks: iterable
+    :param out: binary file object the decoded field is written to
+    :type out: file
+    :param field: the name of the top level field to decode
+    :type field: str
+    :param progress: called as ``progress(bytes_written)`` after every chunk
+    :type progress: callable or None
+    :returns: the download outcome
+    :rtype: :class:`shapeways.download.DownloadResult`
+    """
+    start = time.time()
+    decoder = Base64FieldDecoder(out, field=field)
+    for chunk in chunks:
+        decoder.feed(chunk)
+        if progress is not None:
+            progress(decoder.bytes_written)
+    return download_result(decoder, start)
+
+
+def download_result(decoder, start):
+    """Finish a download decoded with ``decoder``
+
+    :param decoder: the decoder the whole response was fed to
+    :type decoder: :class:`shapeways.download.Base64FieldDecoder`
+    :param start: the :func:`time.time` the download started at
+    :type start: float
+    :returns: the download outcome
+    :rtype: :class:`shapeways.download.DownloadResult`
+    :raises: :class:`ValueError` when the response holds no file data
+    """
+    info = decoder.close()
+    if not decoder.found:
+        raise ValueError("response has no %r field: %r" % (decoder.field.decode("utf-8"), info))
+    return DownloadResult(info, decoder.bytes_written, time.time() - start)
@@ -0,0 +1,179 @@
+"""Local mesh analysis producing :meth:`shapeways.client.Client.get_price`
+parameters
+
+Requires `NumPy <https://numpy.org>`_ (``pip install shapeways[geometry]``).
+
+Meshes are loaded as an ``(n, 3, 3)`` array of triangles and every property
+is computed with vectorised operations, binary STL files are memory-mapped
+rather than read.
+
+.. code:: python
+
+    params = price_params("model.stl", scale=0.001, materials=[6, 25])
+    quote = client.get_price(params)
+"""
+import os
+import re
+import struct
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+_STL_HEADER_SIZE = 84
+_STL_TRIANGLE_SIZE = 50
+_STL_VERTEX = re.compile(
+    br"vertex\s+(\S+)\s+(\S+)\s+(\S+)", re.IGNORECASE
+)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("numpy is required for shapeways.geometry")
+
+
+def _is_binary_stl(path):
+    size = os.path.getsize(path)
+    if size < _STL_HEADER_SIZE:
+        return False
+    with open(path, "rb") as stl:
+        header = stl.read(_STL_HEADER_SIZE)
+    count, = struct.unpack("<I", header[80:84])
+    return size == _STL_HEADER_SIZE + count * _STL_TRIANGLE_SIZE
+
+
+def read_stl(path):
+    """Read the triangles of a binary or ASCII STL file
+
+    Binary files are memory-mapped, so only the vertex data is brought into
+    memory.
+
+    :param path: path to the STL file
+    :type path: str
+    :returns: ``(n, 3, 3)`` array of triangle vertices
+    :rtype: :class:`numpy.ndarray`
+    """
+    _require_numpy()
+    if _is_binary_stl(path):
+        if os.path.getsize(path) == _STL_HEADER_SIZE:
+            return numpy.zeros((0, 3, 3), dtype=numpy.float32)
+        record = numpy.dtype([
+            ("normal", "<f4", (3,)),
+            ("vertices", "<f4", (3, 3)),
+            ("attributes", "<u2"),
+        ])
+        data = numpy.memmap(path, dtype=record, mode="r", offset=_STL_HEADER_SIZE)
+        return data["vertices"]
+
+    with open(path, "rb") as stl:
+        vertices = _STL_VERTEX.findall(stl.read())
+    if len(vertices) % 3:
+        raise ValueError("%s is not a valid STL file" % path)
+    return numpy.array(vertices, dtype=numpy.float64).reshape(-1, 3, 3)
+
+
+def read_obj(path):
+    """Read the triangles of a Wavefront OBJ file
+
+    Polygonal faces are triangulated as fans, texture and normal indices are
+    ignored.
+
+    :param path: path to the OBJ file
+    :type path: str
+    :returns: ``(n, 3, 3)`` array of triangle vertices
+    :rtype: :class:`numpy.ndarray`
+    """
+    _require_numpy()
+    vertices = []
+    faces = []
+    with open(path, "rb") as obj:
+        for line in obj:
+            if line.startswith(b"v "):
+                vertices.append(line.split()[1:4])
+            elif line.startswith(b"f "):
+                indices = [int(part.split(b"/")[0]) for part in line.split()[1:]]
+                for i in range(1, len(indices) - 1):
+                    faces.append((indices[0], indices[i], indices[i + 1]))
+    vertices = numpy.array(vertices, dtype=numpy.float64).reshape(-1, 3)
+    faces = numpy.array(faces, dtype=numpy.int64).reshape(-1, 3)
+    # obj indices are 1-based, negative indices count back from the end
+    faces = numpy.where(faces > 0, faces - 1, faces + len(vertices))
+    return vertices[faces]
+
+
+def read_mesh(path):
+    """Read the triangles of an STL or OBJ file, chosen by extension
+
+    :param path: path to the mesh file
+    :type path: str
+    :returns: ``(n, 3, 3)`` array of triangle vertices
+    :rtype: :class:`numpy.ndarray`
+    """
+    if path.lower().endswith(".obj"):
+        return read_obj(path)
+    return read_stl(path)
+
+
+def mesh_properties(triangles, scale=1.0):
+    """Compute the volume, surface area and bounds of a triangle mesh
+
+    The volume is the absolute signed volume of the mesh, which is only
+    meaningful for closed meshes.
+
+    :param triangles: ``(n, 3, 3)`` array of triangle vertices
+    :type triangles: :class:`numpy.ndarray`
+    :param scale: the size of one mesh unit in meters, e.g. ``0.001`` for
+        meshes modelled in millimeters
+    :type scale: float
+    :returns: ``volume``, ``area`` and ``xBoundMin`` ... ``zBoundMax``
+    :rtype: dict
+    """
+    _require_numpy()
+    triangles = numpy.asarray(triangles)
+    if not len(triangles):
+        raise ValueError("mesh has no triangles")
+    # one (n,) column per vertex coordinate, in float64 for the accumulation
+    x0, y0, z0, x1, y1, z1, x2, y2, z2 = (
+        triangles[:, i // 3, i % 3].astype(numpy.float64) for i in range(9)
+    )
+    # signed volume: sum of v0 . (v1 x v2) / 6
+    volume = abs(numpy.sum(
+        x0 * (y1 * z2 - z1 * y2) +
+        y0 * (z1 * x2 - x1 * z2) +
+        z0 * (x1 * y2 - y1 * x2)
+    )) / 6.0
+    # area: sum of |(v1 - v0) x (v2 - v0)| / 2
+    ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+    vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+    cx = uy * vz - uz * vy
+    cy = uz * vx - ux * vz
+    cz = ux * vy - uy * vx
+    area = 0.5 * numpy.sum(numpy.sqrt(cx * cx + cy * cy + cz * cz))
+    params = {}
+    for axis, columns in (("x", (x0, x1, x2)), ("y", (y0, y1, y2)), ("z", (z0, z1, z2))):
+        params["%sBoundMin" % axis] = float(min(c.min() for c in columns)) * scale
+        params["%sBoundMax" % axis] = float(max(c.max() for c in columns)) * scale
+    params["volume"] = float(volume) * scale ** 3
+    params["area"] = float(area) * scale ** 2
+    return params
+
+
+def price_params(path, scale=1.0, materials=None):
+    """Build :meth:`shapeways.client.Client.get_price` parameters for a
+    mesh file
+
+    :param path: path to an STL or OBJ file
+    :type path: str
+    :param scale: the size of one mesh unit in meters, the same as the
+        ``uploadScale`` the model will be uploaded with
+    :type scale: float
+    :param materials: material ids to quote for
+    :type materials: list or None
+    :returns: parameters for :meth:`shapeways.client.Client.get_price`
+    :rtype: dict
+    """
+    params = mesh_properties(read_mesh(path), scale=scale)
+    if materials is not None:
+        params["materials"] = list(materials)
+    return params
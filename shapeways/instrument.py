@@ -0,0 +1,518 @@
+"""Request instrumentation
+
+Clients created with an :class:`Instrumentation` report every request they
+send to its hooks: ``before`` hooks are called with a
+:class:`RequestInfo` once the request is about to be sent, ``after`` hooks
+with the same record once the response was received and decoded, or the
+request failed. Without an instrumentation a client makes no extra calls
+at all.
+
+.. code:: python
+
+    metrics = PrometheusHooks()
+    client = Client("key", "secret", instrumentation=Instrumentation(metrics))
+    ...
+    print(metrics.render())
+
+Hooks are plain callables or objects with ``before`` and/or ``after``
+methods, see :class:`PrometheusHooks` and :class:`OpenTelemetryHooks`.
+Hooks run on the thread making the request and should be quick.
+"""
+import bisect
+import threading
+from timeit import default_timer
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+from shapeways.session import TimingAdapter, connect_time, reset_connect_time
+from shapeways.upload import JsonUploadBody
+
+#: The phases of a request timed in :class:`RequestInfo`
+PHASES = ("connect", "wait", "download", "decode")
+
+_CONDITIONAL = frozenset(["If-None-Match", "If-Modified-Since"])
+
+#: Histogram buckets of :class:`PrometheusHooks`, in seconds
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class RequestInfo(object):
+    """A request reported to the hooks of an :class:`Instrumentation`
+
+    ``endpoint`` is the name of the endpoint the request addresses (e.g.
+    ``model_info``) and ``template`` its path template (e.g.
+    ``/models/{model_id}/info/``), both ``None`` for urls outside the API.
+
+    The timings are in seconds, ``None`` when they could not be measured:
+
+    * ``connect`` opening the connection (TCP and TLS handshakes), ``0``
+      when a pooled connection was reused
+    * ``wait`` sending the request and waiting for the response headers
+    * ``download`` reading the response body
+    * ``decode`` decoding the JSON body
+    * ``duration`` the whole call, including rate limiting and retries
+
+    ``connect``, ``wait`` and ``download`` are those of the last attempt.
+    ``cache`` is the outcome of the client caches: ``hit`` when the response
+    or quote cache answered without sending a request
+    (``attempts`` is ``0``), ``not_modified`` when a conditional request
+    was answered ``304`` and ``modified`` when it returned a new response,
+    ``None`` when no cache was involved.
+    ``context`` is free for hooks to keep per request state in, e.g. a
+    span.
+    """
+    __slots__ = [
+        "method", "url", "endpoint", "template", "status", "bytes_sent",
+        "bytes_received", "attempts", "error", "started", "connect", "wait",
+        "download", "decode", "duration", "cache", "context",
+    ]
+
+    def __init__(self, method, url, endpoint=None, template=None):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.template = template
+        self.status = None
+        self.bytes_sent = None
+        self.bytes_received = None
+        self.attempts = 0
+        self.error = None
+        self.started = None
+        self.connect = None
+        self.wait = None
+        self.download = None
+        self.decode = None
+        self.duration = None
+        self.cache = None
+        self.context = {}
+
+    @property
+    def timings(self):
+        """The measured phases, see :data:`shapeways.instrument.PHASES`
+
+        :rtype: dict
+        """
+        return dict(
+            (phase, getattr(self, phase)) for phase in PHASES
+            if getattr(self, phase) is not None
+        )
+
+
+def _content_length(headers):
+    try:
+        return int(headers["Content-Length"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def body_size(body):
+    """The size in bytes of a request body, ``None`` when unknown
+
+    :param body: the body as passed to the session
+    :type body: str, bytes, :class:`shapeways.upload.JsonUploadBody` or None
+    :rtype: int or None
+    """
+    if body is None:
+        return 0
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, JsonUploadBody):
+        return len(body)
+    return None
+
+
+class Instrumentation(object):
+    """Registry of request hooks, shared by any number of clients
+
+    .. code:: python
+
+        def log_slow(info):
+            if info.duration > 1:
+                log.warning("%s %s took %.1fs", info.method, info.template, info.duration)
+
+        instrumentation = Instrumentation()
+        instrumentation.add(after=log_slow)
+        client = ShapewaysOauth2Client(instrumentation=instrumentation)
+    """
+    __slots__ = ["_before", "_after"]
+
+    def __init__(self, *hooks):
+        """Constructor for a new :class:`shapeways.instrument.Instrumentation`
+
+        :param hooks: objects with ``before`` and/or ``after`` methods to
+            register, see :meth:`add`
+        """
+        self._before = []
+        self._after = []
+        for hook in hooks:
+            self.add(hook)
+
+    def add(self, hook=None, before=None, after=None):
+        """Register hooks
+
+        :param hook: an object whose ``before`` and ``after`` methods, when
+            defined, are registered
+        :param before: called with the :class:`RequestInfo` before a
+            request is sent
+        :type before: callable or None
+        :param after: called with the :class:`RequestInfo` once a request
+            completed or failed
+        :type after: callable or None
+        """
+        if hook is not None:
+            before = before or getattr(hook, "before", None)
+            after = after or getattr(hook, "after", None)
+        if before is not None:
+            self._before.append(before)
+        if after is not None:
+            self._after.append(after)
+
+    def remove(self, hook=None, before=None, after=None):
+        """Unregister hooks registered with :meth:`add`"""
+        if hook is not None:
+            before = before or getattr(hook, "before", None)
+            after = after or getattr(hook, "after", None)
+        if before is not None and before in self._before:
+            self._before.remove(before)
+        if after is not None and after in self._after:
+            self._after.remove(after)
+
+    def start(self, method, url, routes=None):
+        """Create the record of a request and call the ``before`` hooks
+
+        :param method: the http method
+        :type method: str
+        :param url: the full url of the request
+        :type url: str
+        :param routes: the routes of the client, used to find the endpoint
+        :type routes: :class:`shapeways.routes.Routes` or None
+        :rtype: :class:`shapeways.instrument.RequestInfo`
+        """
+        endpoint = None if routes is None else routes.match(url)
+        info = RequestInfo(
+            method.upper(), url, endpoint,
+            None if endpoint is None else routes.endpoints[endpoint]
+        )
+        for hook in self._before:
+            hook(info)
+        info.started = default_timer()
+        return info
+
+    def finish(self, info, error=None):
+        """Complete the record of a request and call the ``after`` hooks
+
+        :param info: the record returned by :meth:`start`
+        :type info: :class:`shapeways.instrument.RequestInfo`
+        :param error: the exception the request raised, if any
+        :type error: Exception or None
+        """
+        info.duration = default_timer() - info.started
+        if error is not None:
+            info.error = error
+        for hook in self._after:
+            hook(info)
+
+    def cached(self, method, url, routes=None, outcome="hit"):
+        """Report a call a client cache answered without a request
+
+        :param method: the http method
+        :type method: str
+        :param url: the full url the call would have requested
+        :type url: str
+        :param routes: the routes of the client, used to find the endpoint
+        :type routes: :class:`shapeways.routes.Routes` or None
+        :param outcome: the cache outcome, see :class:`RequestInfo`
+        :type outcome: str
+        """
+        info = self.start(method, url, routes)
+        info.cache = outcome
+        self.finish(info)
+
+    def request(self, session, method, send, routes=None, decode=None, **kwargs):
+        """Send a request through ``session`` and report it
+
+        :param session: the session the request is sent with
+        :type session: :class:`requests.Session`
+        :param method: the lower case http method e.g. ``get``
+        :type method: str
+        :param send: sends the request, retrying as needed, e.g.
+            :func:`shapeways.retry.send_request`, called with the session
+            method and ``kwargs``
+        :type send: callable
+        :param routes: the routes of the client, used to find the endpoint
+        :type routes: :class:`shapeways.routes.Routes` or None
+        :param decode: decodes the response, when given its time is
+            measured and its result returned
+        :type decode: callable or None
+        :param kwargs: arguments for the session method
+        :returns: ``(response, decoded)``
+        :rtype: tuple
+        """
+        url = kwargs["url"]
+        info = self.start(method, url, routes)
+        try:
+            timed = isinstance(session.get_adapter(url), TimingAdapter)
+        except Exception:
+            timed = False
+        call = getattr(session, method)
+        headers_received = []
+
+        def received(response, *args, **kwargs):
+            headers_received.append(default_timer())
+
+        def attempt(**kwargs):
+            info.attempts += 1
+            del headers_received[:]
+            if timed:
+                reset_connect_time()
+            return call(hooks={"response": received}, **kwargs)
+
+        try:
+            response = send(attempt, **kwargs)
+            done = default_timer()
+            self._measure(info, response, timed, kwargs.get("stream"))
+            headers = kwargs.get("headers")
+            if headers and _CONDITIONAL.intersection(headers):
+                info.cache = "not_modified" if info.status == 304 else "modified"
+            if headers_received and not kwargs.get("stream"):
+                info.download = done - headers_received[0]
+            result = None
+            if decode is not None:
+                result = decode(response)
+                info.decode = default_timer() - done
+        except Exception as error:
+            self.finish(info, error)
+            raise
+        self.finish(info)
+        return response, result
+
+    @staticmethod
+    def _measure(info, response, timed, stream):
+        info.status = response.status_code
+        request = getattr(response, "request", None)
+        if request is not None:
+            info.bytes_sent = body_size(request.body)
+        if stream:
+            info.bytes_received = _content_length(response.headers)
+        else:
+            info.bytes_received = len(response.content)
+        if timed:
+            info.connect = connect_time()
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None:
+            info.wait = max(0.0, elapsed.total_seconds() - (info.connect or 0.0))
+
+
+class _Histogram(object):
+    __slots__ = ["counts", "sum", "count"]
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+class PrometheusHooks(object):
+    """Prometheus style counters and histograms of the requests
+
+    Keeps, labelled by endpoint template, method and status (or phase):
+
+    * ``<prefix>_requests_total`` the requests made, ``status`` is
+      ``error`` for requests that raised and ``cached`` for calls a cache
+      answered
+    * ``<prefix>_request_attempts_total`` the attempts, including retries
+    * ``<prefix>_request_bytes_total`` the body bytes ``sent`` and
+      ``received``
+    * ``<prefix>_request_seconds`` histograms of the duration and of every
+      phase, see :data:`shapeways.instrument.PHASES`
+
+    :meth:`render` returns the metrics in the Prometheus text format. With
+    `prometheus_client <https://github.com/prometheus/client_python>`_
+    installed the hooks can be registered as a collector instead:
+    ``REGISTRY.register(hooks)``.
+
+    :param prefix: the prefix of the metric names
+    :type prefix: str
+    :param buckets: the upper bounds of the histogram buckets, in seconds
+    :type buckets: tuple
+    """
+    __slots__ = ["prefix", "buckets", "requests", "attempts", "bytes", "seconds", "_lock"]
+
+    def __init__(self, prefix="shapeways", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        #: requests keyed by ``(endpoint, method, status)``
+        self.requests = {}
+        #: attempts keyed by ``(endpoint, method)``
+        self.attempts = {}
+        #: bytes keyed by ``(endpoint, method, direction)``
+        self.bytes = {}
+        #: histograms keyed by ``(endpoint, method, phase)``
+        self.seconds = {}
+        self._lock = threading.Lock()
+
+    def after(self, info):
+        endpoint = info.template or "other"
+        method = info.method
+        status = info.status
+        if status is None:
+            status = "error" if info.error is not None else "cached"
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            key = (endpoint, method)
+            self.attempts[key] = self.attempts.get(key, 0) + info.attempts
+            for direction, size in (("sent", info.bytes_sent), ("received", info.bytes_received)):
+                if size:
+                    key = (endpoint, method, direction)
+                    self.bytes[key] = self.bytes.get(key, 0) + size
+            self._observe((endpoint, method, "total"), info.duration)
+            for phase, seconds in info.timings.items():
+                self._observe((endpoint, method, phase), seconds)
+
+    def _observe(self, key, seconds):
+        histogram = self.seconds.get(key)
+        if histogram is None:
+            histogram = self.seconds[key] = _Histogram(self.buckets)
+        index = bisect.bisect_left(self.buckets, seconds)
+        if index < len(self.buckets):
+            histogram.counts[index] += 1
+        histogram.sum += seconds
+        histogram.count += 1
+
+    def _samples(self):
+        """The metrics as ``(name, type, help, samples)`` with samples of
+        ``(suffix, labels, value)``
+        """
+        with self._lock:
+            requests = sorted(self.requests.items())
+            attempts = sorted(self.attempts.items())
+            sizes = sorted(self.bytes.items())
+            histograms = [
+                (key, list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in sorted(self.seconds.items())
+            ]
+        metrics = [
+            ("requests_total", "counter", "API requests made", [
+                ("", {"endpoint": e, "method": m, "status": s}, value)
+                for (e, m, s), value in requests
+            ]),
+            ("request_attempts_total", "counter", "API request attempts, including retries", [
+                ("", {"endpoint": e, "method": m}, value)
+                for (e, m), value in attempts
+            ]),
+            ("request_bytes_total", "counter", "API request and response body bytes", [
+                ("", {"endpoint": e, "method": m, "direction": d}, value)
+                for (e, m, d), value in sizes
+            ]),
+        ]
+        samples = []
+        for (endpoint, method, phase), counts, total, count in histograms:
+            labels = {"endpoint": endpoint, "method": method, "phase": phase}
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                samples.append(("_bucket", dict(labels, le=repr(float(bound))), cumulative))
+            samples.append(("_bucket", dict(labels, le="+Inf"), count))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        metrics.append(("request_seconds", "histogram", "API request phase durations", samples))
+        return [
+            ("%s_%s" % (self.prefix, name), kind, help, metric_samples)
+            for name, kind, help, metric_samples in metrics
+        ]
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format
+
+        :rtype: str
+        """
+        lines = []
+        for name, kind, help, samples in self._samples():
+            lines.append("# HELP %s %s" % (name, help))
+            lines.append("# TYPE %s %s" % (name, kind))
+            for suffix, labels, value in samples:
+                lines.append("%s%s{%s} %s" % (name, suffix, ",".join(
+                    '%s="%s"' % (label, labels[label].replace("\\", "\\\\").replace('"', '\\"'))
+                    for label in sorted(labels)
+                ), repr(float(value)) if isinstance(value, float) else value))
+        return "\n".join(lines) + "\n"
+
+    def collect(self):
+        """The metrics for a ``prometheus_client`` registry"""
+        from prometheus_client.core import Metric
+        for name, kind, help, samples in self._samples():
+            family_name = name[:-len("_total")] if kind == "counter" else name
+            metric = Metric(family_name, help, kind)
+            for suffix, labels, value in samples:
+                metric.add_sample(name + suffix, labels, value)
+            yield metric
+
+
+class OpenTelemetryHooks(object):
+    """OpenTelemetry client spans of the requests
+
+    Every request becomes a span named after its method and endpoint
+    template, e.g. ``GET /models/{model_id}/info/``, carrying the HTTP
+    semantic convention attributes and the timings of
+    :class:`RequestInfo` as ``shapeways.*`` attributes.
+
+    Requires `opentelemetry-api <https://opentelemetry.io>`_ unless a
+    ``tracer`` is given.
+
+    :param tracer: the tracer to create the spans with, the global tracer
+        provider's ``shapeways`` tracer when ``None``
+    """
+    __slots__ = ["tracer"]
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            if trace is None:
+                raise ImportError("opentelemetry-api is required for OpenTelemetryHooks")
+            tracer = trace.get_tracer("shapeways")
+        self.tracer = tracer
+
+    def before(self, info):
+        attributes = {"http.request.method": info.method, "url.full": info.url}
+        if info.template is not None:
+            attributes["url.template"] = info.template
+        options = {"attributes": attributes}
+        if trace is not None:
+            options["kind"] = trace.SpanKind.CLIENT
+        info.context["span"] = self.tracer.start_span(
+            "%s %s" % (info.method, info.template or "other"), **options
+        )
+
+    def after(self, info):
+        span = info.context.pop("span", None)
+        if span is None:
+            return
+        if info.status is not None:
+            span.set_attribute("http.response.status_code", info.status)
+        for name, value in (
+                ("http.request.body.size", info.bytes_sent),
+                ("http.response.body.size", info.bytes_received),
+                ("shapeways.attempts", info.attempts),
+                ("shapeways.cache", info.cache),
+                ("shapeways.duration", info.duration),
+        ):
+            if value is not None:
+                span.set_attribute(name, value)
+        for phase, seconds in info.timings.items():
+            span.set_attribute("shapeways.%s" % phase, seconds)
+        failed = info.error is not None or (info.status or 0) >= 400
+        if info.error is not None:
+            span.record_exception(info.error)
+            span.set_attribute("error.type", type(info.error).__name__)
+        elif failed:
+            span.set_attribute("error.type", str(info.status))
+        if failed and trace is not None:
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+        span.end()
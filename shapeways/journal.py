@@ -0,0 +1,451 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from shapeways.batch import BatchResult
+from shapeways.retry import is_connect_error
+
+#: The call was journaled but its outcome was never recorded, the process
+#: died while it was in flight and it may or may not have been applied
+PENDING = "pending"
+#: The call completed successfully
+DONE = "done"
+#: The call was not applied: it could not connect, was rejected with a 4xx
+#: status or the API reported a failure
+FAILED = "failed"
+#: The call raised once the request may have been sent, e.g. a read timeout
+#: or a 5xx status, so it may or may not have been applied
+UNKNOWN = "unknown"
+
+
+class JournalEntry(namedtuple("JournalEntry", [
+    "key", "method", "args", "kwargs", "state", "attempts", "response",
+    "error", "created", "updated",
+])):
+    """A journaled call
+
+    ``method``, ``args`` and ``kwargs`` are the client method and the
+    arguments it was called with, ``state`` one of ``pending``, ``done``,
+    ``failed`` or ``unknown``, ``response`` the recorded response of a
+    completed call and ``error`` the message of the exception a failed or
+    unknown call raised.
+    """
+    __slots__ = ()
+
+
+def idempotency_key(method, args=(), kwargs=None, owner=None, namespace=None):
+    """The default idempotency key of a call, a hash of the method name, its
+    arguments, the account it is made for and the journal namespace
+
+    :param method: the client method name e.g. ``add_to_cart``
+    :type method: str
+    :param args: the positional arguments of the call
+    :type args: tuple
+    :param kwargs: the keyword arguments of the call
+    :type kwargs: dict or None
+    :param owner: the credentials the call is made with
+    :type owner: str, tuple or None
+    :param namespace: the namespace of the journal, e.g. a run id
+    :type namespace: str or None
+    :rtype: str
+    """
+    document = json.dumps(
+        [method, list(args), kwargs or {}, owner, namespace], sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+def rejected(error):
+    """Whether an exception shows a call was not applied
+
+    That is a connection that could not be made, a response with a 4xx
+    status or an API response reporting ``"result": "failure"``. Any other
+    error, e.g. a read timeout, a dropped connection or a 5xx status, may
+    have been raised after the request was applied.
+
+    :param error: the exception the call raised
+    :type error: Exception
+    :rtype: bool
+    """
+    if is_connect_error(error):
+        return True
+    status = getattr(error, "status", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return True
+    content = error.args[0] if len(error.args) == 1 else None
+    return isinstance(content, dict) and content.get("result") == "failure"
+
+
+class OperationJournal(object):
+    """Local write-ahead journal of mutating API calls
+
+    Clients given a journal record ``add_to_cart``, ``update_model_info``,
+    ``order_model`` and ``cancel_order`` calls under an idempotency key
+    before they are sent, and their outcome once they return. A call whose
+    key has already completed is not sent again, its recorded response is
+    returned instead, so a restarted batch skips the work that was done.
+    :meth:`resume` re-issues the calls that did not complete.
+
+    The key defaults to a hash of the method, its arguments, the credentials
+    of the client and the journal ``namespace`` (see
+    :func:`shapeways.journal.idempotency_key`). A journal kept in a file
+    outlives the run that wrote it, so it needs either a ``namespace``
+    naming the run, e.g. a batch id reused when the batch is restarted, or
+    an explicit ``idempotency_key`` on every call; otherwise an identical
+    call made on purpose in a later run would never be sent.
+
+    The journal is a SQLite database, so it can be shared between threads
+    and processes on the same host. A call that is in flight in another
+    thread or process is not sent again, :meth:`begin` raises
+    :class:`RuntimeError` instead. So does a call whose outcome is unknown,
+    one that raised after its request may have been sent; it is only sent
+    again by :meth:`resume` with ``include_unknown``, or once forgotten.
+
+    .. code:: python
+
+        journal = OperationJournal("orders.db", namespace="batch-42")
+        client = ShapewaysOauth2Client(journal=journal)
+        for line in order_lines:
+            client.add_to_cart(line.model_id, line.material_id)
+
+        # after a crash
+        for item in journal.resume(client):
+            print(item.key, item.ok)
+    """
+    __slots__ = ["path", "namespace", "replayed", "_connection", "_lock"]
+
+    def __init__(self, path=":memory:", timeout=30, namespace=None):
+        """Constructor for a new :class:`shapeways.journal.OperationJournal`
+
+        :param path: the SQLite database file, kept in memory by default
+        :type path: str
+        :param timeout: seconds to wait for another process holding the
+            database lock
+        :type timeout: float
+        :param namespace: scopes the default idempotency keys, required
+            for calls without an ``idempotency_key`` when ``path`` is a file
+        :type namespace: str or None
+        """
+        self.path = path
+        self.namespace = namespace
+        self.replayed = 0
+        self._lock = threading.Lock()
+        # transactions are opened explicitly, see begin
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False,
+            isolation_level=None
+        )
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS operations ("
+                " key TEXT PRIMARY KEY, method TEXT NOT NULL,"
+                " arguments TEXT NOT NULL, state TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL, response TEXT, error TEXT,"
+                " created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS operations_state"
+                " ON operations (state, created)"
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM operations"
+            ).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _entry(row):
+        key, method, arguments, state, attempts, response, error, created, updated = row
+        args, kwargs = json.loads(arguments)
+        return JournalEntry(
+            key, method, tuple(args), kwargs, state, attempts,
+            None if response is None else json.loads(response), error,
+            created, updated
+        )
+
+    def get(self, key):
+        """Look up a journaled call
+
+        :param key: the idempotency key of the call
+        :type key: str
+        :rtype: :class:`shapeways.journal.JournalEntry` or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM operations WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else self._entry(row)
+
+    def begin(self, method, args=(), kwargs=None, key=None, owner=None):
+        """Record a call before it is sent
+
+        :param method: the client method name
+        :type method: str
+        :param args: the positional arguments of the call, JSON serialisable
+        :type args: tuple
+        :param kwargs: the keyword arguments of the call, JSON serialisable
+        :type kwargs: dict or None
+        :param key: the idempotency key, derived from the call when ``None``
+        :type key: str or None
+        :param owner: the credentials the call is made with, part of the
+            derived key
+        :type owner: str, tuple or None
+        :returns: ``(key, entry)`` where ``entry`` is the
+            :class:`shapeways.journal.JournalEntry` of the call when it
+            already completed, ``None`` when it must be sent
+        :rtype: tuple
+        :raises: :class:`ValueError` when a journal kept in a file has
+            neither ``key`` nor :attr:`namespace`, :class:`RuntimeError`
+            when the call is in flight elsewhere
+        """
+        kwargs = kwargs or {}
+        if key is None:
+            if self.namespace is None and self.path != ":memory:":
+                raise ValueError(
+                    "%s: a journal kept in a file needs an idempotency_key or a"
+                    " namespace" % method
+                )
+            key = idempotency_key(method, args, kwargs, owner, self.namespace)
+        now = time.time()
+        with self._lock:
+            connection = self._connection
+            # holds the write lock from the insert to the state check, so two
+            # processes beginning the same call can't both send it
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO operations"
+                    " VALUES (?, ?, ?, ?, 1, NULL, NULL, ?, ?)",
+                    (key, method, json.dumps([list(args), kwargs]), PENDING, now, now)
+                ).rowcount
+                recorded = None
+                if not inserted:
+                    row = connection.execute(
+                        "SELECT * FROM operations WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row[3] == DONE:
+                        self.replayed += 1
+                        recorded = self._entry(row)
+                    elif row[3] in (PENDING, UNKNOWN):
+                        raise RuntimeError(
+                            "%s %s is in flight, or its outcome is unknown" % (method, key)
+                        )
+                    else:
+                        connection.execute(
+                            "UPDATE operations SET state = ?, attempts = attempts + 1,"
+                            " updated = ? WHERE key = ?", (PENDING, now, key)
+                        )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        return key, recorded
+
+    def complete(self, key, response):
+        """Record the response of a call
+
+        A response reporting ``"result": "failure"`` marks the call failed,
+        any other marks it done.
+
+        :param key: the idempotency key of the call
+        :type key: str
+        :param response: the decoded response
+        :type response: dict
+        """
+        failed = isinstance(response, dict) and response.get("result") == "failure"
+        self._finish(key, FAILED if failed else DONE, json.dumps(response), None)
+
+    def fail(self, key, error, sent=None):
+        """Record the exception a call raised
+
+        The call is marked failed when the error shows it was not applied
+        (see :func:`shapeways.journal.rejected`), otherwise its outcome is
+        unknown.
+
+        :param key: the idempotency key of the call
+        :type key: str
+        :param error: the exception
+        :type error: Exception
+        :param sent: whether the request may have been sent, decided from
+            ``error`` when ``None``
+        :type sent: bool or None
+        """
+        if sent is None:
+            sent = not rejected(error)
+        self._finish(
+            key, UNKNOWN if sent else FAILED, None,
+            "%s: %s" % (type(error).__name__, error)
+        )
+
+    def _finish(self, key, state, response, error):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE operations SET state = ?, response = ?, error = ?,"
+                " updated = ? WHERE key = ?",
+                (state, response, error, time.time(), key)
+            )
+
+    def run(self, method, call, args=(), kwargs=None, key=None, owner=None):
+        """Make a call through the journal
+
+        :param method: the client method name
+        :type method: str
+        :param call: sends the request and returns its response
+        :type call: callable
+        :param args: the positional arguments of the call
+        :type args: tuple
+        :param kwargs: the keyword arguments of the call
+        :type kwargs: dict or None
+        :param key: the idempotency key, derived from the call when ``None``
+        :type key: str or None
+        :param owner: the credentials the call is made with
+        :type owner: str, tuple or None
+        :returns: the response, or the recorded response of a completed call
+        :rtype: dict
+        """
+        key, recorded = self.begin(method, args, kwargs, key=key, owner=owner)
+        if recorded is not None:
+            return recorded.response
+        try:
+            response = call()
+        except Exception as error:
+            self.fail(key, error)
+            raise
+        self.complete(key, response)
+        return response
+
+    def entries(self, states=None):
+        """The journaled calls, oldest first
+
+        :param states: only the calls in these states, all when ``None``
+        :type states: tuple or None
+        :rtype: list of :class:`shapeways.journal.JournalEntry`
+        """
+        query = "SELECT * FROM operations"
+        params = ()
+        if states is not None:
+            states = tuple(states)
+            query += " WHERE state IN (%s)" % ", ".join("?" * len(states))
+            params = states
+        with self._lock:
+            rows = self._connection.execute(
+                query + " ORDER BY created, rowid", params
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def incomplete(self, include_pending=True, include_unknown=False):
+        """The calls that did not complete, oldest first
+
+        :param include_pending: whether calls that were in flight are
+            included, they may have been applied before the process died
+        :type include_pending: bool
+        :param include_unknown: whether calls that raised after their
+            request may have been sent are included
+        :type include_unknown: bool
+        :rtype: list of :class:`shapeways.journal.JournalEntry`
+        """
+        states = (FAILED,)
+        if include_pending:
+            states += (PENDING,)
+        if include_unknown:
+            states += (UNKNOWN,)
+        return self.entries(states)
+
+    def resume(self, client, include_pending=True, include_unknown=False):
+        """Re-issue the calls that did not complete, in their original order
+
+        Every call is made through the client's journal under its original
+        idempotency key, so ``client`` must be a blocking client created
+        with this journal. Pending calls are taken to have died with the
+        process that made them, so only resume once no other process works
+        through the journal. Errors are returned instead of aborting the
+        run.
+
+        :param client: the client to make the calls with
+        :type client: :class:`shapeways.client.Client` or
+            :class:`shapeways.oauth2_client.ShapewaysOauth2Client`
+        :param include_pending: whether calls that were in flight are
+            re-issued too
+        :type include_pending: bool
+        :param include_unknown: whether calls that raised after their
+            request may have been sent are re-issued too, only set it for
+            calls the API applies at most once or that were checked by hand
+        :type include_unknown: bool
+        :returns: a generator of :class:`shapeways.batch.BatchResult` keyed
+            by the idempotency key
+        :rtype: generator
+        """
+        for entry in self.incomplete(include_pending, include_unknown):
+            if entry.state in (PENDING, UNKNOWN):
+                self._interrupted(entry)
+            kwargs = dict(entry.kwargs, idempotency_key=entry.key)
+            try:
+                result = getattr(client, entry.method)(*entry.args, **kwargs)
+            except Exception as error:
+                yield BatchResult(entry.key, None, error)
+            else:
+                yield BatchResult(entry.key, result, None)
+
+    def _interrupted(self, entry):
+        """Mark a pending or unknown call failed so that :meth:`begin` sends
+        it again"""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE operations SET state = ?, error = ?, updated = ?"
+                " WHERE key = ? AND state = ? AND updated = ?",
+                (FAILED, entry.error or "interrupted", time.time(), entry.key,
+                 entry.state, entry.updated)
+            )
+
+    def forget(self, key):
+        """Drop a journaled call, it is sent again the next time it is made
+
+        :param key: the idempotency key of the call
+        :type key: str
+        :returns: whether the call was journaled
+        :rtype: bool
+        """
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM operations WHERE key = ?", (key,)
+            ).rowcount > 0
+
+    def prune(self, max_age):
+        """Drop completed calls older than ``max_age`` seconds
+
+        :param max_age: the age in seconds
+        :type max_age: float
+        :returns: the number of calls dropped
+        :rtype: int
+        """
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM operations WHERE state = ? AND updated < ?",
+                (DONE, time.time() - max_age)
+            ).rowcount
+
+    def stats(self):
+        """Get the journal counters
+
+        :returns: the number of calls per state and ``replayed``, the calls
+            answered from the journal
+        :rtype: dict
+        """
+        counts = {PENDING: 0, DONE: 0, FAILED: 0, UNKNOWN: 0}
+        with self._lock:
+            for state, count in self._connection.execute(
+                    "SELECT state, COUNT(*) FROM operations GROUP BY state"
+            ):
+                counts[state] = count
+        counts["replayed"] = self.replayed
+        return counts
@@ -1,7 +1,18 @@
-import base64
 import json
-import requests
 
+from shapeways.batch import BatchMixin
+from shapeways.codec import get_codec
+from shapeways.dedup import file_digest
+from shapeways.pagination import iter_items
+from shapeways.results import typed_response
+from shapeways.retry import send_request
+from shapeways.routes import Routes, OAUTH2_ENDPOINTS
+from shapeways.upload import JsonUploadBody
+from shapeways.session import (
+    create_session, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+)
+
+# Kept for backwards compatibility, requests are built from shapeways.routes.OAUTH2_ENDPOINTS
 AUTH_URL = '/oauth2/token'
 MATERIALS_URL = '/materials/v1'
 SINGLE_MATERIAL_URL = '/materials/{material_id}/v1'
@@ -14,15 +25,132 @@ ORDERS_URL = '/orders/v1'
 SINGLE_ORDER_URL = '/orders/{order_id}/v1'
 
 
-class ShapewaysOauth2Client():
+class StatusError(RuntimeError):
+    """
+    Raised for a response with an unsuccessful HTTP status
+    :param status: the HTTP status of the response
+    :type status: int
+    """
+
+    def __init__(self, status):
+        super(StatusError, self).__init__("Call threw status {}".format(status))
+        self.status = status
+
+
+class ShapewaysOauth2Client(BatchMixin):
     """
     Shapeways API client, supporting Oauth2 Bearer Token
+
+    Requests are sent through a long-lived pooled session, so connections
+    are reused between calls. The bearer header is built once when
+    :meth:`authenticate` succeeds. Requests can be throttled with a shared
+    shapeways.retry.TokenBucket and retried with a shapeways.retry.RetryPolicy.
     """
 
-    def __init__(self, api_url=None):
+    def __init__(self, api_url=None, session=None, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True, cache=None, validators=None,
+                 uploads=None, limiter=None, retry=None, codec=None, typed=False,
+                 journal=None, instrumentation=None, tokens=None, coalescer=None):
+        """
+        :param api_url: base url of the API, defaults to https://api.shapeways.com
+        :type api_url: str
+        :param session: a shared session to send requests with, a new pooled
+            session is created when None
+        :type session: requests.Session
+        :param pool_connections: number of per-host connection pools to cache
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of connections kept open per host
+        :type pool_maxsize: int
+        :param keep_alive: whether connections are kept open between requests
+        :type keep_alive: bool
+        :param cache: cache for the reference data endpoints (materials and categories),
+            disabled when None
+        :type cache: shapeways.cache.ResponseCache
+        :param validators: store of ETag/Last-Modified validators used to revalidate GET
+            requests, disabled when None
+        :type validators: shapeways.cache.ValidatorCache
+        :param uploads: index of uploaded file contents, uploads of content found in the index
+            are skipped, disabled when None
+        :type uploads: shapeways.dedup.UploadIndex
+        :param limiter: rate limiter every request waits on, may be shared between clients,
+            disabled when None
+        :type limiter: shapeways.retry.TokenBucket
+        :param retry: policy for retrying throttled and failed requests, disabled when None
+        :type retry: shapeways.retry.RetryPolicy
+        :param codec: JSON codec for request bodies and responses, 'auto' for the fastest
+            installed one (see shapeways.codec), the standard library is used when None
+        :type codec: str or shapeways.codec.JsonCodec
+        :param typed: whether models, materials, categories, the cart and orders are returned as
+            compact shapeways.results objects instead of dicts
+        :type typed: bool
+        :param journal: write-ahead journal of add_to_cart, order_model and cancel_order
+            calls, calls that already completed are not sent again, disabled when None
+        :type journal: shapeways.journal.OperationJournal
+        :param instrumentation: hooks every request is reported to (see shapeways.instrument),
+            disabled when None
+        :type instrumentation: shapeways.instrument.Instrumentation
+        :param tokens: expiry aware store of the bearer token, refreshed before it lapses and
+            optionally shared between processes (see shapeways.tokens), when None the token of
+            authenticate() is used until it is rejected
+        :type tokens: shapeways.tokens.TokenManager
+        :param coalescer: collapses identical concurrent GET requests into one, may be shared
+            between clients, disabled when None
+        :type coalescer: shapeways.coalesce.RequestCoalescer
+        """
+        self.client_id = None
         self.access_token = None
-        if not api_url:
-            self.api_url = 'https://api.shapeways.com'
+        self.headers = None
+        self._headers_token = None
+        self._credentials = None
+        self.api_url = api_url or 'https://api.shapeways.com'
+        self._owns_session = session is None
+        if session is None:
+            session = self._create_session(pool_connections, pool_maxsize, keep_alive)
+        self.session = session
+        self.cache = cache
+        self.validators = validators
+        self.uploads = uploads
+        self.limiter = limiter
+        self.retry = retry
+        self.codec = None if codec is None else get_codec(codec)
+        self.typed = typed
+        self.journal = journal
+        self.instrumentation = instrumentation
+        self.tokens = tokens
+        self.coalescer = coalescer
+
+    @property
+    def api_url(self):
+        """
+        Base url of the API, endpoint urls are recompiled when set
+        """
+        return self._api_url
+
+    @api_url.setter
+    def api_url(self, api_url):
+        self._api_url = api_url
+        self._routes = Routes(api_url, 'v1', OAUTH2_ENDPOINTS)
+
+    def _create_session(self, pool_connections, pool_maxsize, keep_alive):
+        """
+        Internal function - create the pooled session owned by this client
+        :rtype: requests.Session
+        """
+        return create_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              keep_alive=keep_alive)
+
+    def close(self):
+        """
+        Release pooled connections, a session passed into the constructor is left open
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     # Oauth2 authentication method
     def authenticate(self, client_id, client_secret):
@@ -34,28 +162,137 @@ class ShapewaysOauth2Client():
         :return: True for success, false for Failure
         :rtype: bool
         """
+        if self.tokens is not None:
+            self._credentials = (client_id, client_secret)
+            try:
+                self.access_token = self._token()
+            except RuntimeError as error:
+                self._credentials = None
+                print("Error: " + str(error))
+                return False
+            self.client_id = client_id
+            return True
+
         auth_post_data = {
             'grant_type': 'client_credentials'
         }
 
-        response = requests.post(url=self.api_url + AUTH_URL, data=auth_post_data, auth=(client_id, client_secret))
+        response = self._send('post', url=self._routes.url('token'), data=auth_post_data,
+                              auth=(client_id, client_secret))
 
         if response.status_code == 200:
-            self.access_token = response.json()['access_token']
+            self.client_id = client_id
+            self.access_token = self._json(response)['access_token']
             return True
         print("Error: status code " + str(response.status_code))
         print(response.content)
         return False
 
+    def _request_token(self):
+        """
+        Internal function - post the client credentials to the token endpoint
+        :return: the token response, with access_token and expires_in
+        :rtype: dict
+        """
+        client_id, client_secret = self._credentials
+        response = self._send('post', url=self._routes.url('token'),
+                              data={'grant_type': 'client_credentials'},
+                              auth=(client_id, client_secret))
+        if response.status_code != 200:
+            raise RuntimeError("Token request threw status {}".format(response.status_code))
+        return self._json(response)
+
+    def _token(self):
+        """
+        Internal function - the current access token of the token manager, refreshed when due
+        :rtype: str
+        """
+        return self.tokens.get(self._credentials[0], self._request_token)
+
     # Internal wrapper functions to make endpoint code easier to read and less repetitive
+    def _send(self, method, **params):
+        """
+        Internal function - send a request through the session, waiting on the rate limiter and
+        retrying as allowed by the retry policy
+        :param method: lower case http method, e.g. 'get'
+        :rtype: requests.Response
+        """
+        if self.instrumentation is not None:
+            return self._instrumented(method, None, params)[0]
+        return send_request(getattr(self.session, method), method, limiter=self.limiter,
+                            retry=self.retry, **params)
+
+    def _call(self, method, **params):
+        """
+        Internal function - send a request and validate the response
+        :param method: lower case http method, e.g. 'get'
+        :rtype: list()
+        """
+        if self.instrumentation is None:
+            return self._validate_response(self._send(method, **params))
+        return self._instrumented(method, self._validate_response, params)[1]
+
+    def _instrumented(self, method, decode, params):
+        """
+        Internal function - send a request reporting it to the instrumentation
+        :param decode: decodes the response, timed when given
+        :return: (response, decoded)
+        :rtype: tuple
+        """
+        def send(call, **params):
+            return send_request(call, method, limiter=self.limiter, retry=self.retry, **params)
+        return self.instrumentation.request(self.session, method, send, routes=self._routes,
+                                            decode=decode, **params)
+
+    def _auth_headers(self):
+        """
+        Internal function - bearer headers for the current access token, built once per token
+        :rtype: dict
+        """
+        if self.tokens is not None and self._credentials is not None:
+            self.access_token = self._token()
+        if not self.access_token:
+            raise RuntimeError("Access token not defined: be sure to call .authenticate() first!")
+        if self._headers_token != self.access_token:
+            self._headers_token = self.access_token
+            self.headers = {
+                'Authorization': 'Bearer ' + self.access_token
+            }
+        return self.headers
+
     def _validate_response(self, response):
         """
         Internal function - validate results
         :rtype: list()
         """
         if response.status_code != 200:
-            raise RuntimeError("Call threw status {}".format(response.status_code))
-        content = response.json()
+            if response.status_code == 401 and self.tokens is not None:
+                self.tokens.invalidate(self.access_token)
+            raise StatusError(response.status_code)
+        return self._validate_content(self._json(response))
+
+    def _json(self, response):
+        """
+        Internal function - decode a response body with the codec
+        """
+        if self.codec is None:
+            return response.json()
+        return self.codec.loads(response.content)
+
+    def _dumps(self, data):
+        """
+        Internal function - encode a request body with the codec
+        :rtype: str or bytes
+        """
+        if self.codec is None:
+            return json.dumps(data)
+        return self.codec.dumps(data)
+
+    def _validate_content(self, content):
+        """
+        Internal function - validate the decoded body of a successful response
+        :rtype: list()
+        """
         try:
             if content['result'] == 'success':
                 return content
@@ -66,19 +303,90 @@ class ShapewaysOauth2Client():
 
     def _execute_get(self, url, **params):
         """
-        Internal function - execute get request and validate
+        Internal function - execute get request and validate, identical concurrent requests
+        share one request when the coalescer is enabled
         :param url:
         :param params:
         :rtype: list()
         """
-        if not self.access_token:
-            raise RuntimeError("Access token not defined: be sure to call .authenticate() first!")
+        coalescer = self.coalescer
+        if coalescer is None:
+            return self._execute_get_once(url, **params)
+        key = coalescer.key(url, params.get('params'), credentials=self._credentials_key(),
+                            body=params.get('data'))
+        return coalescer.call(key, lambda: self._execute_get_once(url, **params))
 
-        headers = {
-            'Authorization': 'Bearer ' + self.access_token
-        }
-        response = requests.get(url=url, headers=headers, **params)
-        return self._validate_response(response)
+    def _credentials_key(self):
+        """
+        Internal function - identifies the user requests are made for in cache keys
+        """
+        return self.client_id or self.access_token
+
+    def _execute_get_once(self, url, **params):
+        """
+        Internal function - execute get request and validate, revalidating against stored
+        validators when enabled
+        :param url:
+        :param params:
+        :rtype: list()
+        """
+        validators = self.validators
+        if validators is None:
+            return self._call('get', url=url, headers=self._auth_headers(), **params)
+
+        key = validators.key(url, credentials=self._credentials_key())
+        headers = dict(self._auth_headers(), **validators.headers(key))
+        response = self._send('get', url=url, headers=headers, **params)
+        if response.status_code == 304:
+            content = validators.not_modified(key)
+            if content is not None:
+                return content
+            # evicted while the request was in flight
+            response = self._send('get', url=url, headers=self._auth_headers(), **params)
+        content = self._validate_response(response)
+        validators.store(key, response.headers, content, len(response.content))
+        return content
+
+    def _cached_get(self, endpoint, url, **params):
+        """
+        Internal function - execute get request through the response cache
+        :param endpoint: endpoint name used to pick the cache TTL, e.g. 'materials'
+        :param url:
+        :param params:
+        :rtype: list()
+        """
+        cache = self.cache
+        if cache is None or not cache.caches(endpoint):
+            return self._execute_get(url, **params)
+        key = cache.key(endpoint, url, credentials=self._credentials_key())
+        content = cache.get(key)
+        if content is None:
+            content = self._execute_get(url, **params)
+            cache.set(key, content)
+        elif self.instrumentation is not None:
+            self.instrumentation.cached('get', url, self._routes)
+        return content
+
+    def _typed(self, endpoint, content):
+        """
+        Internal function - convert content to shapeways.results objects when typed is set
+        """
+        if not self.typed:
+            return content
+        return typed_response(endpoint, content)
+
+    def _journaled(self, method, args, key, call):
+        """
+        Internal function - make a mutating call through the journal when enabled
+        :param method: name of the client method, e.g. 'add_to_cart'
+        :param args: arguments the method was called with
+        :param key: idempotency key, derived from the call when None
+        :param call: makes the request and returns its content
+        :rtype: dict
+        """
+        if self.journal is None:
+            return call()
+        return self.journal.run(method, call, args, key=key, owner=self._credentials_key())
 
     def _execute_delete(self, url, **params):
         """
@@ -87,14 +395,7 @@ class ShapewaysOauth2Client():
         :param params:
         :rtype: list()
         """
-        if not self.access_token:
-            raise RuntimeError("Access token not defined: be sure to call .authenticate() first!")
-
-        headers = {
-            'Authorization': 'Bearer ' + self.access_token
-        }
-        response = requests.delete(url=url, headers=headers, **params)
-        return self._validate_response(response.json())
+        return self._call('delete', url=url, headers=self._auth_headers(), **params)
 
     def _execute_post(self, url, **params):
         """
@@ -103,14 +404,11 @@ class ShapewaysOauth2Client():
         :param params:
         :rtype: list()
         """
-        if not self.access_token:
-            raise RuntimeError("Access token not defined: be sure to call .authenticate() first!")
-
-        headers = {
-            'Authorization': 'Bearer ' + self.access_token
-        }
-        response = requests.post(url=url, headers=headers, **params)
-        return self._validate_response(response.json())
+        headers = self._auth_headers()
+        extra_headers = params.pop('headers', None)
+        if extra_headers:
+            headers = dict(headers, **extra_headers)
+        return self._call('post', url=url, headers=headers, **params)
 
     def _execute_put(self, url, **params):
         """
@@ -119,14 +417,11 @@ class ShapewaysOauth2Client():
         :param params:
         :rtype: list()
         """
-        if not self.access_token:
-            raise RuntimeError("Access token not defined: be sure to call .authenticate() first!")
-
-        headers = {
-            'Authorization': 'Bearer ' + self.access_token
-        }
-        response = requests.put(url=url, headers=headers, **params)
-        return self._validate_response(response.json())
+        headers = self._auth_headers()
+        extra_headers = params.pop('headers', None)
+        if extra_headers:
+            headers = dict(headers, **extra_headers)
+        return self._call('put', url=url, headers=headers, **params)
 
     # Materials Management Endpoints
     def get_materials(self):
@@ -136,7 +431,7 @@ class ShapewaysOauth2Client():
         :return: list of materials
         :rtype: list()
         """
-        content = self._execute_get(url=self.api_url + MATERIALS_URL)
+        content = self._typed('materials', self._cached_get('materials', self._routes.url('materials')))
         return content['materials']
 
     def get_single_material(self, material_id):
@@ -147,8 +442,7 @@ class ShapewaysOauth2Client():
         :type material_id: int
         :return:
         """
-        material_url = SINGLE_MATERIAL_URL.format(material_id=material_id)
-        content = self._execute_get(self.api_url + material_url)
+        content = self._typed('material', self._cached_get('material', self._routes.url('material', material_id)))
         return content
 
     # Model Management Endpoints
@@ -156,11 +450,27 @@ class ShapewaysOauth2Client():
         """
         Use your bearer token to retrieve a list of your models
 
-        :return: list of materials
+        :return: list of models
         :rtype: list()
         """
-        content = self._execute_get(url=self.api_url + MODEL_URL + '?page=' + str(page_count))
-        return content['models']
+        content = self._execute_get(url=self._routes.url('models') + '?page=' + str(page_count))
+        return self._typed('models', content['models'])
+
+    def iter_models(self, limit=None, start_page=1, prefetch=True):
+        """
+        Iterate over all of your models one record at a time, fetching pages lazily until an
+        empty one is returned. The next page is fetched in the background while the current
+        one is consumed.
+
+        :param limit: maximum number of models to yield, all when None
+        :type limit: int
+        :param start_page: page to start from, used to resume a walk
+        :type start_page: int
+        :param prefetch: whether to fetch the next page in the background
+        :type prefetch: bool
+        :return: generator of models
+        """
+        return iter_items(self.get_models, limit=limit, start_page=start_page, prefetch=prefetch)
 
     def get_single_model(self, model_id):
         """
@@ -170,8 +480,7 @@ class ShapewaysOauth2Client():
 
         :return: model information for a single model
         """
-        model_url = SINGLE_MODEL_URL.format(model_id=model_id)
-        content = self._execute_get(self.api_url + model_url)
+        content = self._typed('model', self._execute_get(self._routes.url('model', model_id)))
         return content
 
     def delete_model(self, model_id):
@@ -185,32 +494,60 @@ class ShapewaysOauth2Client():
         model_delete_data = {
             'modelId': model_id
         }
-        model_url = SINGLE_MODEL_URL.format(model_id=model_id)
-        content = self._execute_delete(self.api_url + model_url, data=json.dumps(model_delete_data))
+        content = self._execute_delete(self._routes.url('model', model_id),
+                                       data=self._dumps(model_delete_data))
         return content
 
-    def upload_model(self, path_to_model):
+    def upload_model(self, path_to_model, progress=None):
         """
         Upload a model to Shapeways
 
-        :param path_to_model: path to model on your local filesystem
+        The file is streamed, read and base64 encoded in chunks, so memory use does not grow
+        with the size of the model.
+
+        :param path_to_model: path to model on your local filesystem, or a binary file object
         :type path_to_model: str
+        :param progress: called as progress(bytes_read, total_bytes) as the file is sent
+        :type progress: callable
         :return:
         """
-
-        with open(path_to_model, 'rb') as model_file:
-            model_file_data = model_file.read()
-
         model_upload_post_data = {
             'fileName': 'cube.stl',
-            'file': base64.b64encode(model_file_data).decode('utf-8'),
             'description': 'Someone call a doctor, because this cube is SIIIICK.',
             'hasRightsToModel': 1,
             'acceptTermsAndConditions': 1
         }
+        body = JsonUploadBody(path_to_model, model_upload_post_data, progress=progress)
 
-        content = self._execute_post(url=self.api_url + MODEL_URL, data=json.dumps(model_upload_post_data))
-        return content
+        def upload():
+            return self._execute_post(url=self._routes.url('models'), data=body,
+                                      headers={'Content-Type': 'application/json'})
+        if self.uploads is None:
+            return upload()
+        return self._indexed_upload(file_digest(path_to_model), upload)
+
+    def _indexed_upload(self, digest, upload):
+        """
+        Internal function - make an upload through the upload index
+        :param digest: the content hash of the file being uploaded
+        :type digest: str
+        :param upload: makes the upload and returns its response
+        :type upload: callable
+        :return: the upload response, or the recorded response of an earlier upload of the same content
+        """
+        return self.uploads.upload(digest, upload, exists=self._model_exists,
+                                   owner=self._credentials_key())
+
+    def _model_exists(self, model_id):
+        """
+        Internal function - whether a model still exists
+        :rtype: bool
+        """
+        try:
+            self.get_single_model(model_id)
+        except RuntimeError:
+            return False
+        return True
 
     # Category management endpoints
     def get_categories(self):
@@ -219,7 +556,7 @@ class ShapewaysOauth2Client():
 
         :return:
         """
-        content = self._execute_get(self.api_url + CATEGORIES_ENDPOINT)
+        content = self._typed('categories', self._cached_get('categories', self._routes.url('categories')))
         return content
 
     def get_single_category(self, category_id):
@@ -231,8 +568,8 @@ class ShapewaysOauth2Client():
         category_data = {
             'categoryId': category_id
         }
-        category_url = SINGLE_CATEGORY_ENDPOINT.format(category_id=category_id)
-        content = self._execute_get(url=self.api_url+category_url, data=json.dumps(category_data))
+        content = self._typed('category', self._cached_get(
+            'category', self._routes.url('category', category_id), data=self._dumps(category_data)))
         return content
 
     # Cart management endpoints
@@ -242,14 +579,17 @@ class ShapewaysOauth2Client():
 
         :return:
         """
-        content = self._execute_get(self.api_url + CART_URL)
+        content = self._typed('cart', self._execute_get(self._routes.url('cart')))
         return content
 
-    def add_to_cart(self, model_id, material_id, quantity=1):
+    def add_to_cart(self, model_id, material_id, quantity=1, idempotency_key=None):
         """
         Add a model to the cart.
 
         :param model_id:
+        :param idempotency_key: key the call is journaled under, see
+            shapeways.journal.OperationJournal
+        :type idempotency_key: str
         :return:
         """
         add_to_cart_data = {
@@ -257,7 +597,9 @@ class ShapewaysOauth2Client():
             'materialId': material_id,
             'quantity': quantity
         }
-        content = self._execute_post(self.api_url + CART_URL, data=json.dumps(add_to_cart_data))
+        content = self._journaled(
+            'add_to_cart', (model_id, material_id, quantity), idempotency_key,
+            lambda: self._execute_post(self._routes.url('cart'), data=self._dumps(add_to_cart_data)))
         return content
 
     # Order management endpoints
@@ -267,7 +609,7 @@ class ShapewaysOauth2Client():
 
         :return:
         """
-        content = self._execute_get(self.api_url + ORDERS_URL)
+        content = self._typed('orders', self._execute_get(self._routes.url('orders')))
         return content
 
     def get_single_order(self, order_id):
@@ -281,20 +623,26 @@ class ShapewaysOauth2Client():
         order_data = {
             'orderId': order_id
         }
-        order_url = SINGLE_ORDER_URL.format(order_id=order_id)
-        content = self._execute_get(self.api_url+order_url, data=json.dumps(order_data))
+        content = self._typed('order', self._execute_get(self._routes.url('order', order_id),
+                                                          data=self._dumps(order_data)))
         return content
 
     def order_model(self, payment_verification_id, first_name, last_name, country, city,
-                    address1, address2, zip_code, phone_number, state=None, items=None, model_id=None, material_id=None):
+                    address1, address2, zip_code, phone_number, state=None, items=None, model_id=None, material_id=None,
+                    idempotency_key=None):
         """
         Order a model.
 
         :type model_id: int
         :type material_id: int
         :type payment_verification_id: str
+        :param idempotency_key: key the call is journaled under, see
+            shapeways.journal.OperationJournal
+        :type idempotency_key: str
         :return:
         """
+        args = (payment_verification_id, first_name, last_name, country, city, address1, address2,
+                zip_code, phone_number, state, items, model_id, material_id)
         if not items:
             if not (material_id and model_id):
                 raise RuntimeError("Need to provide either Items Array, or ModelID+MaterialID")
@@ -320,21 +668,27 @@ class ShapewaysOauth2Client():
             'shippingOption': 'Cheapest'
         }
 
-        content = self._execute_post(url=self.api_url + ORDERS_URL, data=json.dumps(order_data))
+        content = self._journaled(
+            'order_model', args, idempotency_key,
+            lambda: self._execute_post(url=self._routes.url('orders'), data=self._dumps(order_data)))
         return content
 
-    def cancel_order(self, order_id):
+    def cancel_order(self, order_id, idempotency_key=None):
         """
         Cancel an order
 
         :param order_id: order to cancel
         :type order_id: int
+        :param idempotency_key: key the call is journaled under, see
+            shapeways.journal.OperationJournal
+        :type idempotency_key: str
         :return:
         """
         order_data = {
             'orderId': order_id,
             'status': 'cancelled'
         }
-        order_url = SINGLE_ORDER_URL.format(order_id=order_id)
-        content = self._execute_put(self.api_url+order_url, data=json.dumps(order_data))
+        content = self._journaled(
+            'cancel_order', (order_id,), idempotency_key,
+            lambda: self._execute_put(self._routes.url('order', order_id), data=self._dumps(order_data)))
         return content
\ No newline at end of file
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iter_pages(fetch_page, start_page=1, prefetch=True):
+    """Lazily walk a paged listing, yielding one page of items at a time
+
+    Pages are requested in order starting at ``start_page`` until a page comes
+    back empty. With ``prefetch`` enabled the next page is requested on a
+    background thread while the current one is being consumed, so at most
+    two pages are held in memory at any time.
+
+    :param fetch_page: callable taking a page number and returning the list
+        of items on that page
+    :type fetch_page: callable
+    :param start_page: the first page to fetch
+    :type start_page: int
+    :param prefetch: whether to fetch the next page in the background
+    :type prefetch: bool
+    :returns: a generator of ``(page, items)`` tuples
+    :rtype: generator
+    """
+    page = start_page
+    if not prefetch:
+        while True:
+            items = fetch_page(page)
+            if not items:
+                return
+            yield page, items
+            page += 1
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(fetch_page, page)
+        while True:
+            items = future.result()
+            if not items:
+                return
+            future = executor.submit(fetch_page, page + 1)
+            yield page, items
+            page += 1
+    finally:
+        # the consumer stopped early, drop the page that was prefetched
+        future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_items(fetch_page, limit=None, start_page=1, prefetch=True):
+    """Lazily walk a paged listing, yielding individual items
+
+    :param fetch_page: callable taking a page number and returning the list
+        of items on that page
+    :type fetch_page: callable
+    :param limit: the maximum number of items to yield, all when ``None``
+    :type limit: int or None
+    :param start_page: the first page to fetch, used to resume a walk
+    :type start_page: int
+    :param prefetch: whether to fetch the next page in the background
+    :type prefetch: bool
+    :returns: a generator of items
+    :rtype: generator
+    """
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    pages = iter_pages(fetch_page, start_page=start_page, prefetch=prefetch)
+    try:
+        for _, items in pages:
+            for item in items:
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    finally:
+        pages.close()
@@ -0,0 +1,362 @@
+"""Typed, compact result objects
+
+Clients created with ``typed=True`` return these instead of plain dicts.
+Every field of a record is held in a ``__slots__`` attribute named after
+the snake case version of its JSON key (``modelId`` becomes ``model_id``),
+and nested fields (``materials``, ``urls``, ...) are kept as compact JSON
+bytes until they are first accessed. A large inventory of records takes
+several times less memory than the dicts it is built from.
+
+Results still behave like read/write mappings keyed by the JSON field
+names, so code written against the dict results keeps working.
+
+.. code:: python
+
+    client = Client("key", "secret", typed=True)
+    for model in client.iter_models():
+        print(model.model_id, model["title"], model.materials["6"]["price"])
+"""
+import re
+
+from shapeways.codec import get_codec
+
+_codec = get_codec("auto")
+_MISSING = object()
+_CAMEL = re.compile(r"(?<=[a-z0-9])([A-Z])")
+
+
+def attribute_name(key):
+    """The attribute name of a JSON field e.g. ``modelId`` -> ``model_id``
+
+    :param key: the JSON field name
+    :type key: str
+    :rtype: str
+    """
+    return _CAMEL.sub(r"_\1", key).lower()
+
+
+class _Packed(bytes):
+    """A nested value kept as compact JSON until it is accessed"""
+    __slots__ = ()
+
+
+class _LazyField(object):
+    """Descriptor unpacking a :class:`_Packed` slot value on first access"""
+    __slots__ = ["slot"]
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if type(value) is _Packed:
+            # some decoders only accept exact bytes
+            value = _codec.loads(bytes(value))
+            self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
+    def __delete__(self, instance):
+        self.slot.__delete__(instance)
+
+
+class _ResultType(type):
+    """Builds ``__slots__`` and lazy field descriptors from ``FIELDS`` and
+    ``LAZY``
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get("FIELDS", ())
+        lazy = frozenset(namespace.get("LAZY", ()))
+        slots = list(namespace.get("__slots__", ()))
+        attributes = {}
+        for key in fields:
+            attribute = attribute_name(key)
+            attributes[key] = attribute
+            slots.append("_" + attribute if key in lazy else attribute)
+        namespace["__slots__"] = tuple(slots)
+        cls = type.__new__(mcs, name, bases, namespace)
+        for key in fields:
+            if key in lazy:
+                attribute = attributes[key]
+                setattr(cls, attribute, _LazyField(cls.__dict__["_" + attribute]))
+        if fields:
+            cls._attributes = attributes
+            cls._lazy = lazy
+        return cls
+
+
+# created directly so the metaclass works on python 2 and 3
+_ResultBase = _ResultType("_ResultBase", (object,), {"__slots__": ()})
+
+
+class Result(_ResultBase):
+    """Base class of the typed results
+
+    Subclasses declare their JSON fields in ``FIELDS`` and the nested ones
+    that are parsed lazily in ``LAZY``. Fields that are not declared are
+    kept in a plain dict.
+    """
+    __slots__ = ("_extra",)
+    FIELDS = ()
+    LAZY = ()
+    _attributes = {}
+    _lazy = frozenset()
+
+    def __init__(self, data=None):
+        """Build a result from a decoded API record
+
+        :param data: the decoded record
+        :type data: dict or None
+        """
+        self._extra = None
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_json(cls, document):
+        """Build a result from a JSON document
+
+        :param document: the JSON encoded record
+        :type document: bytes or str
+        """
+        return cls(_codec.loads(document))
+
+    def __setitem__(self, key, value):
+        attribute = self._attributes.get(key)
+        if attribute is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+        elif key in self._lazy and value and isinstance(value, (dict, list)):
+            setattr(self, "_" + attribute, _Packed(_codec.dumps(value)))
+        else:
+            setattr(self, attribute, value)
+
+    def __getitem__(self, key):
+        attribute = self._attributes.get(key)
+        if attribute is None:
+            if self._extra is None:
+                raise KeyError(key)
+            return self._extra[key]
+        value = getattr(self, attribute, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key):
+        attribute = self._attributes.get(key)
+        try:
+            if attribute is None:
+                if self._extra is None:
+                    raise KeyError(key)
+                del self._extra[key]
+            else:
+                delattr(self, attribute)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, Result)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.to_dict())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = []
+        for key in self.FIELDS:
+            slot = self._attributes[key]
+            if key in self._lazy:
+                slot = "_" + slot
+            if getattr(self, slot, _MISSING) is not _MISSING:
+                keys.append(key)
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Convert back to the plain dict the result was built from
+
+        :rtype: dict
+        """
+        return dict(self.items())
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+
+class Model(Result):
+    """A model, from :meth:`shapeways.client.Client.get_models` and
+    :meth:`shapeways.client.Client.get_model`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "modelId", "modelVersion", "title", "fileName", "contentLength",
+        "fileMd5Checksum", "description", "isPublic", "isClaimable",
+        "isForSale", "isDownloadable", "isPrintable", "printable",
+        "uploadScale", "secretKey", "defaultMaterialId", "spin", "materials",
+        "categories", "tags", "urls", "file", "nextActionSuggestions",
+        "result",
+    )
+    LAZY = ("materials", "categories", "tags", "urls", "nextActionSuggestions")
+
+
+class ModelInfo(Result):
+    """Model information, from :meth:`shapeways.client.Client.get_model_info`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "modelId", "modelVersion", "title", "fileName", "contentLength",
+        "fileMd5Checksum", "description", "isPublic", "isClaimable",
+        "isForSale", "isDownloadable", "printable", "uploadScale",
+        "secretKey", "defaultMaterialId", "materials", "categories", "tags",
+        "urls", "spin", "nextActionSuggestions", "result",
+    )
+    LAZY = ("materials", "categories", "tags", "urls", "nextActionSuggestions")
+
+
+class Material(Result):
+    """A material, from :meth:`shapeways.client.Client.get_materials` and
+    :meth:`shapeways.client.Client.get_material`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "materialId", "title", "supportsColorFiles", "printerId",
+        "swatch", "restrictions", "minimumWallThickness", "description",
+        "result",
+    )
+    LAZY = ("restrictions",)
+
+
+class Printer(Result):
+    """A printer, from :meth:`shapeways.client.Client.get_printers` and
+    :meth:`shapeways.client.Client.get_printer`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "printerId", "title", "volumeMin", "volumeMax", "xBoundMin",
+        "xBoundMax", "yBoundMin", "yBoundMax", "zBoundMin", "zBoundMax",
+        "materials", "result",
+    )
+    LAZY = ("materials",)
+
+
+class Category(Result):
+    """A category, from :meth:`shapeways.client.Client.get_categories` and
+    :meth:`shapeways.client.Client.get_category`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "categoryId", "title", "parentId", "childCategories", "urls",
+        "result",
+    )
+    LAZY = ("childCategories", "urls")
+
+
+class Cart(Result):
+    """The cart, from :meth:`shapeways.client.Client.get_cart`"""
+    __slots__ = ()
+    FIELDS = ("items", "numItems", "subtotal", "currency", "result")
+    LAZY = ("items",)
+
+
+class Order(Result):
+    """An order, from
+    :meth:`shapeways.oauth2_client.ShapewaysOauth2Client.get_orders`
+    """
+    __slots__ = ()
+    FIELDS = (
+        "orderId", "orderStatus", "status", "items", "shippingOption",
+        "shippingAddress", "paymentStatus", "subtotal", "total", "currency",
+        "createdAt", "result",
+    )
+    LAZY = ("items", "shippingAddress")
+
+
+#: How typed results are built per endpoint: the result class, and for
+#: listings the field holding the records
+ENDPOINT_RESULTS = {
+    "model": (Model, None),
+    "models": (Model, "models"),
+    "model_info": (ModelInfo, None),
+    "material": (Material, None),
+    "materials": (Material, "materials"),
+    "printer": (Printer, None),
+    "printers": (Printer, "printers"),
+    "category": (Category, None),
+    "categories": (Category, "categories"),
+    "cart": (Cart, None),
+    "order": (Order, None),
+    "orders": (Order, "orders"),
+}
+
+
+def typed_response(endpoint, response):
+    """Convert the decoded response of ``endpoint`` to typed results
+
+    Listings keep their envelope with every record converted, single
+    records are converted whole. Failed responses and records that are not
+    objects are returned unchanged.
+
+    :param endpoint: the endpoint name e.g. ``models``
+    :type endpoint: str
+    :param response: the decoded response
+    :type response: dict or list
+    :returns: the converted response
+    """
+    cls, field = ENDPOINT_RESULTS[endpoint]
+
+    def convert(record):
+        return cls(record) if isinstance(record, dict) else record
+
+    if isinstance(response, list):
+        return [convert(record) for record in response]
+    if not isinstance(response, dict) or response.get("result") == "failure":
+        return response
+    if field is None:
+        return cls(response)
+    records = response.get(field)
+    if isinstance(records, dict):
+        records = dict((key, convert(record)) for key, record in records.items())
+    elif isinstance(records, list):
+        records = [convert(record) for record in records]
+    else:
+        return response
+    return dict(response, **{field: records})
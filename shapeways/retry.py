@@ -0,0 +1,287 @@
+import email.utils
+import random
+import threading
+import time
+
+from requests.exceptions import ConnectTimeout, ConnectionError, RequestException
+from urllib3.exceptions import NewConnectionError
+
+#: Methods that can be replayed without side effects
+IDEMPOTENT_METHODS = frozenset(["get", "head", "options", "put", "delete"])
+
+#: Statuses worth retrying
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class TokenBucket(object):
+    """Thread safe token bucket rate limiter
+
+    Allows bursts of up to ``capacity`` requests and a sustained rate of
+    ``rate`` requests per second. A single bucket can be shared by several
+    clients, threads and event loops.
+
+    .. code:: python
+
+        limiter = TokenBucket(rate=5, capacity=10)
+        client = Client("key", "secret", limiter=limiter)
+
+        # from asyncio code
+        await asyncio.sleep(limiter.reserve())
+    """
+    __slots__ = [
+        "rate", "capacity", "clock", "throttled", "waited", "_tokens",
+        "_updated", "_lock",
+    ]
+
+    def __init__(self, rate, capacity=None, clock=time.time):
+        """Constructor for a new :class:`shapeways.retry.TokenBucket`
+
+        :param rate: tokens added per second
+        :type rate: float
+        :param capacity: the maximum number of tokens held, defaults to
+            ``rate``
+        :type capacity: float or None
+        :param clock: function returning the current time in seconds
+        :type clock: callable
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.clock = clock
+        self.throttled = 0
+        self.waited = 0.0
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take ``tokens`` from the bucket, going into debt if necessary
+
+        :param tokens: the number of tokens to take
+        :type tokens: float
+        :returns: the number of seconds the caller must wait before making
+            its request, ``0`` when tokens were available
+        :rtype: float
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / self.rate
+            self.throttled += 1
+            self.waited += delay
+            return delay
+
+    def acquire(self, tokens=1):
+        """Take ``tokens`` from the bucket, sleeping until they are available
+
+        :param tokens: the number of tokens to take
+        :type tokens: float
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    def stats(self):
+        """Get the limiter counters
+
+        :returns: ``throttled`` (requests that had to wait) and ``waited``
+            (total seconds waited)
+        :rtype: dict
+        """
+        with self._lock:
+            return {"throttled": self.throttled, "waited": self.waited}
+
+
+def parse_retry_after(value, clock=time.time):
+    """Parse a ``Retry-After`` header
+
+    :param value: the header, either seconds or an HTTP date
+    :type value: str or None
+    :returns: the number of seconds to wait or ``None``
+    :rtype: float or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - clock())
+
+
+class RetryPolicy(object):
+    """Exponential backoff retry policy with jitter
+
+    Idempotent requests are retried on connection errors and on the
+    ``statuses`` given. ``POST`` requests are only retried when the server
+    cannot have acted on them: a ``429 Too Many Requests`` reply or a failure
+    to connect. A ``Retry-After`` header takes precedence over the computed
+    backoff.
+
+    .. code:: python
+
+        retry = RetryPolicy(max_retries=5)
+        client = Client("key", "secret", retry=retry)
+        print(retry.stats())
+    """
+    __slots__ = [
+        "max_retries", "backoff", "max_backoff", "jitter", "statuses",
+        "methods", "retries", "gave_up", "_lock",
+    ]
+
+    def __init__(
+            self, max_retries=3, backoff=0.5, max_backoff=30.0, jitter=True,
+            statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS
+    ):
+        """Constructor for a new :class:`shapeways.retry.RetryPolicy`
+
+        :param max_retries: the maximum number of retries per request
+        :type max_retries: int
+        :param backoff: the delay before the first retry in seconds, doubled
+            for every further retry
+        :type backoff: float
+        :param max_backoff: the maximum delay between retries in seconds,
+            including delays asked for by ``Retry-After``
+        :type max_backoff: float
+        :param jitter: whether to randomise delays ("full jitter")
+        :type jitter: bool
+        :param statuses: response statuses that are retried
+        :type statuses: iterable
+        :param methods: lower case http methods that are safe to replay
+        :type methods: iterable
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+        self.retries = 0
+        self.gave_up = 0
+        self._lock = threading.Lock()
+
+    def should_retry(self, method, attempt, status=None, error=None, connect_error=None):
+        """Whether a failed request should be retried
+
+        :param method: the lower case http method of the request
+        :type method: str
+        :param attempt: the number of retries made so far
+        :type attempt: int
+        :param status: the response status, ``None`` when ``error`` is set
+        :type status: int or None
+        :param error: the connection error raised by the request
+        :type error: Exception or None
+        :param connect_error: whether ``error`` happened before the request
+            was sent, worked out for :mod:`requests` errors when ``None``
+        :type connect_error: bool or None
+        :rtype: bool
+        """
+        if error is None and status not in self.statuses:
+            return False
+        if method in self.methods:
+            retry = True
+        elif error is not None:
+            if connect_error is None:
+                connect_error = is_connect_error(error)
+            retry = connect_error
+        else:
+            retry = status == 429
+        if not retry:
+            return False
+        with self._lock:
+            if attempt >= self.max_retries:
+                self.gave_up += 1
+                return False
+            self.retries += 1
+        return True
+
+    def delay(self, attempt, retry_after=None):
+        """The number of seconds to wait before the next retry
+
+        :param attempt: the number of retries made so far
+        :type attempt: int
+        :param retry_after: the ``Retry-After`` header of the response
+        :type retry_after: str or None
+        :rtype: float
+        """
+        wait = parse_retry_after(retry_after)
+        if wait is not None:
+            return min(wait, self.max_backoff)
+        wait = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        return wait
+
+    def stats(self):
+        """Get the retry counters
+
+        :returns: ``retries`` (requests retried) and ``gave_up`` (requests
+            that still failed after ``max_retries``)
+        :rtype: dict
+        """
+        with self._lock:
+            return {"retries": self.retries, "gave_up": self.gave_up}
+
+
+def send_request(send, method, limiter=None, retry=None, sleep=None, **kwargs):
+    """Send a request, waiting on ``limiter`` and retrying per ``retry``
+
+    When the retries run out the last response is returned, or the last
+    connection error raised.
+
+    :param send: the session method to call e.g. ``session.get``
+    :type send: callable
+    :param method: the lower case http method of ``send``
+    :type method: str
+    :param limiter: rate limiter to wait on before every attempt
+    :type limiter: :class:`shapeways.retry.TokenBucket` or None
+    :param retry: policy deciding which attempts are retried
+    :type retry: :class:`shapeways.retry.RetryPolicy` or None
+    :param sleep: function used to wait between attempts, defaults to
+        :func:`time.sleep`
+    :type sleep: callable or None
+    :param kwargs: arguments for ``send``
+    :returns: the response
+    :rtype: :class:`requests.Response`
+    """
+    if sleep is None:
+        sleep = time.sleep
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = send(**kwargs)
+        except RequestException as error:
+            if retry is None or not retry.should_retry(method, attempt, error=error):
+                raise
+            sleep(retry.delay(attempt))
+        else:
+            if retry is None or not retry.should_retry(
+                    method, attempt, status=response.status_code
+            ):
+                return response
+            response.close()
+            sleep(retry.delay(attempt, response.headers.get("Retry-After")))
+        attempt += 1
+
+
+def is_connect_error(error):
+    """Whether ``error`` happened before the request was sent"""
+    if isinstance(error, ConnectTimeout):
+        return True
+    if isinstance(error, ConnectionError):
+        reason = error.args[0] if error.args else None
+        reason = getattr(reason, "reason", reason)
+        return isinstance(reason, NewConnectionError)
+    return False
@@ -0,0 +1,161 @@
+import re
+
+#: Endpoint path templates of the API, relative to the base url. Templates
+#: ending in ``/`` have the api version appended, parameters are filled in
+#: positionally in the order they appear.
+ENDPOINTS = {
+    "api": "/api/",
+    "request_token": "/oauth1/request_token/",
+    "access_token": "/oauth1/access_token/",
+    "token": "/oauth2/token",
+    "cart": "/orders/cart/",
+    "orders": "/orders/",
+    "order": "/orders/{order_id}/",
+    "materials": "/materials/",
+    "material": "/materials/{material_id}/",
+    "models": "/models/",
+    "model": "/models/{model_id}/",
+    "model_info": "/models/{model_id}/info/",
+    "model_files": "/models/{model_id}/files/",
+    "model_file": "/models/{model_id}/files/{file_version}/",
+    "model_photos": "/models/{model_id}/photos/",
+    "printers": "/printers/",
+    "printer": "/printers/{printer_id}/",
+    "categories": "/categories/",
+    "category": "/categories/{category_id}/",
+    "price": "/price/",
+}
+
+#: Endpoints the OAuth2 api addresses differently
+OAUTH2_ENDPOINTS = dict(
+    ENDPOINTS, models="/model/", model="/model/{model_id}/"
+)
+
+_PARAMETER = re.compile(r"\{(\w+)\}")
+
+
+class Routes(object):
+    """Endpoint urls compiled for one base url and api version
+
+    Every template is turned into a ready ``%`` format string once, so
+    building a url costs a single dict lookup and string format.
+
+    .. code:: python
+
+        routes = Routes("https://api.shapeways.com")
+        routes.url("model_file", 86, 1)
+        # "https://api.shapeways.com/models/86/files/1/v1"
+        routes.path("model_file", 86, 1)
+        # "/models/86/files/1/"
+    """
+    __slots__ = [
+        "base_url", "api_version", "endpoints", "static", "_paths", "_urls", "_patterns",
+    ]
+
+    def __init__(self, base_url, api_version="v1", endpoints=ENDPOINTS):
+        """Constructor for a new :class:`shapeways.routes.Routes`
+
+        :param base_url: the base url of the API e.g.
+            ``https://api.shapeways.com``
+        :type base_url: str
+        :param api_version: the version appended to versioned endpoints
+        :type api_version: str
+        :param endpoints: mapping of endpoint names to path templates
+        :type endpoints: dict
+        """
+        self.base_url = base_url
+        self.api_version = api_version
+        self.endpoints = endpoints
+        #: full urls of the endpoints without parameters, keyed by path
+        self.static = {}
+        self._paths = {}
+        self._urls = {}
+        self._patterns = None
+        prefix = base_url.replace("%", "%%")
+        suffix = api_version.replace("%", "%%")
+        for name, template in endpoints.items():
+            path = _PARAMETER.sub("%s", template.replace("%", "%%"))
+            url = prefix + path
+            if template.endswith("/"):
+                url += suffix
+            self._paths[name] = path
+            self._urls[name] = url
+            if not _PARAMETER.search(template):
+                self.static[template] = url % ()
+
+    def path(self, name, *args):
+        """Build the path of an endpoint
+
+        :param name: the endpoint name e.g. ``model``
+        :type name: str
+        :param args: the endpoint parameters
+        :returns: the path relative to the base url, without the version
+        :rtype: str
+        """
+        return self._paths[name] % args
+
+    def url(self, name, *args):
+        """Build the full url of an endpoint
+
+        :param name: the endpoint name e.g. ``model``
+        :type name: str
+        :param args: the endpoint parameters
+        :returns: the full url
+        :rtype: str
+        """
+        return self._urls[name] % args
+
+    def match(self, url):
+        """Find the endpoint a url or path addresses
+
+        .. code:: python
+
+            routes.match("https://api.shapeways.com/models/86/files/1/v1")
+            # "model_file"
+
+        :param url: a full url of the endpoint, or its path
+        :type url: str
+        :returns: the endpoint name, ``None`` when no endpoint matches
+        :rtype: str or None
+        """
+        resolved = self.resolve(url)
+        return None if resolved is None else resolved[0]
+
+    def resolve(self, url):
+        """Find the endpoint a url or path addresses, and its parameters
+
+        .. code:: python
+
+            routes.resolve("https://api.shapeways.com/models/86/files/1/v1")
+            # ("model_file", {"model_id": "86", "file_version": "1"})
+
+        :param url: a full url of the endpoint, or its path
+        :type url: str
+        :returns: the endpoint name and its parameters by name, ``None``
+            when no endpoint matches
+        :rtype: tuple or None
+        """
+        if self._patterns is None:
+            patterns = []
+            base = "(?:%s)?" % re.escape(self.base_url)
+            version = "(?:%s)?" % re.escape(self.api_version)
+            for name, template in self.endpoints.items():
+                pieces = _PARAMETER.split(template)
+                # the split alternates literal text and parameter names
+                path = "".join(
+                    "(?P<%s>[^/]+)" % piece if index % 2 else re.escape(piece)
+                    for index, piece in enumerate(pieces)
+                )
+                if template.endswith("/"):
+                    path += version
+                # literal endpoints win over parameterised ones, "/orders/cart/"
+                # is not an order
+                patterns.append((len(pieces), re.compile("^%s%s$" % (base, path)), name))
+            patterns.sort(key=lambda pattern: pattern[0])
+            self._patterns = [(pattern, name) for _, pattern, name in patterns]
+        url = url.split("?", 1)[0]
+        for pattern, name in self._patterns:
+            match = pattern.match(url)
+            if match is not None:
+                return name, match.groupdict()
+        return None
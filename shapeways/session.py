@@ -0,0 +1,109 @@
+import threading
+from timeit import default_timer
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_connect_time = threading.local()
+
+
+def reset_connect_time():
+    """Start measuring the time the current thread spends opening connections"""
+    _connect_time.seconds = 0.0
+
+
+def connect_time():
+    """The seconds the current thread spent opening connections (TCP and
+    TLS handshakes) through a :class:`shapeways.session.TimingAdapter` since
+    :func:`shapeways.session.reset_connect_time`
+
+    :rtype: float
+    """
+    return getattr(_connect_time, "seconds", 0.0)
+
+
+def _timed_connect(connect):
+    def timed(self):
+        start = default_timer()
+        try:
+            connect(self)
+        finally:
+            _connect_time.seconds = connect_time() + default_timer() - start
+    return timed
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    connect = _timed_connect(HTTPConnection.connect)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    connect = _timed_connect(HTTPSConnection.connect)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """:class:`requests.adapters.HTTPAdapter` measuring the time spent
+    opening connections, read with :func:`shapeways.session.connect_time`
+
+    Connections reused from the pool cost nothing, so the time is only
+    taken when a new connection is opened.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def create_session(
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False, keep_alive=True
+):
+    """Create a :class:`requests.Session` with a sized connection pool
+
+    The returned session keeps TCP/TLS connections open between calls so
+    consecutive API requests to the same host reuse a single handshake. A
+    session may be shared between several clients and threads.
+
+    .. code:: python
+
+        session = create_session(pool_maxsize=32)
+        client = Client("key", "secret", session=session)
+
+    :param pool_connections: the number of per-host connection pools to cache
+    :type pool_connections: int
+    :param pool_maxsize: the maximum number of connections kept open per host
+    :type pool_maxsize: int
+    :param pool_block: whether to block when all ``pool_maxsize`` connections
+        are in use instead of opening throwaway connections
+    :type pool_block: bool
+    :param keep_alive: whether connections should be kept open between
+        requests, when ``False`` every request sends ``Connection: close``
+    :type keep_alive: bool
+    :returns: a new pooled session
+    :rtype: :class:`requests.Session`
+    """
+    session = requests.Session()
+    adapter = TimingAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
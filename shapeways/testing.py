@@ -0,0 +1,712 @@
+"""Local emulator of the Shapeways API for load and integration tests
+
+:class:`ApiEmulator` is a threaded HTTP server that keeps its data in
+memory and implements the endpoints both clients call: the OAuth v1
+request/access token and OAuth2 token endpoints, models with their files
+and photos, materials, printers, categories, price, the cart and orders.
+Latency, ``5xx`` errors, ``429`` throttling and the size of the payloads
+can be dialled in, and every random choice comes from a seeded generator,
+so throughput, retry and connection pooling behaviour can be measured
+offline and reproducibly.
+
+.. code:: python
+
+    with ApiEmulator(latency=lognormal(0.05, 0.5), throttle_rate=0.01, seed=1) as api:
+        client = Client("key", "secret", "token", "secret", retry=RetryPolicy())
+        client.base_url = api.url
+        client.get_models()
+        print(api.stats())
+
+The emulator can also be run on its own::
+
+    python -m shapeways.testing --port 8080 --latency lognormal:0.05:0.5 --throttle-rate 0.01
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+if sys.version_info[0] >= 3:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlencode, parse_qs, urlsplit
+else:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+    from urlparse import parse_qs, urlsplit
+
+from shapeways.routes import Routes, OAUTH2_ENDPOINTS
+
+
+def constant(seconds):
+    """Latency distribution that always waits ``seconds``"""
+    return lambda generator: seconds
+
+
+def uniform(low, high):
+    """Latency distribution uniform between ``low`` and ``high`` seconds"""
+    return lambda generator: generator.uniform(low, high)
+
+
+def lognormal(median, sigma):
+    """Long tailed latency distribution around ``median`` seconds
+
+    :param median: the median latency in seconds
+    :type median: float
+    :param sigma: the standard deviation of the underlying normal
+        distribution, ``0.5`` puts the 99th percentile at about 3.2 times the
+        median
+    :type sigma: float
+    """
+    mu = math.log(median)
+    return lambda generator: generator.lognormvariate(mu, sigma)
+
+
+def parse_latency(spec):
+    """Parse a latency distribution from the command line
+
+    :param spec: ``constant:S``, ``uniform:LOW:HIGH`` or
+        ``lognormal:MEDIAN:SIGMA``, in seconds
+    :type spec: str
+    :rtype: callable
+    """
+    name, _, arguments = spec.partition(":")
+    distributions = {"constant": constant, "uniform": uniform, "lognormal": lognormal}
+    if name not in distributions:
+        raise ValueError("unknown latency distribution %r" % name)
+    return distributions[name](*[float(value) for value in arguments.split(":") if value])
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if not size:
+                    # trailers
+                    while self.rfile.readline().strip():
+                        pass
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self):
+        body = self._body()
+        status, headers, payload = self.server.emulator.handle(
+            self.command, self.path, self.headers, body
+        )
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+
+class ApiEmulator(object):
+    """In-memory emulator of the Shapeways API
+
+    Requests are served on threads and handled in this order: the latency
+    is waited out, the request is rejected with ``429`` when it exceeds
+    ``rate_limit`` or is picked for ``throttle_rate``, it fails with one of
+    ``error_statuses`` when picked for ``error_rate``, otherwise it is
+    answered from the in-memory store. Credentials are accepted but not
+    checked. GET replies carry an ``ETag`` and ``If-None-Match`` is
+    answered with ``304``.
+    """
+
+    def __init__(
+            self, host="127.0.0.1", port=0, latency=None, error_rate=0.0,
+            error_statuses=(500, 502, 503), throttle_rate=0.0, rate_limit=None,
+            retry_after=1, page_size=50, models=0, padding=0, materials=20,
+            printers=4, categories=8, store_files=True, api_version="v1",
+            seed=None
+    ):
+        """Constructor for a new :class:`shapeways.testing.ApiEmulator`
+
+        :param host: the address to listen on
+        :type host: str
+        :param port: the port to listen on, a free one when ``0``
+        :type port: int
+        :param latency: distribution of the delay added to every request,
+            e.g. :func:`shapeways.testing.lognormal`, none when ``None``
+        :type latency: callable or None
+        :param error_rate: fraction of requests failed with a server error
+        :type error_rate: float
+        :param error_statuses: the statuses injected errors are picked from
+        :type error_statuses: tuple
+        :param throttle_rate: fraction of requests rejected with ``429``
+        :type throttle_rate: float
+        :param rate_limit: requests per second served before replying
+            ``429``, unlimited when ``None``
+        :type rate_limit: float or None
+        :param retry_after: the ``Retry-After`` seconds sent with ``429``
+        :type retry_after: int
+        :param page_size: models per page of the model listing
+        :type page_size: int
+        :param models: number of models created up front
+        :type models: int
+        :param padding: bytes of filler added to the description of every
+            model, to emulate large payloads
+        :type padding: int
+        :param materials: number of materials
+        :type materials: int
+        :param printers: number of printers
+        :type printers: int
+        :param categories: number of categories
+        :type categories: int
+        :param store_files: whether uploaded file data is kept, so it can be
+            fetched with ``get_model_file``
+        :type store_files: bool
+        :param api_version: the api version of the paths
+        :type api_version: str
+        :param seed: seed of the random choices, for reproducible runs
+        :type seed: int or None
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.padding = padding
+        self.store_files = store_files
+        # the oauth2 client creates and reads models under "/model/"
+        self._routes = (
+            Routes("", api_version),
+            Routes("", api_version, dict(
+                (name, OAUTH2_ENDPOINTS[name]) for name in ("models", "model")
+            )),
+        )
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._tokens = rate_limit
+        self._refilled = time.time()
+        self._counters = {}
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._next_id = 1
+        self.models = {}
+        self.cart = []
+        self.orders = {}
+        self.materials = dict(
+            (material_id, self._material(material_id, printers))
+            for material_id in range(1, materials + 1)
+        )
+        self.printers = dict(
+            (printer_id, self._printer(printer_id))
+            for printer_id in range(1, printers + 1)
+        )
+        self.categories = dict(
+            (category_id, {
+                "categoryId": category_id, "title": "Category %d" % category_id,
+                "parentId": 0,
+            }) for category_id in range(1, categories + 1)
+        )
+        for _ in range(models):
+            self._create_model({"fileName": "model.stl", "file": ""})
+
+    @property
+    def url(self):
+        """The base url of the running emulator"""
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        """Start serving on a background thread"""
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.emulator = self
+        # a short poll interval keeps stop() fast
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self):
+        """Get the request counters
+
+        :returns: ``requests``, counts per ``endpoint`` and ``status``,
+            ``throttled``, ``errors`` and the ``peak_in_flight`` requests
+        :rtype: dict
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            peak = self._peak_in_flight
+        stats = {
+            "requests": counters.pop("requests", 0),
+            "throttled": counters.pop("throttled", 0),
+            "errors": counters.pop("errors", 0),
+            "peak_in_flight": peak,
+            "endpoints": {},
+            "statuses": {},
+        }
+        for (kind, key), count in counters.items():
+            stats[kind][key] = count
+        return stats
+
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    # request handling
+    def handle(self, method, path, headers, body):
+        """Answer a request
+
+        :returns: ``(status, headers, body)``
+        :rtype: tuple
+        """
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            delay = self.latency(self._random) if self.latency is not None else 0
+            throttled = self._throttled()
+            failed = not throttled and self._random.random() < self.error_rate
+            error_status = self._random.choice(self.error_statuses) if failed else None
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            status, reply_headers, payload = self._dispatch(
+                method, path, headers, body, throttled, error_status
+            )
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        self._count("requests", ("statuses", status))
+        return status, reply_headers, payload
+
+    def _throttled(self):
+        """Whether to reject the request with ``429``, the lock is held"""
+        if self.rate_limit is not None:
+            now = time.time()
+            self._tokens = min(
+                self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+        return self.throttle_rate > 0 and self._random.random() < self.throttle_rate
+
+    def _dispatch(self, method, path, headers, body, throttled, error_status):
+        parts = urlsplit(path)
+        for routes in self._routes:
+            resolved = routes.resolve(parts.path) or routes.resolve(parts.path.rstrip("/"))
+            if resolved is not None:
+                break
+        else:
+            return self._json(404, {"result": "failure", "reason": "no such endpoint"})
+        endpoint, arguments = resolved
+        self._count(("endpoints", endpoint))
+        if throttled:
+            self._count("throttled")
+            return self._json(
+                429, {"result": "failure", "reason": "rate limit exceeded"},
+                [("Retry-After", str(self.retry_after))]
+            )
+        if error_status is not None:
+            self._count("errors")
+            return self._json(error_status, {"result": "failure", "reason": "injected error"})
+
+        handler = getattr(self, "_%s_%s" % (method.lower(), endpoint), None)
+        if handler is None:
+            return self._json(405, {"result": "failure", "reason": "method not allowed"})
+        arguments = dict((name, _number(value)) for name, value in arguments.items())
+        query = dict((key, values[-1]) for key, values in parse_qs(parts.query).items())
+        try:
+            params = _params(headers, body)
+        except ValueError:
+            return self._json(400, {"result": "failure", "reason": "invalid body"})
+        with self._lock:
+            reply = handler(params=params, query=query, **arguments)
+        if isinstance(reply, tuple):
+            return reply
+        status = 404 if reply.get("result") == "failure" else 200
+        response = self._json(status, reply)
+        if method == "GET" and status == 200:
+            etag = '"%s"' % hashlib.md5(response[2]).hexdigest()
+            if headers.get("If-None-Match") == etag:
+                return 304, [("ETag", etag)], b""
+            response[1].append(("ETag", etag))
+        return response
+
+    @staticmethod
+    def _json(status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        return status, [("Content-Type", "application/json")] + (headers or []), body
+
+    @staticmethod
+    def _form(values):
+        body = urlencode(values).encode("utf-8")
+        return 200, [("Content-Type", "application/x-www-form-urlencoded")], body
+
+    # data
+    def _id(self):
+        value = self._next_id
+        self._next_id += 1
+        return value
+
+    def _material(self, material_id, printers):
+        return {
+            "materialId": material_id,
+            "title": "Material %d" % material_id,
+            "supportsColorFiles": int(material_id % 3 == 0),
+            "printerId": (material_id - 1) % max(printers, 1) + 1,
+            "swatch": "https://static.shapeways.com/swatch/%d.jpg" % material_id,
+            "restrictions": {"minWallThickness": 0.7, "minBoundingBox": 0.6},
+        }
+
+    def _printer(self, printer_id):
+        return {
+            "printerId": printer_id,
+            "title": "Printer %d" % printer_id,
+            "volumeMin": 0.0, "volumeMax": 0.01,
+            "xBoundMin": 0.0, "xBoundMax": 0.3,
+            "yBoundMin": 0.0, "yBoundMax": 0.3,
+            "zBoundMin": 0.0, "zBoundMax": 0.3,
+            "materials": dict(
+                (str(material_id), {"materialId": material_id})
+                for material_id, material in self.materials.items()
+                if material["printerId"] == printer_id
+            ),
+        }
+
+    def _create_model(self, params):
+        model_id = self._id()
+        data = params.get("file") or ""
+        model = {
+            "modelId": model_id,
+            "modelVersion": 1,
+            "title": params.get("title", "Model %d" % model_id),
+            "fileName": params.get("fileName", "model.stl"),
+            "description": params.get("description", "") + "x" * self.padding,
+            "uploadScale": params.get("uploadScale", 1.0),
+            "isPublic": params.get("isPublic", False),
+            "isForSale": params.get("isForSale", False),
+            "isDownloadable": params.get("isDownloadable", False),
+            "printable": True,
+            "tags": params.get("tags", []),
+            "categories": params.get("categories", []),
+            "defaultMaterialId": params.get("defaultMaterialId"),
+            "materials": dict(
+                (str(material_id), {
+                    "materialId": material_id, "isActive": True, "markup": 0.0,
+                    "price": round(10 + material_id * 1.5, 2),
+                }) for material_id in self.materials
+            ),
+            "urls": {
+                "publicProductUrl": {
+                    "address": "https://www.shapeways.com/product/%d" % model_id,
+                },
+            },
+        }
+        model.update(self._file_info(params, data))
+        self.models[model_id] = {"model": model, "files": {}, "photos": []}
+        self._add_file(model_id, params, data)
+        return model
+
+    @staticmethod
+    def _file_info(params, data):
+        try:
+            contents = base64.b64decode(data)
+        except (binascii.Error, TypeError):
+            contents = data.encode("utf-8")
+        return {
+            "contentLength": len(contents),
+            "fileMd5Checksum": hashlib.md5(contents).hexdigest(),
+        }
+
+    def _add_file(self, model_id, params, data):
+        entry = self.models[model_id]
+        version = len(entry["files"]) + 1
+        info = dict(
+            self._file_info(params, data), modelId=model_id,
+            fileVersion=version, fileName=params.get("fileName", "model.stl"),
+            uploadScale=params.get("uploadScale", 1.0),
+        )
+        entry["files"][version] = (info, data if self.store_files else "")
+        entry["model"]["modelVersion"] = version
+        entry["model"].update(self._file_info(params, data))
+        return info
+
+    def _model(self, model_id):
+        entry = self.models.get(model_id)
+        return None if entry is None else entry["model"]
+
+    # endpoints, called with the lock held
+    def _get_api(self, params, query):
+        return {"result": "success", "rateLimit": {"limit": self.rate_limit}}
+
+    def _post_request_token(self, params, query):
+        return self._form({
+            "oauth_token": "request-token",
+            "oauth_token_secret": "request-secret",
+            "authentication_url": "http://%s:%d/login?oauth_token=request-token"
+                                  % self._server.server_address[:2],
+        })
+
+    def _post_access_token(self, params, query):
+        return self._form({
+            "oauth_token": "access-token", "oauth_token_secret": "access-secret",
+        })
+
+    def _post_token(self, params, query):
+        return {"access_token": "emulated-token", "token_type": "bearer", "expires_in": 3600}
+
+    def _get_models(self, params, query):
+        page = max(int(query.get("page", 1)), 1)
+        ids = sorted(self.models)[(page - 1) * self.page_size:page * self.page_size]
+        return {"result": "success", "models": [self._model(model_id) for model_id in ids]}
+
+    def _post_models(self, params, query):
+        missing = [name for name in ("file", "fileName") if name not in params]
+        if missing:
+            return self._json(400, {"result": "failure", "reason": "missing %s" % missing})
+        return dict(self._create_model(params), result="success")
+
+    def _get_model(self, params, query, model_id):
+        model = self._model(model_id)
+        if model is None:
+            return {"result": "failure", "reason": "no such model"}
+        return dict(model, result="success")
+
+    _get_model_info = _get_model
+
+    def _delete_model(self, params, query, model_id):
+        if self.models.pop(model_id, None) is None:
+            return {"result": "failure", "reason": "no such model"}
+        return {"result": "success"}
+
+    def _put_model_info(self, params, query, model_id):
+        model = self._model(model_id)
+        if model is None:
+            return {"result": "failure", "reason": "no such model"}
+        model.update(params)
+        return dict(model, result="success")
+
+    def _get_model_file(self, params, query, model_id, file_version):
+        entry = self.models.get(model_id)
+        if entry is None or file_version not in entry["files"]:
+            return {"result": "failure", "reason": "no such file"}
+        info, data = entry["files"][file_version]
+        reply = dict(info, result="success")
+        if query.get("file") == "1":
+            reply["file"] = data
+        return reply
+
+    def _post_model_files(self, params, query, model_id):
+        if model_id not in self.models:
+            return {"result": "failure", "reason": "no such model"}
+        return dict(self._add_file(model_id, params, params.get("file") or ""), result="success")
+
+    def _post_model_photos(self, params, query, model_id):
+        entry = self.models.get(model_id)
+        if entry is None:
+            return {"result": "failure", "reason": "no such model"}
+        photo = {
+            "photoId": self._id(), "title": params.get("title", ""),
+            "description": params.get("description", ""),
+        }
+        entry["photos"].append(photo)
+        return dict(photo, result="success")
+
+    def _get_materials(self, params, query):
+        return {"result": "success", "materials": dict(
+            (str(material_id), material) for material_id, material in self.materials.items()
+        )}
+
+    def _get_material(self, params, query, material_id):
+        material = self.materials.get(material_id)
+        if material is None:
+            return {"result": "failure", "reason": "no such material"}
+        return dict(material, result="success")
+
+    def _get_printers(self, params, query):
+        return {"result": "success", "printers": dict(
+            (str(printer_id), printer) for printer_id, printer in self.printers.items()
+        )}
+
+    def _get_printer(self, params, query, printer_id):
+        printer = self.printers.get(printer_id)
+        if printer is None:
+            return {"result": "failure", "reason": "no such printer"}
+        return dict(printer, result="success")
+
+    def _get_categories(self, params, query):
+        return {"result": "success", "categories": dict(
+            (str(category_id), category) for category_id, category in self.categories.items()
+        )}
+
+    def _get_category(self, params, query, category_id):
+        category = self.categories.get(category_id)
+        if category is None:
+            return {"result": "failure", "reason": "no such category"}
+        return dict(category, result="success")
+
+    def _post_price(self, params, query):
+        volume = float(params.get("volume") or 0)
+        area = float(params.get("area") or 0)
+        materials = params.get("materials") or list(self.materials)
+        return {"result": "success", "prices": dict(
+            (str(material_id), {
+                "materialId": material_id, "currency": "USD",
+                "price": round(1.5 + volume * 1e6 * 0.28 + area * 1e4 * 0.02 + material_id * 0.1, 2),
+            }) for material_id in materials
+        )}
+
+    def _get_cart(self, params, query):
+        subtotal = sum(item["price"] * item["quantity"] for item in self.cart)
+        return {
+            "result": "success", "items": list(self.cart),
+            "numItems": sum(item["quantity"] for item in self.cart),
+            "subtotal": round(subtotal, 2), "currency": "USD",
+        }
+
+    def _post_cart(self, params, query):
+        model = self._model(_number(params.get("modelId")))
+        if model is None:
+            return {"result": "failure", "reason": "no such model"}
+        material_id = _number(params.get("materialId") or model.get("defaultMaterialId") or 1)
+        self.cart.append({
+            "modelId": model["modelId"], "materialId": material_id,
+            "quantity": int(params.get("quantity", 1)),
+            "price": model["materials"].get(str(material_id), {}).get("price", 10.0),
+        })
+        return {"result": "success"}
+
+    def _get_orders(self, params, query):
+        return {"result": "success", "orders": [
+            self.orders[order_id] for order_id in sorted(self.orders)
+        ]}
+
+    def _post_orders(self, params, query):
+        items = params.get("items") or [
+            {"modelId": item["modelId"], "materialId": item["materialId"],
+             "quantity": item["quantity"]} for item in self.cart
+        ]
+        if not items:
+            return self._json(400, {"result": "failure", "reason": "no items"})
+        order_id = self._id()
+        self.orders[order_id] = {
+            "orderId": order_id, "status": "placed", "items": items,
+            "shippingOption": params.get("shippingOption", "Cheapest"),
+            "createdAt": time.time(),
+        }
+        self.cart = []
+        return {"result": "success", "orderId": order_id}
+
+    def _get_order(self, params, query, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            return {"result": "failure", "reason": "no such order"}
+        return dict(order, result="success")
+
+    def _put_order(self, params, query, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            return {"result": "failure", "reason": "no such order"}
+        if "status" in params:
+            order["status"] = params["status"]
+        return dict(order, result="success")
+
+
+def _number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _params(headers, body):
+    """Decode a JSON or form request body"""
+    if not body:
+        return {}
+    if "form-urlencoded" in (headers.get("Content-Type") or ""):
+        return dict(
+            (key, values[-1]) for key, values in parse_qs(body.decode("utf-8")).items()
+        )
+    params = json.loads(body.decode("utf-8"))
+    if not isinstance(params, dict):
+        raise ValueError("expected a JSON object")
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Shapeways API emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=parse_latency,
+                        help="constant:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, help="requests per second")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--models", type=int, default=0, help="models created up front")
+    parser.add_argument("--padding", type=int, default=0,
+                        help="bytes of filler in every model description")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    emulator = ApiEmulator(
+        host=args.host, port=args.port, latency=args.latency,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit, page_size=args.page_size,
+        models=args.models, padding=args.padding, seed=args.seed
+    ).start()
+    print("Shapeways API emulator listening on %s" % emulator.url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        print(json.dumps(emulator.stats(), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+
+# asyncio tests use async def and don't compile on python 2
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append("test_async_client.py")
@@ -0,0 +1,411 @@
+import asyncio
+import json
+
+import unittest2
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    web = None
+
+from shapeways.async_client import AsyncClient, AsyncShapewaysOauth2Client
+from shapeways.coalesce import RequestCoalescer
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+@unittest2.skipIf(web is None, "aiohttp is not installed")
+class TestAsyncClient(unittest2.TestCase):
+    def setUp(self):
+        self.requests = []
+
+    async def handler(self, request):
+        self.requests.append({
+            "method": request.method,
+            "path": request.path,
+            "query": dict(request.query),
+            "authorization": request.headers.get("Authorization"),
+            "content_length": request.headers.get("Content-Length"),
+            "transfer_encoding": request.headers.get("Transfer-Encoding"),
+            "if_none_match": request.headers.get("If-None-Match"),
+            "body": await request.text(),
+        })
+        if request.path == "/oauth2/token":
+            return web.json_response({"access_token": "TOKEN"})
+        if request.path == "/oauth1/request_token/v1":
+            return web.Response(
+                text="authentication_url=http%3A%2F%2Fexample.org%2Flogin&oauth_token_secret=SECRET"
+            )
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(
+            {"result": "success", "materials": [1], "models": [2]}, headers={"ETag": '"v1"'}
+        )
+
+    async def serve(self, scenario):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            return await scenario(str(server.make_url("")))
+        finally:
+            await server.close()
+
+    def test_client(self):
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", oauth_token="t", oauth_secret="s") as client:
+                client.base_url = base_url
+                models = await client.get_models(page=2)
+                price = await client.get_price({
+                    "volume": 1, "area": 1, "xBoundMin": 0, "xBoundMax": 1,
+                    "yBoundMin": 0, "yBoundMax": 1, "zBoundMin": 0, "zBoundMax": 1,
+                })
+                url = await client.connect()
+            self.assertIsNone(client.session)
+            return models, price, url
+
+        models, price, url = run(self.serve(scenario))
+        self.assertEqual(models["result"], "success")
+        self.assertEqual(price["result"], "success")
+        self.assertEqual(url, "http://example.org/login")
+
+        get, post, connect = self.requests
+        self.assertEqual(get["path"], "/models/v1")
+        self.assertEqual(get["query"], {"page": "2"})
+        self.assertTrue(get["authorization"].startswith("OAuth "))
+        self.assertIn('oauth_token="t"', get["authorization"])
+        self.assertEqual(post["method"], "POST")
+        self.assertEqual(json.loads(post["body"])["volume"], 1)
+        self.assertEqual(connect["path"], "/oauth1/request_token/v1")
+
+    def test_oauth2_client(self):
+        async def scenario(base_url):
+            async with AsyncShapewaysOauth2Client(api_url=base_url.rstrip("/")) as client:
+                self.assertTrue(await client.authenticate("id", "secret"))
+                materials = await client.get_materials()
+                order = await client.cancel_order(5)
+            return materials, order
+
+        materials, order = run(self.serve(scenario))
+        self.assertEqual(materials, [1])
+        self.assertEqual(order["result"], "success")
+        token, get, put = self.requests
+        self.assertTrue(token["authorization"].startswith("Basic "))
+        self.assertEqual(get["authorization"], "Bearer TOKEN")
+        self.assertEqual(put["path"], "/orders/5/v1")
+        self.assertEqual(json.loads(put["body"])["status"], "cancelled")
+
+    def test_requires_async_with(self):
+        client = AsyncClient("key", "secret")
+        with self.assertRaises(TypeError):
+            with client:
+                pass
+
+    def test_map(self):
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret") as client:
+                client.base_url = base_url
+                return [item async for item in client.map("get_model", range(10), concurrency=3)]
+
+        results = run(self.serve(scenario))
+        self.assertEqual(sorted(r.key for r in results), list(range(10)))
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(len(self.requests), 10)
+
+    def test_iter_models(self):
+        pages = {"1": [1, 2], "2": [3]}
+
+        async def handler(request):
+            return web.json_response({"result": "success", "models": pages.get(request.query["page"], [])})
+        self.handler = handler
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret") as client:
+                client.base_url = base_url
+                every = [model async for model in client.iter_models()]
+                limited = [model async for model in client.iter_models(limit=1, prefetch=False)]
+                return every, limited
+
+        self.assertEqual(run(self.serve(scenario)), ([1, 2, 3], [1]))
+
+    def test_add_model_stream(self):
+        import io
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret") as client:
+                client.base_url = base_url
+                return await client.add_model_stream(io.BytesIO(b"solid"), {
+                    "fileName": "a.stl", "hasRightsToModel": True, "acceptTermsAndConditions": True,
+                })
+
+        self.assertEqual(run(self.serve(scenario))["result"], "success")
+        body = json.loads(self.requests[0]["body"])
+        self.assertEqual(body["file"], "c29saWQ=")
+        self.assertEqual(self.requests[0]["content_length"], str(len(self.requests[0]["body"])))
+        self.assertIsNone(self.requests[0]["transfer_encoding"])
+
+    def test_download_model_file(self):
+        import io
+
+        async def handler(request):
+            if request.path != "/models/86/files/2/v1":
+                return web.json_response({"result": "failure"}, status=404)
+            return web.json_response({
+                "result": "success", "fileName": "a.stl", "file": "c29saWQgYQ==",
+            })
+        self.handler = handler
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret") as client:
+                client.base_url = base_url
+                out = io.BytesIO()
+                written = []
+                result = await client.download_model_file(
+                    86, 2, out, progress=written.append, chunk_size=4
+                )
+                with self.assertRaises(ValueError):
+                    await client.download_model_file(87, 2, io.BytesIO())
+                return out.getvalue(), written, result
+
+        data, written, result = run(self.serve(scenario))
+        self.assertEqual(data, b"solid a")
+        self.assertEqual(written[-1], 7)
+        self.assertEqual(result.bytes_written, 7)
+        self.assertEqual(result.info["fileName"], "a.stl")
+        self.assertEqual(result.info["file"], "")
+
+    def test_bulk_upload(self):
+        import os
+        import shutil
+        import tempfile
+        from shapeways.bulk import UploadStats
+
+        directory = tempfile.mkdtemp()
+        for name in ("a.stl", "b.stl"):
+            with open(os.path.join(directory, name), "wb") as data:
+                data.write(b"solid")
+        stats = UploadStats()
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret") as client:
+                client.base_url = base_url
+                return [item async for item in client.bulk_upload(directory, {
+                    "hasRightsToModel": True, "acceptTermsAndConditions": True,
+                }, stats=stats)]
+
+        try:
+            results = run(self.serve(scenario))
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(sorted(os.path.basename(item.source) for item in results), ["a.stl", "b.stl"])
+        self.assertTrue(all(item.ok for item in results))
+        self.assertEqual((stats.files, stats.bytes), (2, 10))
+        self.assertEqual(json.loads(self.requests[0]["body"])["file"], "c29saWQ=")
+
+    def test_upload_model(self):
+        import io
+        from shapeways.dedup import UploadIndex, file_digest
+        uploads = UploadIndex()
+
+        async def scenario(base_url):
+            async with AsyncShapewaysOauth2Client(api_url=base_url, uploads=uploads) as client:
+                client.access_token = "TOKEN"
+                first = await client.upload_model(io.BytesIO(b"solid"))
+                second = await client.upload_model(io.BytesIO(b"solid"))
+                return first, second, client._credentials_key()
+
+        first, second, owner = run(self.serve(scenario))
+        self.assertEqual(first, second)
+        self.assertEqual([request["path"] for request in self.requests], ["/model/v1"])
+        self.assertEqual(len(uploads), 1)
+        self.assertEqual(uploads.lookup(file_digest(io.BytesIO(b"solid")), owner=owner), first)
+
+    def test_journal(self):
+        from shapeways.journal import OperationJournal
+        journal = OperationJournal()
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", journal=journal) as client:
+                client.base_url = base_url
+                first = await client.add_to_cart({"modelId": 1})
+                second = await client.add_to_cart({"modelId": 1})
+                return first, second
+
+        first, second = run(self.serve(scenario))
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(journal.stats()["done"], 1)
+
+    def test_instrumentation(self):
+        from shapeways.instrument import Instrumentation
+        reported = []
+        instrumentation = Instrumentation()
+        instrumentation.add(after=reported.append)
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", instrumentation=instrumentation) as client:
+                client.base_url = base_url
+                await client.get_model_info(86)
+            async with AsyncShapewaysOauth2Client(
+                    api_url=base_url, instrumentation=instrumentation
+            ) as client:
+                client.access_token = "TOKEN"
+                await client.get_materials()
+
+        run(self.serve(scenario))
+        self.assertEqual(
+            [(info.method, info.template, info.status) for info in reported],
+            [("GET", "/models/{model_id}/info/", 200), ("GET", "/materials/", 200)]
+        )
+        for info in reported:
+            self.assertEqual(info.attempts, 1)
+            self.assertGreater(info.bytes_received, 0)
+            self.assertIsNotNone(info.wait)
+            self.assertIsNotNone(info.download)
+        self.assertIsNotNone(reported[1].decode)
+
+    def test_validators(self):
+        from shapeways.cache import ValidatorCache
+        validators = ValidatorCache()
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", validators=validators) as client:
+                client.base_url = base_url
+                infos = [await client.get_model_info(86) for _ in range(2)]
+            async with AsyncShapewaysOauth2Client(
+                    api_url=base_url, validators=validators
+            ) as client:
+                client.access_token = "TOKEN"
+                materials = [await client.get_materials() for _ in range(2)]
+            return infos, materials
+
+        infos, materials = run(self.serve(scenario))
+        self.assertEqual(infos[0], infos[1])
+        self.assertEqual(materials, [[1], [1]])
+        self.assertEqual(
+            [request["if_none_match"] for request in self.requests], [None, '"v1"'] * 2
+        )
+        self.assertEqual((validators.revalidated, validators.modified), (2, 2))
+
+    def test_tokens(self):
+        from shapeways.tokens import TokenManager
+        tokens = TokenManager()
+
+        async def scenario(base_url):
+            for _ in range(2):
+                async with AsyncShapewaysOauth2Client(api_url=base_url, tokens=tokens) as client:
+                    self.assertTrue(await client.authenticate("id", "secret"))
+                    await client.get_materials()
+
+        run(self.serve(scenario))
+        self.assertEqual([request["path"] for request in self.requests],
+                         ["/oauth2/token", "/materials/v1", "/materials/v1"])
+        self.assertEqual(self.requests[-1]["authorization"], "Bearer TOKEN")
+        self.assertEqual(tokens.refreshes, 1)
+
+    def test_coalescer(self):
+        coalescer = RequestCoalescer()
+
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", coalescer=coalescer) as client:
+                client.base_url = base_url
+                infos = await asyncio.gather(*[client.get_model_info(86) for _ in range(5)])
+            async with AsyncShapewaysOauth2Client(api_url=base_url, coalescer=coalescer) as client:
+                client.access_token = "TOKEN"
+                materials = await asyncio.gather(*[client.get_materials() for _ in range(5)])
+            return infos, materials
+
+        infos, materials = run(self.serve(scenario))
+        self.assertEqual(len(set(map(id, infos))), 1)
+        self.assertEqual(materials, [[1]] * 5)
+        self.assertEqual([request["path"] for request in self.requests],
+                         ["/models/86/info/v1", "/materials/v1"])
+        self.assertEqual(coalescer.stats(), {"requests": 2, "collapsed": 8, "in_flight": 0})
+
+    def test_retry(self):
+        from shapeways.retry import RetryPolicy, TokenBucket
+        nonces = []
+
+        async def handler(request):
+            nonces.append(request.headers.get("Authorization"))
+            if len(nonces) == 1:
+                return web.json_response({"result": "failure"}, status=429, headers={"Retry-After": "0"})
+            if len(nonces) == 2:
+                return web.Response(text="Bad Gateway", status=502)
+            return web.json_response({"result": "success"})
+        self.handler = handler
+
+        async def scenario(base_url):
+            limiter = TokenBucket(rate=1000)
+            retry = RetryPolicy(backoff=0.001)
+            async with AsyncClient("key", "secret", limiter=limiter, retry=retry) as client:
+                client.base_url = base_url
+                info = await client.get_api_info()
+            return info, retry.stats()
+
+        info, stats = run(self.serve(scenario))
+        self.assertEqual(info, {"result": "success"})
+        self.assertEqual(stats, {"retries": 2, "gave_up": 0})
+        # every attempt is signed afresh
+        self.assertEqual(len(set(nonces)), 3)
+
+    def test_codec(self):
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", codec="auto") as client:
+                client.base_url = base_url
+                models = await client.get_models()
+                cart = await client.add_to_cart({"modelId": 1})
+            async with AsyncShapewaysOauth2Client(api_url=base_url.rstrip("/"), codec="auto") as client:
+                await client.authenticate("id", "secret")
+                materials = await client.get_materials()
+            return models, cart, materials
+
+        models, cart, materials = run(self.serve(scenario))
+        self.assertEqual(models["models"], [2])
+        self.assertEqual(cart["result"], "success")
+        self.assertEqual(materials, [1])
+        self.assertEqual(json.loads(self.requests[1]["body"]), {"modelId": 1})
+
+    def test_typed(self):
+        async def scenario(base_url):
+            async with AsyncClient("key", "secret", typed=True) as client:
+                client.base_url = base_url
+                models = await client.get_models()
+                every = [model async for model in client.iter_models(limit=1)]
+            async with AsyncShapewaysOauth2Client(api_url=base_url.rstrip("/"), typed=True) as client:
+                await client.authenticate("id", "secret")
+                cart = await client.get_cart()
+            return models, every, cart
+
+        models, every, cart = run(self.serve(scenario))
+        self.assertEqual(models["models"], [2])
+        self.assertEqual(every, [2])
+        self.assertEqual(type(cart).__name__, "Cart")
+        self.assertEqual(cart.result, "success")
+
+
+class TestAsyncRequestCoalescer(unittest2.TestCase):
+    def test_acall(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"result": "success"}
+
+        async def scenario():
+            cancelled = asyncio.ensure_future(coalescer.acall("key", fetch))
+            waiting = [coalescer.acall("key", fetch) for _ in range(4)]
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await asyncio.gather(*waiting)
+
+        results = run(scenario())
+        self.assertEqual(results, [{"result": "success"}] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalescer.stats(), {"requests": 1, "collapsed": 4, "in_flight": 0})
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import mock
+import unittest2
+
+from shapeways.batch import run_batch, BatchResult
+from shapeways.client import Client
+
+
+class TestBatch(unittest2.TestCase):
+    def test_run_batch_bounds_concurrency(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def work(value):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return value * 2
+
+        calls = ((i, work, (i,), {}) for i in range(20))
+        results = list(run_batch(calls, concurrency=3))
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(state["peak"], 3)
+        self.assertEqual(
+            sorted((r.key, r.result) for r in results),
+            [(i, i * 2) for i in range(20)]
+        )
+
+    def test_run_batch_collects_errors(self):
+        def work(value):
+            if value == 2:
+                raise ValueError("bad")
+            return value
+
+        results = dict(
+            (r.key, r) for r in run_batch((i, work, (i,), {}) for i in range(4))
+        )
+        self.assertFalse(results[2].ok)
+        self.assertIsInstance(results[2].error, ValueError)
+        self.assertTrue(results[3].ok)
+        self.assertEqual(results[3], BatchResult(3, 3, None))
+
+    def test_run_batch_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            list(run_batch([], concurrency=0))
+
+    def test_map(self):
+        with mock.patch.object(Client, "_get", side_effect=lambda path: path):
+            client = Client("key", "secret")
+            results = list(client.map("get_model_info", [1, 2, 3]))
+            self.assertEqual(
+                sorted((r.key, r.result) for r in results),
+                [(1, "/models/1/info/"), (2, "/models/2/info/"), (3, "/models/3/info/")]
+            )
+
+    def test_batch(self):
+        with mock.patch.object(Client, "_get", side_effect=lambda path, params=None: path):
+            client = Client("key", "secret")
+            calls = [
+                ("get_material", (6,)),
+                ("get_model_file", (86, 2), {"include_file": True}),
+                ("no_such_method", ()),
+            ]
+            with self.assertRaises(AttributeError):
+                list(client.batch(calls))
+
+            results = dict((r.key[0], r.result) for r in client.batch(calls[:2]))
+            self.assertEqual(results["get_material"], "/materials/6/")
+            self.assertEqual(results["get_model_file"], "/models/86/files/2/")
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import mock
+import unittest2
+
+from shapeways.bulk import (
+    ByteBudget, UploadStats, bulk_upload, directory_sources, encoded_size,
+    held_size, manifest_sources
+)
+from shapeways.client import Client
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+PARAMS = {"hasRightsToModel": True, "acceptTermsAndConditions": True}
+
+
+class TestBulkUpload(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.mkdir(os.path.join(self.directory, "parts"))
+        self.files = {}
+        for index, name in enumerate(["a.stl", "b.STL", "parts/c.obj", "readme.txt"]):
+            path = os.path.join(self.directory, name)
+            with open(path, "wb") as data:
+                data.write(os.urandom(1000 + index))
+            self.files[name] = path
+
+    def test_directory_sources(self):
+        self.assertEqual(
+            list(directory_sources(self.directory)),
+            [self.files["a.stl"], self.files["b.STL"], self.files["parts/c.obj"]]
+        )
+        self.assertEqual(len(list(directory_sources(self.directory, extensions=None))), 4)
+
+    def test_manifest_sources(self):
+        manifest = os.path.join(self.directory, "manifest.jsonl")
+        with open(manifest, "w") as data:
+            data.write(json.dumps({"file": "a.stl", "title": "A"}) + "\n\n")
+            data.write(json.dumps({"file": "parts/c.obj"}) + "\n")
+        self.assertEqual(list(manifest_sources(manifest)), [
+            (self.files["a.stl"], {"title": "A"}),
+            (self.files["parts/c.obj"], {}),
+        ])
+
+    def test_byte_budget(self):
+        budget = ByteBudget(10)
+        budget.acquire(6)
+        acquired = threading.Event()
+
+        def acquire():
+            budget.acquire(6)
+            acquired.set()
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        budget.release(6)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        # larger than the budget once nothing else is held
+        budget.release(6)
+        budget.acquire(50)
+        self.assertEqual(budget.peak, 50)
+        budget.close()
+        with self.assertRaises(RuntimeError):
+            budget.acquire(1)
+
+    def test_bulk_upload(self):
+        uploaded = {}
+
+        def add_model_stream(contents, params):
+            uploaded[params["fileName"]] = dict(params, file=contents.read())
+            if params["fileName"] == "b.STL":
+                return {"result": "failure", "reason": "bad mesh"}
+            return {"result": "success", "modelId": len(uploaded)}
+
+        client = Client("key", "secret")
+        stats = UploadStats()
+        sources = [
+            (self.files["a.stl"], {"title": "A"}),
+            self.files["b.STL"],
+            os.path.join(self.directory, "missing.stl"),
+        ]
+        with mock.patch.object(Client, "add_model_stream", side_effect=add_model_stream):
+            results = dict(
+                (os.path.basename(item.source), item)
+                for item in client.bulk_upload(sources, PARAMS, stats=stats)
+            )
+
+        self.assertTrue(results["a.stl"].ok)
+        self.assertEqual(results["a.stl"].size, 1000)
+        with open(self.files["a.stl"], "rb") as data:
+            contents = data.read()
+        self.assertEqual(results["a.stl"].digest, hashlib.sha256(contents).hexdigest())
+        self.assertEqual(uploaded["a.stl"]["file"], contents)
+        self.assertEqual(uploaded["a.stl"]["title"], "A")
+        self.assertTrue(uploaded["a.stl"]["hasRightsToModel"])
+
+        self.assertFalse(results["b.STL"].ok)
+        self.assertIsNone(results["b.STL"].error)
+        self.assertFalse(results["missing.stl"].ok)
+        self.assertIsInstance(results["missing.stl"].error, OSError)
+
+        self.assertEqual((stats.files, stats.failed, stats.bytes), (1, 2, 1000))
+        self.assertIsNotNone(stats.finished)
+        self.assertGreater(stats.as_dict()["files_per_second"], 0)
+
+    def test_bulk_upload_bounds_memory(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def add_model_stream(contents, params):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return {"result": "success"}
+
+        sources = [self.files["a.stl"]] * 20
+        budget = 2 * held_size(1000)
+        stats = UploadStats()
+        with mock.patch.object(Client, "add_model_stream", side_effect=add_model_stream):
+            results = list(bulk_upload(
+                Client("key", "secret"), sources, PARAMS, concurrency=8,
+                readers=4, max_bytes=budget, stats=stats
+            ))
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(item.ok for item in results))
+        self.assertLessEqual(stats.peak_buffered, budget)
+        self.assertLessEqual(state["peak"], 2)
+        self.assertEqual(stats.encoded_bytes, 20 * encoded_size(1000))
+
+    @unittest2.skipIf(tracemalloc is None, "tracemalloc is not available")
+    def test_bulk_upload_peak_memory(self):
+        size = 512 * 1024
+        for index in range(8):
+            with open(os.path.join(self.directory, "large%d.stl" % index), "wb") as data:
+                data.write(os.urandom(size))
+        sent = []
+
+        def post(url, body=None, headers=None):
+            # encode and send the body like requests would
+            sent.append(sum(len(chunk) for chunk in body))
+            time.sleep(0.01)
+            return {"result": "success"}
+
+        max_bytes = 3 * held_size(size)
+        client = Client("key", "secret")
+        tracemalloc.start()
+        try:
+            with mock.patch.object(Client, "_post", side_effect=post):
+                results = list(client.bulk_upload(
+                    self.directory, PARAMS, concurrency=4, readers=4, max_bytes=max_bytes
+                ))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(sent), 11)
+        self.assertTrue(all(item.ok for item in results))
+        self.assertLessEqual(peak, max_bytes)
+
+    def test_bulk_upload_stops_early(self):
+        with mock.patch.object(Client, "add_model_stream", return_value={"result": "success"}):
+            uploads = bulk_upload(
+                Client("key", "secret"), [self.files["a.stl"]] * 50, PARAMS,
+                max_bytes=1
+            )
+            self.assertTrue(next(uploads).ok)
+            uploads.close()
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            list(bulk_upload(Client("key", "secret"), [], readers=0))
@@ -0,0 +1,221 @@
+import mock
+import requests
+import unittest2
+
+from shapeways.cache import ResponseCache, ValidatorCache, QuoteCache
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+
+class Clock(object):
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockResponse(object):
+    def __init__(self, status_code=200, data=None, headers=None, content=b"{}"):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+        self.content = content
+
+    def json(self):
+        return self.data
+
+
+class TestResponseCache(unittest2.TestCase):
+    def test_ttl(self):
+        clock = Clock()
+        cache = ResponseCache(ttls={"materials": 10}, clock=clock)
+        key = cache.key("materials", "https://api.shapeways.com/materials/v1")
+        self.assertIsNone(cache.get(key))
+        cache.set(key, {"result": "success"})
+        self.assertEqual(cache.get(key), {"result": "success"})
+
+        clock.now += 11
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+        # endpoints without a ttl are never stored
+        key = cache.key("models", "https://api.shapeways.com/models/v1")
+        cache.set(key, {})
+        self.assertEqual(len(cache), 0)
+        self.assertFalse(cache.caches("models"))
+
+    def test_lru(self):
+        cache = ResponseCache(maxsize=2)
+        first, second, third = [cache.key("material", "/materials/%s/" % i) for i in range(3)]
+        cache.set(first, 1)
+        cache.set(second, 2)
+        cache.get(first)
+        cache.set(third, 3)
+        self.assertEqual(cache.get(first), 1)
+        self.assertIsNone(cache.get(second))
+        self.assertEqual(cache.get(third), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_key(self):
+        cache = ResponseCache(ttls={"materials": 10, "cart": 10})
+        self.assertEqual(
+            cache.key("materials", "url", credentials="a"),
+            cache.key("materials", "url", credentials="b"),
+        )
+        self.assertNotEqual(
+            cache.key("cart", "url", credentials="a"),
+            cache.key("cart", "url", credentials="b"),
+        )
+        self.assertEqual(
+            cache.key("cart", "url", {"a": 1, "b": 2}),
+            cache.key("cart", "url", {"b": 2, "a": 1}),
+        )
+
+    def test_invalidate(self):
+        cache = ResponseCache(ttls={"materials": 10, "cart": 10})
+        cache.set(cache.key("materials", "url"), 1)
+        cache.set(cache.key("cart", "url", credentials="a"), 2)
+        cache.set(cache.key("cart", "url", credentials="b"), 3)
+        self.assertEqual(cache.invalidate("cart", credentials="a"), 1)
+        self.assertEqual(cache.invalidate("cart"), 1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.invalidate(), 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_client(self):
+        response = {"result": "success", "materials": []}
+        with mock.patch.object(Client, "_get", return_value=response):
+            cache = ResponseCache()
+            client = Client("key", "secret", cache=cache)
+            self.assertIs(client.get_materials(), response)
+            self.assertIs(client.get_materials(), response)
+            client.get_material(6)
+            client.get_models()
+            client.get_models()
+            self.assertEqual(client._get.call_count, 4)
+            self.assertEqual(cache.stats()["hits"], 1)
+
+            # failures are not cached
+            client._get.return_value = {"result": "failure"}
+            client.get_printers()
+            client.get_printers()
+            self.assertEqual(client._get.call_count, 6)
+
+    def test_oauth2_client(self):
+        response = {"result": "success", "materials": [1]}
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_get", return_value=response):
+            client = ShapewaysOauth2Client(cache=ResponseCache())
+            self.assertEqual(client.get_materials(), [1])
+            self.assertEqual(client.get_materials(), [1])
+            client.get_single_category(3)
+            client.get_single_category(3)
+            self.assertEqual(client._execute_get.call_count, 2)
+
+
+class TestValidatorCache(unittest2.TestCase):
+    def test_store(self):
+        validators = ValidatorCache()
+        key = validators.key("url", {"page": 1}, credentials="a")
+        self.assertEqual(validators.headers(key), {})
+
+        validators.store(key, {"ETag": '"abc"', "Last-Modified": "Tue"}, {"models": []}, 100)
+        self.assertEqual(
+            validators.headers(key),
+            {"If-None-Match": '"abc"', "If-Modified-Since": "Tue"}
+        )
+        self.assertEqual(validators.not_modified(key), {"models": []})
+        self.assertEqual(validators.stats()["revalidated"], 1)
+        self.assertEqual(validators.stats()["bytes_saved"], 100)
+
+        # a response without validators replaces the stored one
+        validators.store(key, {}, {"models": [1]}, 100)
+        self.assertEqual(validators.headers(key), {})
+        self.assertIsNone(validators.not_modified(key))
+
+    def test_maxsize(self):
+        validators = ValidatorCache(maxsize=1)
+        validators.store("a", {"ETag": "1"}, 1, 1)
+        validators.store("b", {"ETag": "2"}, 2, 1)
+        self.assertEqual(len(validators), 1)
+        self.assertEqual(validators.headers("a"), {})
+
+    def test_client(self):
+        validators = ValidatorCache()
+        full = MockResponse(data={"models": [1]}, headers={"ETag": '"v1"'}, content=b"x" * 50)
+        with mock.patch.object(requests.Session, "get", return_value=full):
+            client = Client("key", "secret", validators=validators)
+            self.assertEqual(client.get_models(page=2), {"models": [1]})
+            self.assertEqual(requests.Session.get.call_args[1]["headers"], {})
+
+            requests.Session.get.return_value = MockResponse(status_code=304)
+            self.assertEqual(client.get_models(page=2), {"models": [1]})
+            self.assertEqual(
+                requests.Session.get.call_args[1]["headers"], {"If-None-Match": '"v1"'}
+            )
+            self.assertEqual(validators.stats()["bytes_saved"], 50)
+
+            # other pages are revalidated separately
+            requests.Session.get.return_value = full
+            client.get_models(page=3)
+            self.assertEqual(requests.Session.get.call_args[1]["headers"], {})
+
+    def test_oauth2_client(self):
+        validators = ValidatorCache()
+        full = MockResponse(data={"result": "success", "materials": [1]}, headers={"Last-Modified": "Tue"})
+        with mock.patch.object(requests.Session, "get", return_value=full):
+            client = ShapewaysOauth2Client(validators=validators)
+            client.access_token = "TOKEN"
+            self.assertEqual(client.get_materials(), [1])
+
+            requests.Session.get.return_value = MockResponse(status_code=304)
+            self.assertEqual(client.get_materials(), [1])
+            self.assertEqual(
+                requests.Session.get.call_args[1]["headers"],
+                {"Authorization": "Bearer TOKEN", "If-Modified-Since": "Tue"}
+            )
+
+
+PRICE = {
+    "volume": 2.0, "area": 12.0,
+    "xBoundMin": 0.0, "xBoundMax": 1.0,
+    "yBoundMin": 0.0, "yBoundMax": 1.0,
+    "zBoundMin": 0.0, "zBoundMax": 2.0,
+}
+
+
+class TestQuoteCache(unittest2.TestCase):
+    def test_quote_key(self):
+        quotes = QuoteCache()
+        key = quotes.quote_key(PRICE)
+        self.assertEqual(key, quotes.quote_key(dict(PRICE, volume=2.0000000001)))
+        self.assertNotEqual(key, quotes.quote_key(dict(PRICE, volume=2.001)))
+        self.assertEqual(
+            quotes.quote_key(dict(PRICE, materials=[6, 25])),
+            quotes.quote_key(dict(PRICE, materials=[25, 6])),
+        )
+        self.assertNotEqual(key, quotes.quote_key(dict(PRICE, materials=[6])))
+        self.assertNotEqual(key, quotes.quote_key(dict(PRICE, currency="EUR")))
+
+    def test_ttl(self):
+        clock = Clock()
+        quotes = QuoteCache(ttl=10, clock=clock)
+        key = quotes.quote_key(PRICE)
+        quotes.set(key, {"result": "success"})
+        self.assertIsNotNone(quotes.get(key))
+        clock.now += 11
+        self.assertIsNone(quotes.get(key))
+
+    def test_client(self):
+        with mock.patch.object(Client, "_post", return_value={"result": "success"}):
+            quotes = QuoteCache()
+            client = Client("key", "secret", quotes=quotes)
+            client.get_price(PRICE)
+            client.get_price(dict(PRICE))
+            self.assertEqual(client._post.call_count, 1)
+            self.assertEqual(quotes.stats()["hit_rate"], 0.5)
+
+            client._post.return_value = {"result": "failure"}
+            client.get_price(dict(PRICE, volume=3))
+            client.get_price(dict(PRICE, volume=3))
+            self.assertEqual(client._post.call_count, 3)
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+import mock
+import unittest2
+
+from shapeways.catalog import MaterialCatalog
+from shapeways.client import Client
+from shapeways.results import typed_response
+
+
+def materials():
+    return {
+        "result": "success",
+        "materials": {
+            "6": {"materialId": "6", "title": "White Plastic", "printerId": "1", "price": "10.5"},
+            "25": {"materialId": "25", "title": "Black Plastic", "printerId": "1", "price": "12"},
+            "26": {"materialId": "26", "title": "White Detail", "printerId": "2", "price": "10.5"},
+            "62": {"materialId": "62", "title": "Silver", "printerId": "3", "price": "40"},
+        },
+    }
+
+
+def printers():
+    return {
+        "result": "success",
+        "printers": {
+            "1": {"printerId": "1", "title": "SLS", "materials": {"6": {}, "25": {}}},
+            "3": {"printerId": "3", "title": "Wax", "materials": {"62": {}, "26": {}}},
+        },
+    }
+
+
+class TestMaterialCatalog(unittest2.TestCase):
+    def setUp(self):
+        self.catalog = MaterialCatalog(materials(), printers())
+
+    def titles(self, records):
+        return [record["title"] for record in records]
+
+    def test_lookups(self):
+        self.assertEqual(len(self.catalog), 4)
+        self.assertIn(6, self.catalog)
+        self.assertIn("25", self.catalog)
+        self.assertEqual(self.catalog.get("6")["title"], "White Plastic")
+        self.assertIsNone(self.catalog.get(1000))
+        self.assertEqual(self.catalog.by_name("  silver ")["materialId"], "62")
+        self.assertIsNone(self.catalog.by_name("Gold"))
+        self.assertEqual(self.catalog.printer(3)["title"], "Wax")
+
+    def test_search(self):
+        self.assertEqual(self.titles(self.catalog.search("white")),
+                         ["White Detail", "White Plastic"])
+        self.assertEqual(self.catalog.search("gold"), [])
+
+    def test_for_printer(self):
+        self.assertEqual(self.titles(self.catalog.for_printer(1)),
+                         ["Black Plastic", "White Plastic"])
+        # from both the material and the printer records
+        self.assertEqual(self.titles(self.catalog.for_printer("3")),
+                         ["White Detail", "Silver"])
+        self.assertEqual(self.catalog.for_printer(9), [])
+
+    def test_cost_ranges(self):
+        self.assertEqual(self.titles(self.catalog.under(10.5)),
+                         ["White Plastic", "White Detail"])
+        self.assertEqual(self.titles(self.catalog.between(11, 40)),
+                         ["Black Plastic", "Silver"])
+        self.assertEqual(len(self.catalog.between()), 4)
+        with self.assertRaises(KeyError):
+            self.catalog.under(10, field="setupFee")
+
+    def test_update(self):
+        response = materials()
+        del response["materials"]["62"]
+        response["materials"]["6"]["title"] = "Natural Plastic"
+        response["materials"]["6"]["price"] = "9"
+        response["materials"]["75"] = {"materialId": "75", "title": "Gold", "printerId": "3"}
+        changes = self.catalog.update(response)
+        self.assertEqual(changes, {"added": [75], "updated": [6], "removed": [62]})
+
+        self.assertIsNone(self.catalog.by_name("White Plastic"))
+        self.assertEqual(self.catalog.by_name("natural plastic")["materialId"], "6")
+        self.assertEqual(self.titles(self.catalog.search("white")), ["White Detail"])
+        self.assertEqual(self.titles(self.catalog.under(10)), ["Natural Plastic"])
+        self.assertEqual(self.titles(self.catalog.for_printer(3)), ["White Detail", "Gold"])
+
+        # unchanged listings change nothing
+        self.assertEqual(self.catalog.update(response),
+                         {"added": [], "updated": [], "removed": []})
+
+    def test_merge(self):
+        self.catalog.update([{"materialId": 75, "title": "Gold"}], replace=False)
+        self.assertEqual(len(self.catalog), 5)
+
+    def test_refresh(self):
+        client = Client("key", "secret", typed=True)
+        with mock.patch.object(Client, "get_materials",
+                               return_value=typed_response("materials", materials())), \
+                mock.patch.object(Client, "get_printers", return_value=printers()):
+            catalog = MaterialCatalog.from_client(client)
+        self.assertEqual(catalog.by_name("Silver")["price"], "40")
+        self.assertEqual(len(catalog.for_printer(1)), 2)
+
+        failure = {"result": "failure", "reason": "nope"}
+        with mock.patch.object(Client, "get_materials", return_value=failure):
+            with self.assertRaises(RuntimeError):
+                catalog.refresh(client)
+        self.assertEqual(len(catalog), 4)
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "catalog.json")
+        self.assertIsNone(MaterialCatalog.load(path))
+
+        self.catalog.save(path)
+        self.assertEqual(os.listdir(directory), ["catalog.json"])
+        loaded = MaterialCatalog.load(path)
+        self.assertEqual(loaded.updated, self.catalog.updated)
+        self.assertEqual(self.titles(loaded.for_printer(3)), ["White Detail", "Silver"])
+        self.assertEqual(self.titles(loaded.under(10.5)), ["White Plastic", "White Detail"])
+
+        self.assertIsNone(MaterialCatalog.load(path, max_age=-1))
+        with open(path, "w") as data:
+            data.write("{")
+        self.assertIsNone(MaterialCatalog.load(path))
@@ -31,19 +31,19 @@ class TestClient(unittest2.TestCase):
     def test_connect(self):
         return_value = MockResponse()
         return_value.text = "authentication_url=http%3A%2F%2Fapi.shapeways.com%2Flogin%3Foauth_token=052f70be42a6fe0971d4056eb4492c31115353f3&oauth_token_secret=7e412bef15092d4ed06a529b60d3a8c6925cbcf3&oauth_callback_confirmed=true"
-        with mock.patch.object(requests, "post", return_value=return_value):
+        with mock.patch.object(requests.Session, "post", return_value=return_value):
             client = Client(
                 "key", "secret", callback_url="http://localhost:3000/callback"
             )
             url = client.connect()
-            requests.post.assert_called()
+            requests.Session.post.assert_called()
             self.assertEqual(
                 url, "http://api.shapeways.com/login?oauth_token=052f70be42a6fe0971d4056eb4492c31115353f3"
             )
             self.assertEqual(
                 client.oauth_secret, "7e412bef15092d4ed06a529b60d3a8c6925cbcf3"
             )
-            args = requests.post.call_args[1]
+            args = requests.Session.post.call_args[1]
             self.assertEqual(
                 args["url"], "https://api.shapeways.com/oauth1/request_token/v1"
             )
@@ -105,107 +105,107 @@ class TestClient(unittest2.TestCase):
         return_value = MockResponse()
         return_value.text = "oauth_token=052f70be42a6fe0971d4056eb4492c31115353f3&oauth_token_secret=7e412bef15092d4ed06a529b60d3a8c6925cbcf3"
 
-        with mock.patch.object(requests, "post", return_value=return_value):
+        with mock.patch.object(requests.Session, "post", return_value=return_value):
             client = Client("key", "secret")
             client.oauth_secret = None
             client.verify("TOKEN", "VERIFIER")
-            requests.post.assert_called()
+            requests.Session.post.assert_called()
             self.assertEqual(
                 client.oauth_token, "052f70be42a6fe0971d4056eb4492c31115353f3"
             )
             self.assertEqual(
                 client.oauth_secret, "7e412bef15092d4ed06a529b60d3a8c6925cbcf3"
             )
-            args = requests.post.call_args[1]
+            args = requests.Session.post.call_args[1]
             self.assertEqual(
                 args["url"], "https://api.shapeways.com/oauth1/access_token/v1"
             )
             self.assertIsInstance(args["auth"], OAuth1)
 
     def test_get(self):
-        with mock.patch.object(requests, "get"):
+        with mock.patch.object(requests.Session, "get"):
             client = Client("key", "secret")
             client._get("/api/")
-            requests.get.assert_called()
-            args = requests.get.call_args[1]
+            requests.Session.get.assert_called()
+            args = requests.Session.get.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
 
-            requests.get.reset_mock()
+            requests.Session.get.reset_mock()
 
             client = Client("key", "secret")
             params = {
                 "key": "value",
             }
             client._get("/api/", params=params)
-            requests.get.assert_called()
-            args = requests.get.call_args[1]
+            requests.Session.get.assert_called()
+            args = requests.Session.get.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
 
     def test_delete(self):
-        with mock.patch.object(requests, "delete"):
+        with mock.patch.object(requests.Session, "delete"):
             client = Client("key", "secret")
             client._delete("/api/")
-            requests.delete.assert_called()
-            args = requests.delete.call_args[1]
+            requests.Session.delete.assert_called()
+            args = requests.Session.delete.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
 
-            requests.delete.reset_mock()
+            requests.Session.delete.reset_mock()
 
             client = Client("key", "secret")
             params = {
                 "key": "value",
             }
             client._delete("/api/", params=params)
-            requests.delete.assert_called()
-            args = requests.delete.call_args[1]
+            requests.Session.delete.assert_called()
+            args = requests.Session.delete.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
 
     def test_post(self):
-        with mock.patch.object(requests, "post"):
+        with mock.patch.object(requests.Session, "post"):
             client = Client("key", "secret")
             client._post("/api/")
-            requests.post.assert_called()
-            args = requests.post.call_args[1]
+            requests.Session.post.assert_called()
+            args = requests.Session.post.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
             self.assertEqual(args["data"], None)
 
-            requests.post.reset_mock()
+            requests.Session.post.reset_mock()
 
             client = Client("key", "secret")
             params = {
                 "key": "value",
             }
             client._post("/api/", params=params)
-            requests.post.assert_called()
-            args = requests.post.call_args[1]
+            requests.Session.post.assert_called()
+            args = requests.Session.post.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
             self.assertEqual(args["data"], None)
 
-            requests.post.reset_mock()
+            requests.Session.post.reset_mock()
 
             client = Client("key", "secret")
             body = "nice body"
             client._post("/api/", body=body)
-            requests.post.assert_called()
-            args = requests.post.call_args[1]
+            requests.Session.post.assert_called()
+            args = requests.Session.post.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
             self.assertEqual(args["data"], body)
 
-            requests.post.reset_mock()
+            requests.Session.post.reset_mock()
 
             client = Client("key", "secret")
             params = {
@@ -213,51 +213,51 @@ class TestClient(unittest2.TestCase):
             }
             body = "nice body"
             client._post("/api/", body=body, params=params)
-            requests.post.assert_called()
-            args = requests.post.call_args[1]
+            requests.Session.post.assert_called()
+            args = requests.Session.post.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
             self.assertEqual(args["data"], body)
 
     def test_put(self):
-        with mock.patch.object(requests, "put"):
+        with mock.patch.object(requests.Session, "put"):
             client = Client("key", "secret")
             client._put("/api/")
-            requests.put.assert_called()
-            args = requests.put.call_args[1]
+            requests.Session.put.assert_called()
+            args = requests.Session.put.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
             self.assertEqual(args["data"], None)
 
-            requests.put.reset_mock()
+            requests.Session.put.reset_mock()
 
             client = Client("key", "secret")
             params = {
                 "key": "value",
             }
             client._put("/api/", params=params)
-            requests.put.assert_called()
-            args = requests.put.call_args[1]
+            requests.Session.put.assert_called()
+            args = requests.Session.put.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
             self.assertEqual(args["data"], None)
 
-            requests.put.reset_mock()
+            requests.Session.put.reset_mock()
 
             client = Client("key", "secret")
             body = "nice body"
             client._put("/api/", body=body)
-            requests.put.assert_called()
-            args = requests.put.call_args[1]
+            requests.Session.put.assert_called()
+            args = requests.Session.put.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], None)
             self.assertEqual(args["data"], body)
 
-            requests.put.reset_mock()
+            requests.Session.put.reset_mock()
 
             client = Client("key", "secret")
             params = {
@@ -265,9 +265,37 @@ class TestClient(unittest2.TestCase):
             }
             body = "nice body"
             client._put("/api/", body=body, params=params)
-            requests.put.assert_called()
-            args = requests.put.call_args[1]
+            requests.Session.put.assert_called()
+            args = requests.Session.put.call_args[1]
             self.assertEqual(args["url"], "https://api.shapeways.com/api/v1")
             self.assertIsInstance(args["auth"], OAuth1)
             self.assertEqual(args["params"], params)
             self.assertEqual(args["data"], body)
+
+    def test_session(self):
+        client = Client("key", "secret", pool_connections=2, pool_maxsize=4)
+        self.assertIsInstance(client.session, requests.Session)
+        adapter = client.session.get_adapter("https://api.shapeways.com")
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(client.session.headers["Connection"], "keep-alive")
+
+        client = Client("key", "secret", keep_alive=False)
+        self.assertEqual(client.session.headers["Connection"], "close")
+
+        session = requests.Session()
+        client = Client("key", "secret", session=session)
+        self.assertIs(client.session, session)
+
+    def test_close(self):
+        with mock.patch.object(requests.Session, "close"):
+            with Client("key", "secret") as client:
+                pass
+            requests.Session.close.assert_called_once_with()
+
+            requests.Session.close.reset_mock()
+
+            # shared sessions are left open
+            with Client("key", "secret", session=requests.Session()) as client:
+                pass
+            requests.Session.close.assert_not_called()
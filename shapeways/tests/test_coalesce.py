@@ -0,0 +1,116 @@
+import threading
+
+import unittest2
+
+from shapeways.client import Client
+from shapeways.coalesce import RequestCoalescer
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.testing import ApiEmulator, constant
+
+
+class TestRequestCoalescer(unittest2.TestCase):
+    def setUp(self):
+        self.results = []
+        self.errors = []
+
+    def concurrently(self, count, target):
+        results, errors = self.results, self.errors
+
+        def call():
+            try:
+                results.append(target())
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def test_key(self):
+        key = RequestCoalescer.key
+        self.assertEqual(key("u", {"b": 1, "a": 2}, "c"), key("u", {"a": 2, "b": 1}, "c"))
+        self.assertNotEqual(key("u", None, "c"), key("u", None, "d"))
+        self.assertNotEqual(key("u", {"page": 1}), key("u", {"page": 2}))
+        self.assertEqual(key("u", {}), key("u"))
+
+    def test_call(self):
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"result": "success"}
+
+        first = self.concurrently(1, lambda: coalescer.call("key", fetch))
+        while not coalescer.stats()["in_flight"]:
+            pass
+        followers = self.concurrently(7, lambda: coalescer.call("key", fetch))
+        while coalescer.collapsed < 7:
+            pass
+        release.set()
+        for thread in first + followers:
+            thread.join()
+        self.assertEqual(self.results, [{"result": "success"}] * 8)
+        self.assertEqual(self.errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalescer.stats(), {"requests": 1, "collapsed": 7, "in_flight": 0})
+        # nothing is kept once the request returned
+        self.assertEqual(coalescer.call("key", lambda: "again"), "again")
+
+    def test_call_error(self):
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+
+        def fetch():
+            release.wait(5)
+            raise RuntimeError("Call threw status 500")
+
+        first = self.concurrently(1, lambda: coalescer.call("key", fetch))
+        while not coalescer.stats()["in_flight"]:
+            pass
+        followers = self.concurrently(3, lambda: coalescer.call("key", fetch))
+        while coalescer.collapsed < 3:
+            pass
+        release.set()
+        for thread in first + followers:
+            thread.join()
+        self.assertEqual(len(self.errors), 4)
+        self.assertEqual(coalescer.stats()["in_flight"], 0)
+
+
+class TestClients(unittest2.TestCase):
+    def setUp(self):
+        self.emulator = ApiEmulator(latency=constant(0.2)).start()
+        self.addCleanup(self.emulator.stop)
+
+    def concurrently(self, count, target):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_client(self):
+        coalescer = RequestCoalescer()
+        client = Client(
+            "key", "secret", oauth_token="token", oauth_secret="secret", coalescer=coalescer
+        )
+        client.base_url = self.emulator.url
+        self.addCleanup(client.close)
+        self.concurrently(10, client.get_materials)
+        stats = coalescer.stats()
+        self.assertEqual(stats["requests"] + stats["collapsed"], 10)
+        self.assertGreater(stats["collapsed"], 0)
+        self.assertEqual(self.emulator.stats()["endpoints"]["materials"], stats["requests"])
+
+    def test_oauth2_client(self):
+        coalescer = RequestCoalescer()
+        client = ShapewaysOauth2Client(api_url=self.emulator.url, coalescer=coalescer)
+        self.addCleanup(client.close)
+        client.access_token = "TOKEN"
+        self.concurrently(10, client.get_materials)
+        stats = coalescer.stats()
+        self.assertEqual(stats["requests"] + stats["collapsed"], 10)
+        self.assertGreater(stats["collapsed"], 0)
@@ -0,0 +1,88 @@
+import json
+
+import mock
+import requests
+import unittest2
+
+from shapeways import codec
+from shapeways.client import Client
+from shapeways.codec import JsonCodec, available_codecs, get_codec
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+
+class MockResponse(object):
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        raise AssertionError("codec should decode the raw body")
+
+
+DOCUMENT = {
+    "result": "success",
+    "models": [{"modelId": i, "title": u"Cube \u00e9 %d" % i, "price": 1.5} for i in range(3)],
+    "nested": {"empty": [], "flag": True, "none": None},
+}
+
+
+class TestCodec(unittest2.TestCase):
+    def test_available(self):
+        names = available_codecs()
+        self.assertEqual(names[-1], "json")
+        self.assertEqual(get_codec("auto").name, names[0])
+
+    def test_get_codec(self):
+        self.assertIsInstance(get_codec("json"), JsonCodec)
+        instance = JsonCodec()
+        self.assertIs(get_codec(instance), instance)
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+    def test_missing_library(self):
+        with mock.patch.object(codec, "ujson", None), \
+                mock.patch.object(codec, "CODECS", (("ujson", codec.UjsonCodec, None),)):
+            with self.assertRaises(ImportError):
+                get_codec("ujson")
+
+    def test_round_trip(self):
+        for name in available_codecs():
+            instance = get_codec(name)
+            encoded = instance.dumps(DOCUMENT)
+            self.assertIsInstance(encoded, bytes, name)
+            self.assertEqual(json.loads(encoded.decode("utf-8")), DOCUMENT, name)
+            self.assertEqual(instance.loads(encoded), DOCUMENT, name)
+            self.assertEqual(instance.loads(encoded.decode("utf-8")), DOCUMENT, name)
+            with self.assertRaises(ValueError):
+                instance.loads(b"<html>")
+
+
+class TestClientCodec(unittest2.TestCase):
+    def test_default_is_stdlib(self):
+        client = Client("key", "secret")
+        self.assertIsNone(client.codec)
+        self.assertEqual(client._dumps({"a": 1}), json.dumps({"a": 1}))
+
+    def test_client(self):
+        response = MockResponse(b'{"result": "success"}')
+        with mock.patch.object(requests.Session, "post", return_value=response):
+            client = Client("key", "secret", codec="json")
+            result = client.add_to_cart({"modelId": 1})
+            self.assertEqual(result, {"result": "success"})
+            body = requests.Session.post.call_args[1]["data"]
+            self.assertEqual(body, b'{"modelId":1}')
+
+    def test_client_error_page(self):
+        with mock.patch.object(requests.Session, "get", return_value=MockResponse(b"<html>", 502)):
+            client = Client("key", "secret", codec="auto")
+            self.assertEqual(client.get_cart(), {"result": "failure", "reason": "HTTP 502"})
+
+    def test_oauth2_client(self):
+        response = MockResponse(b'{"result": "success"}')
+        with mock.patch.object(requests.Session, "put", return_value=response):
+            client = ShapewaysOauth2Client(codec="json")
+            client.access_token = "TOKEN"
+            self.assertEqual(client.cancel_order(5), {"result": "success"})
+            body = requests.Session.put.call_args[1]["data"]
+            self.assertEqual(json.loads(body.decode("utf-8")), {"orderId": 5, "status": "cancelled"})
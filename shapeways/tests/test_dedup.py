@@ -0,0 +1,145 @@
+import base64
+import io
+import os
+import tempfile
+
+import mock
+import unittest2
+
+from shapeways.client import Client
+from shapeways.dedup import UploadIndex, file_digest, base64_digest
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+DATA = os.urandom(5000)
+PARAMS = {
+    "fileName": "a.stl",
+    "hasRightsToModel": True,
+    "acceptTermsAndConditions": True,
+}
+
+
+class TestUploadIndex(unittest2.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_digests(self):
+        source = io.BytesIO(DATA)
+        digest = file_digest(source, chunk_size=7)
+        self.assertEqual(source.tell(), 0)
+        self.assertEqual(digest, base64_digest(base64.b64encode(DATA), chunk_size=9))
+        self.assertEqual(digest, base64_digest(base64.b64encode(DATA).decode("ascii")))
+        # not base64, hashed as is
+        self.assertEqual(base64_digest("<FILE DATA>"), base64_digest("<FILE DATA>"))
+
+    def test_record(self):
+        index = UploadIndex(self.path)
+        self.assertIsNone(index.lookup("abc"))
+        index.record("abc", {"result": "success", "modelId": 5, "modelVersion": 1})
+        self.assertEqual(index.lookup("abc")["modelId"], 5)
+        self.assertIsNone(index.lookup("abc", scale=0.001))
+        self.assertIsNone(index.lookup("abc", target=5))
+        self.assertEqual(index.stats(), {"hits": 1, "misses": 3, "size": 1})
+        index.close()
+
+        # persisted
+        index = UploadIndex(self.path)
+        self.assertEqual(index.lookup("abc")["modelId"], 5)
+        self.assertEqual(index.forget(5), 1)
+        self.assertEqual(len(index), 0)
+
+    def test_prune(self):
+        index = UploadIndex()
+        for i in range(5):
+            index.record(str(i), {"modelId": i})
+        self.assertEqual(index.prune(max_entries=3), 2)
+        self.assertEqual(index.prune(max_age=3600), 0)
+        self.assertEqual(index.prune(max_age=-1), 3)
+
+    def test_upload(self):
+        index = UploadIndex(verify=True)
+        upload = mock.Mock(return_value={"result": "success", "modelId": 1})
+        exists = mock.Mock(return_value=True)
+        index.upload("abc", upload, exists=exists)
+        index.upload("abc", upload, exists=exists)
+        self.assertEqual(upload.call_count, 1)
+        exists.assert_called_once_with(1)
+
+        # the model was deleted, upload again
+        exists.return_value = False
+        index.upload("abc", upload, exists=exists)
+        self.assertEqual(upload.call_count, 2)
+
+        # failures are not recorded
+        upload.return_value = {"result": "failure"}
+        index.upload("def", upload)
+        index.upload("def", upload)
+        self.assertEqual(upload.call_count, 4)
+
+    def test_client(self):
+        response = {"result": "success", "modelId": 7}
+        with mock.patch.object(Client, "_post", return_value=response):
+            client = Client("key", "secret", uploads=UploadIndex())
+            params = dict(PARAMS, file=base64.b64encode(DATA).decode("ascii"))
+            self.assertEqual(client.add_model(params), response)
+            self.assertEqual(client.add_model_stream(io.BytesIO(DATA), PARAMS), response)
+            self.assertEqual(client._post.call_count, 1)
+
+            # a different scale is a different upload
+            client.add_model_stream(io.BytesIO(DATA), dict(PARAMS, uploadScale=0.001))
+            self.assertEqual(client._post.call_count, 2)
+
+            # files are indexed per model
+            client.add_model_file(7, params)
+            client.add_model_file_stream(7, io.BytesIO(DATA), PARAMS)
+            client.add_model_file(8, params)
+            self.assertEqual(client._post.call_count, 4)
+
+    def test_owner(self):
+        response = {"result": "success", "modelId": 7}
+        uploads = UploadIndex(self.path)
+        self.addCleanup(uploads.close)
+        with mock.patch.object(Client, "_post", return_value=response):
+            first = Client("key", "secret", oauth_token="first", uploads=uploads)
+            second = Client("key", "secret", oauth_token="second", uploads=uploads)
+            first.add_model_stream(io.BytesIO(DATA), PARAMS)
+            second.add_model_stream(io.BytesIO(DATA), PARAMS)
+            first.add_model_stream(io.BytesIO(DATA), PARAMS)
+            self.assertEqual(Client._post.call_count, 2)
+        self.assertIsNone(uploads.lookup(file_digest(io.BytesIO(DATA))))
+        self.assertEqual(len(uploads), 2)
+
+    def test_schema_version(self):
+        uploads = UploadIndex(self.path)
+        uploads.record("digest", {"result": "success", "modelId": 7})
+        uploads.close()
+        # reopening keeps the recorded uploads
+        uploads = UploadIndex(self.path)
+        self.assertEqual(len(uploads), 1)
+        uploads._connection.execute("PRAGMA user_version = 0")
+        uploads.close()
+        with self.assertRaises(ValueError):
+            UploadIndex(self.path)
+
+    def test_client_verify(self):
+        response = {"result": "success", "modelId": 7}
+        with mock.patch.object(Client, "_post", return_value=response), \
+                mock.patch.object(Client, "_get", return_value={"result": "failure"}):
+            client = Client("key", "secret", uploads=UploadIndex(verify=True))
+            client.add_model_stream(io.BytesIO(DATA), PARAMS)
+            client.add_model_stream(io.BytesIO(DATA), PARAMS)
+            client._get.assert_called_once_with("/models/7/info/")
+            self.assertEqual(client._post.call_count, 2)
+
+    def test_oauth2_client(self):
+        response = {"result": "success", "modelId": 7}
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_post", return_value=response):
+            client = ShapewaysOauth2Client(uploads=UploadIndex())
+            client.upload_model(io.BytesIO(DATA))
+            client.upload_model(io.BytesIO(DATA))
+            self.assertEqual(client._execute_post.call_count, 1)
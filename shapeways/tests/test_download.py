@@ -0,0 +1,107 @@
+import base64
+import io
+import json
+import os
+import tempfile
+
+import mock
+import requests
+import unittest2
+
+from shapeways.client import Client
+from shapeways.download import Base64FieldDecoder, decode_stream
+
+DATA = bytes(bytearray(range(256))) * 13
+
+
+def document(escape_slashes=False, file_first=False):
+    encoded = base64.b64encode(DATA).decode("ascii")
+    if escape_slashes:
+        encoded = encoded.replace("/", "\\/")
+    fields = [
+        '"result": "success"',
+        '"nested": {"file": "no", "list": [1, {"a": "}"}]}',
+        '"fileName": "a \\" b.stl"',
+    ]
+    file_field = '"file" : "%s"' % encoded
+    if file_first:
+        fields.insert(0, file_field)
+    else:
+        fields.append(file_field)
+    return ("{%s}" % ", ".join(fields)).encode("utf-8")
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestDownload(unittest2.TestCase):
+    def test_decoder(self):
+        for escape_slashes in (False, True):
+            for file_first in (False, True):
+                data = document(escape_slashes, file_first)
+                for size in (1, 2, 3, 5, 7, 64, len(data)):
+                    out = io.BytesIO()
+                    decoder = Base64FieldDecoder(out)
+                    for chunk in chunked(data, size):
+                        decoder.feed(chunk)
+                    info = decoder.close()
+                    self.assertEqual(out.getvalue(), DATA)
+                    self.assertEqual(info["file"], "")
+                    self.assertEqual(info["fileName"], 'a " b.stl')
+                    self.assertEqual(info["nested"]["file"], "no")
+
+    def test_missing_field(self):
+        with self.assertRaises(ValueError):
+            decode_stream([b'{"result": "failure", "reason": "file"}'], io.BytesIO())
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            decode_stream([b'{"file": "AAAA'], io.BytesIO())
+
+    def test_invalid_base64(self):
+        with self.assertRaises(ValueError):
+            decode_stream([b'{"file": "A"}'], io.BytesIO())
+        with self.assertRaises(ValueError):
+            decode_stream([b'{"file": "AA*A"}'], io.BytesIO())
+
+    def test_decode_stream(self):
+        progress = []
+        result = decode_stream(chunked(document(), 100), io.BytesIO(), progress=progress.append)
+        self.assertEqual(result.bytes_written, len(DATA))
+        self.assertEqual(result.info["result"], "success")
+        self.assertEqual(progress[-1], len(DATA))
+        self.assertGreaterEqual(result.throughput, 0)
+
+    def test_client(self):
+        response = mock.Mock(status_code=200)
+        response.iter_content.return_value = chunked(document(), 1000)
+        with mock.patch.object(requests.Session, "get", return_value=response):
+            client = Client("key", "secret")
+            handle, path = tempfile.mkstemp()
+            os.close(handle)
+            try:
+                result = client.download_model_file(86, 2, path)
+                with open(path, "rb") as model:
+                    self.assertEqual(model.read(), DATA)
+            finally:
+                os.remove(path)
+            self.assertEqual(result.info["fileName"], 'a " b.stl')
+            args = requests.Session.get.call_args[1]
+            self.assertEqual(args["url"], "https://api.shapeways.com/models/86/files/2/v1")
+            self.assertEqual(args["params"], {"file": 1})
+            self.assertTrue(args["stream"])
+            response.close.assert_called_once_with()
+
+            response.iter_content.return_value = chunked(document(), 1000)
+            out = io.BytesIO()
+            client.download_model_file(86, 2, out)
+            self.assertEqual(out.getvalue(), DATA)
+
+            # the error page is not decoded
+            response.status_code = 404
+            response.json.return_value = {"result": "failure", "reason": "no such model"}
+            out = io.BytesIO()
+            with self.assertRaises(ValueError):
+                client.download_model_file(86, 2, out)
+            self.assertEqual(out.getvalue(), b"")
@@ -0,0 +1,106 @@
+import os
+import shutil
+import struct
+import tempfile
+
+import unittest2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from shapeways import geometry
+
+# unit cube, outward facing triangles
+CUBE = [
+    ((0, 0, 0), (0, 1, 0), (1, 1, 0)), ((0, 0, 0), (1, 1, 0), (1, 0, 0)),
+    ((0, 0, 1), (1, 0, 1), (1, 1, 1)), ((0, 0, 1), (1, 1, 1), (0, 1, 1)),
+    ((0, 0, 0), (1, 0, 0), (1, 0, 1)), ((0, 0, 0), (1, 0, 1), (0, 0, 1)),
+    ((0, 1, 0), (0, 1, 1), (1, 1, 1)), ((0, 1, 0), (1, 1, 1), (1, 1, 0)),
+    ((0, 0, 0), (0, 0, 1), (0, 1, 1)), ((0, 0, 0), (0, 1, 1), (0, 1, 0)),
+    ((1, 0, 0), (1, 1, 0), (1, 1, 1)), ((1, 0, 0), (1, 1, 1), (1, 0, 1)),
+]
+
+
+@unittest2.skipIf(numpy is None, "numpy is not installed")
+class TestGeometry(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as mesh:
+            mesh.write(data)
+        return path
+
+    def binary_stl(self, triangles):
+        data = b"\0" * 80 + struct.pack("<I", len(triangles))
+        for triangle in triangles:
+            data += struct.pack("<3f", 0, 0, 0)
+            for vertex in triangle:
+                data += struct.pack("<3f", *vertex)
+            data += b"\0\0"
+        return self.write("cube.stl", data)
+
+    def ascii_stl(self, triangles):
+        lines = ["solid cube"]
+        for triangle in triangles:
+            lines.append("facet normal 0 0 0\nouter loop")
+            for vertex in triangle:
+                lines.append("vertex %s %s %s" % vertex)
+            lines.append("endloop\nendfacet")
+        lines.append("endsolid cube")
+        return self.write("ascii.stl", "\n".join(lines).encode("ascii"))
+
+    def assertCube(self, params, size=1.0):
+        self.assertAlmostEqual(params["volume"], size ** 3)
+        self.assertAlmostEqual(params["area"], 6 * size ** 2)
+        for axis in "xyz":
+            self.assertAlmostEqual(params["%sBoundMin" % axis], 0)
+            self.assertAlmostEqual(params["%sBoundMax" % axis], size)
+
+    def test_binary_stl(self):
+        path = self.binary_stl(CUBE)
+        triangles = geometry.read_stl(path)
+        self.assertIsInstance(triangles.base, numpy.memmap)
+        self.assertEqual(triangles.shape, (12, 3, 3))
+        self.assertCube(geometry.mesh_properties(triangles))
+
+    def test_ascii_stl(self):
+        path = self.ascii_stl(CUBE)
+        self.assertCube(geometry.mesh_properties(geometry.read_stl(path)))
+
+    def test_obj(self):
+        path = self.write("cube.obj", b"\n".join([
+            b"# cube",
+            b"v 0 0 0", b"v 1 0 0", b"v 1 1 0", b"v 0 1 0",
+            b"v 0 0 1", b"v 1 0 1", b"v 1 1 1", b"v 0 1 1",
+            b"f 1 4 3 2", b"f 5 6 7 8", b"f 1/1 2/1 6/1 5/1",
+            b"f 4 8 7 3", b"f -8 -4 -1 -5", b"f 2//1 3//1 7//1 6//1",
+        ]))
+        self.assertCube(geometry.price_params(path))
+
+    def test_scale(self):
+        path = self.binary_stl([
+            tuple(tuple(c * 10 for c in vertex) for vertex in triangle) for triangle in CUBE
+        ])
+        self.assertCube(geometry.price_params(path, scale=0.1))
+        self.assertCube(geometry.price_params(path, scale=0.001), size=0.01)
+
+    def test_price_params(self):
+        params = geometry.price_params(self.binary_stl(CUBE), materials=[6])
+        self.assertEqual(params["materials"], [6])
+        self.assertEqual(
+            sorted(params), sorted([
+                "volume", "area", "xBoundMin", "xBoundMax", "yBoundMin",
+                "yBoundMax", "zBoundMin", "zBoundMax", "materials",
+            ])
+        )
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            geometry.mesh_properties(geometry.read_stl(self.binary_stl([])))
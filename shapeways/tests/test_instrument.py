@@ -0,0 +1,167 @@
+import base64
+
+import mock
+import unittest2
+
+from shapeways.client import Client
+from shapeways.instrument import (
+    Instrumentation, OpenTelemetryHooks, PrometheusHooks, RequestInfo
+)
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.retry import RetryPolicy
+from shapeways.testing import ApiEmulator
+
+UPLOAD = {
+    "file": base64.b64encode(b"solid cube").decode("ascii"), "fileName": "cube.stl",
+    "hasRightsToModel": True, "acceptTermsAndConditions": True,
+}
+
+
+class TestInstrumentation(unittest2.TestCase):
+    def setUp(self):
+        self.before = []
+        self.after = []
+        self.instrumentation = Instrumentation()
+        self.instrumentation.add(before=self.before.append, after=self.after.append)
+
+    def start(self, **options):
+        emulator = ApiEmulator(**options).start()
+        self.addCleanup(emulator.stop)
+        return emulator
+
+    def client(self, emulator, **options):
+        client = Client(
+            "key", "secret", oauth_token="token", oauth_secret="secret",
+            instrumentation=self.instrumentation, **options
+        )
+        client.base_url = emulator.url
+        self.addCleanup(client.close)
+        return client
+
+    def test_client(self):
+        emulator = self.start()
+        client = self.client(emulator)
+        client.get_materials()
+        client.add_model(UPLOAD)
+        client.get_material(999)
+
+        self.assertEqual(self.before, self.after)
+        first, upload, missing = self.after
+        self.assertEqual(
+            (first.method, first.endpoint, first.template, first.status),
+            ("GET", "materials", "/materials/", 200)
+        )
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(first.bytes_sent, 0)
+        self.assertGreater(first.bytes_received, 0)
+        self.assertGreater(first.connect, 0)
+        self.assertEqual(sorted(first.timings), ["connect", "decode", "download", "wait"])
+        self.assertGreaterEqual(first.duration, sum(first.timings.values()))
+
+        self.assertEqual((upload.method, upload.template), ("POST", "/models/"))
+        self.assertGreater(upload.bytes_sent, len(UPLOAD["file"]))
+        # the pooled connection is reused
+        self.assertEqual(upload.connect, 0)
+
+        self.assertEqual((missing.template, missing.status), ("/materials/{material_id}/", 404))
+        self.assertIsNone(missing.error)
+
+    def test_retries(self):
+        emulator = self.start(throttle_rate=1.0, retry_after=0)
+        client = self.client(emulator, retry=RetryPolicy(max_retries=2, backoff=0.001))
+        client.get_api_info()
+        info, = self.after
+        self.assertEqual((info.attempts, info.status), (3, 429))
+
+    def test_oauth2_client_error(self):
+        emulator = self.start()
+        client = ShapewaysOauth2Client(api_url=emulator.url, instrumentation=self.instrumentation)
+        self.addCleanup(client.close)
+        client.access_token = "TOKEN"
+        with self.assertRaises(RuntimeError):
+            client.get_single_model(999)
+        info, = self.after
+        self.assertEqual((info.template, info.status), ("/model/{model_id}/", 404))
+        self.assertIsInstance(info.error, RuntimeError)
+        self.assertIsNone(info.decode)
+
+    def test_no_instrumentation(self):
+        emulator = self.start()
+        client = Client("key", "secret", oauth_token="token", oauth_secret="secret")
+        client.base_url = emulator.url
+        self.addCleanup(client.close)
+        with mock.patch.object(Instrumentation, "request") as request:
+            self.assertEqual(client.get_api_info()["result"], "success")
+        self.assertFalse(request.called)
+
+    def test_remove(self):
+        hooks = PrometheusHooks()
+        instrumentation = Instrumentation(hooks)
+        instrumentation.remove(hooks)
+        info = instrumentation.start("get", "https://api.shapeways.com/api/v1")
+        instrumentation.finish(info)
+        self.assertEqual(hooks.requests, {})
+
+
+class TestPrometheusHooks(unittest2.TestCase):
+    def info(self, **values):
+        info = RequestInfo("GET", "https://api.shapeways.com/materials/v1", "materials", "/materials/")
+        for name, value in dict({
+                "status": 200, "attempts": 1, "bytes_sent": 0, "bytes_received": 100,
+                "wait": 0.02, "decode": 0.001, "duration": 0.03,
+        }, **values).items():
+            setattr(info, name, value)
+        return info
+
+    def test_counters_and_histograms(self):
+        hooks = PrometheusHooks(buckets=(0.01, 0.1))
+        hooks.after(self.info())
+        hooks.after(self.info(attempts=2, duration=0.5))
+        hooks.after(self.info(status=None, error=IOError("reset"), bytes_received=None))
+        self.assertEqual(hooks.requests, {
+            ("/materials/", "GET", "200"): 2, ("/materials/", "GET", "error"): 1,
+        })
+        self.assertEqual(hooks.attempts, {("/materials/", "GET"): 4})
+        self.assertEqual(hooks.bytes, {("/materials/", "GET", "received"): 200})
+        total = hooks.seconds[("/materials/", "GET", "total")]
+        self.assertEqual((total.counts, total.count), ([0, 2], 3))
+
+        text = hooks.render()
+        self.assertIn("# TYPE shapeways_requests_total counter", text)
+        self.assertIn(
+            'shapeways_requests_total{endpoint="/materials/",method="GET",status="200"} 2', text
+        )
+        self.assertIn(
+            'shapeways_request_seconds_bucket{endpoint="/materials/",le="0.1",'
+            'method="GET",phase="total"} 2', text
+        )
+        self.assertIn(
+            'shapeways_request_seconds_bucket{endpoint="/materials/",le="+Inf",'
+            'method="GET",phase="total"} 3', text
+        )
+        self.assertIn(
+            'shapeways_request_seconds_count{endpoint="/materials/",method="GET",phase="decode"} 3',
+            text
+        )
+
+
+class TestOpenTelemetryHooks(unittest2.TestCase):
+    def test_span(self):
+        tracer = mock.Mock()
+        hooks = OpenTelemetryHooks(tracer)
+        instrumentation = Instrumentation(hooks)
+        info = instrumentation.start(
+            "get", "https://api.shapeways.com/models/86/info/v1", Client("key", "secret")._routes
+        )
+        span = tracer.start_span.return_value
+        self.assertIs(info.context["span"], span)
+        name = tracer.start_span.call_args[0][0]
+        self.assertEqual(name, "GET /models/{model_id}/info/")
+
+        info.status = 503
+        info.wait = 0.25
+        instrumentation.finish(info)
+        span.set_attribute.assert_any_call("http.response.status_code", 503)
+        span.set_attribute.assert_any_call("shapeways.wait", 0.25)
+        span.set_attribute.assert_any_call("error.type", "503")
+        span.end.assert_called_once_with()
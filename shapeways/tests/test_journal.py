@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import mock
+import unittest2
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+from shapeways.client import Client
+from shapeways.journal import (
+    OperationJournal, idempotency_key, rejected, DONE, FAILED, PENDING, UNKNOWN
+)
+from shapeways.oauth2_client import ShapewaysOauth2Client, StatusError
+
+
+class TestOperationJournal(unittest2.TestCase):
+    def setUp(self):
+        self.journal = OperationJournal()
+
+    def test_idempotency_key(self):
+        self.assertEqual(
+            idempotency_key("add_to_cart", ({"modelId": 1, "quantity": 2},)),
+            idempotency_key("add_to_cart", ({"quantity": 2, "modelId": 1},))
+        )
+        self.assertNotEqual(
+            idempotency_key("add_to_cart", (1,)), idempotency_key("cancel_order", (1,))
+        )
+        self.assertNotEqual(
+            idempotency_key("add_to_cart", (1,), owner=("key", "a")),
+            idempotency_key("add_to_cart", (1,), owner=("key", "b"))
+        )
+        self.assertNotEqual(
+            idempotency_key("add_to_cart", (1,), namespace="run-1"),
+            idempotency_key("add_to_cart", (1,), namespace="run-2")
+        )
+
+    def test_run(self):
+        call = mock.Mock(return_value={"result": "success", "id": 1})
+        self.assertEqual(self.journal.run("cancel_order", call, (5,)), {"result": "success", "id": 1})
+        self.assertEqual(self.journal.run("cancel_order", call, (5,)), {"result": "success", "id": 1})
+        self.assertEqual(call.call_count, 1)
+        self.journal.run("cancel_order", call, (5,), key="again")
+        self.assertEqual(call.call_count, 2)
+
+        entry = self.journal.get(idempotency_key("cancel_order", (5,)))
+        self.assertEqual((entry.method, entry.args, entry.state), ("cancel_order", (5,), DONE))
+        self.assertEqual(self.journal.stats(), {PENDING: 0, DONE: 2, FAILED: 0, UNKNOWN: 0, "replayed": 1})
+
+    def test_failures_are_retried(self):
+        call = mock.Mock(side_effect=[
+            ConnectTimeout("boom"), {"result": "failure"}, {"result": "success"}
+        ])
+        with self.assertRaises(ConnectTimeout):
+            self.journal.run("cancel_order", call, (5,), key="k")
+        entry = self.journal.get("k")
+        self.assertEqual((entry.state, entry.error), (FAILED, "ConnectTimeout: boom"))
+
+        self.assertEqual(self.journal.run("cancel_order", call, (5,), key="k"), {"result": "failure"})
+        self.assertEqual(self.journal.get("k").state, FAILED)
+        self.journal.run("cancel_order", call, (5,), key="k")
+        entry = self.journal.get("k")
+        self.assertEqual((entry.state, entry.attempts), (DONE, 3))
+
+    def test_resume(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "journal.db")
+
+        # a worker that dies while the second call is in flight
+        journal = OperationJournal(path)
+        client = ShapewaysOauth2Client(journal=journal)
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_post",
+                               return_value={"result": "success"}) as post:
+            client.add_to_cart(1, 6, idempotency_key="line-1")
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_post",
+                               side_effect=StatusError(429)):
+            with self.assertRaises(RuntimeError):
+                client.add_to_cart(2, 6, quantity=3, idempotency_key="line-2")
+        journal.begin("cancel_order", (7,), key="line-3")
+        journal.close()
+
+        journal = OperationJournal(path)
+        self.assertEqual([entry.key for entry in journal.incomplete()], ["line-2", "line-3"])
+        self.assertEqual([entry.key for entry in journal.incomplete(include_pending=False)], ["line-2"])
+
+        client = ShapewaysOauth2Client(journal=journal)
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_post",
+                               return_value={"result": "success"}) as post, \
+                mock.patch.object(ShapewaysOauth2Client, "_execute_put",
+                                  return_value={"result": "success"}) as put:
+            results = list(journal.resume(client))
+            # the completed call is not sent again
+            client.add_to_cart(1, 6, idempotency_key="line-1")
+        self.assertEqual([(item.key, item.ok) for item in results], [("line-2", True), ("line-3", True)])
+        self.assertEqual(post.call_count, 1)
+        self.assertIn('"quantity": 3', post.call_args[1]["data"])
+        self.assertEqual(put.call_count, 1)
+        self.assertEqual(journal.incomplete(), [])
+
+    def test_rejected(self):
+        self.assertTrue(rejected(ConnectTimeout("connect")))
+        self.assertTrue(rejected(StatusError(404)))
+        self.assertTrue(rejected(RuntimeError({"result": "failure"})))
+        self.assertFalse(rejected(StatusError(502)))
+        self.assertFalse(rejected(ReadTimeout("read")))
+        self.assertFalse(rejected(RuntimeError("boom")))
+
+    def test_unknown_outcome(self):
+        # the request was sent, but the response never arrived
+        call = mock.Mock(side_effect=[ReadTimeout("read timed out"), {"result": "success"}])
+        with self.assertRaises(ReadTimeout):
+            self.journal.run("cancel_order", call, (5,), key="k")
+        entry = self.journal.get("k")
+        self.assertEqual((entry.state, entry.error), (UNKNOWN, "ReadTimeout: read timed out"))
+        self.assertEqual(self.journal.stats()[UNKNOWN], 1)
+
+        # neither made again nor resumed unless asked for
+        with self.assertRaises(RuntimeError):
+            self.journal.run("cancel_order", call, (5,), key="k")
+        self.assertEqual(self.journal.incomplete(), [])
+        client = ShapewaysOauth2Client(journal=self.journal)
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_put",
+                               return_value={"result": "success"}) as put:
+            self.assertEqual(list(self.journal.resume(client)), [])
+            self.assertEqual(put.call_count, 0)
+            results = list(self.journal.resume(client, include_unknown=True))
+        self.assertEqual([(item.key, item.ok) for item in results], [("k", True)])
+        self.assertEqual(put.call_count, 1)
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(self.journal.get("k").state, DONE)
+
+    def test_file_journal_needs_a_namespace(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "journal.db")
+        call = mock.Mock(return_value={"result": "success"})
+
+        journal = OperationJournal(path)
+        self.addCleanup(journal.close)
+        with self.assertRaises(ValueError):
+            journal.run("cancel_order", call, (5,))
+        journal.run("cancel_order", call, (5,), key="k")
+        self.assertEqual(call.call_count, 1)
+
+        # a restarted run skips what it did, a later run sends again
+        for namespace, calls in (("run-1", 2), ("run-1", 2), ("run-2", 3)):
+            journal = OperationJournal(path, namespace=namespace)
+            self.addCleanup(journal.close)
+            journal.run("cancel_order", call, (5,))
+            self.assertEqual(call.call_count, calls)
+
+    def test_concurrent_begin(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "journal.db")
+        journals = [OperationJournal(path) for _ in range(8)]
+        for journal in journals:
+            self.addCleanup(journal.close)
+        start = threading.Event()
+        begun = []
+        errors = []
+
+        def begin(journal):
+            start.wait()
+            try:
+                begun.append(journal.begin("cancel_order", (5,), key="k"))
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=begin, args=(journal,)) for journal in journals]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        # sent once, the others see it in flight
+        self.assertEqual(begun, [("k", None)])
+        self.assertEqual(len(errors), 7)
+        self.assertTrue(all(type(error) is RuntimeError for error in errors))
+        self.assertEqual(journals[0].get("k").attempts, 1)
+
+    def test_forget_and_prune(self):
+        self.journal.run("cancel_order", lambda: {"result": "success"}, (1,), key="a")
+        self.journal.begin("cancel_order", (2,), key="b")
+        self.assertTrue(self.journal.forget("b"))
+        self.assertFalse(self.journal.forget("b"))
+        self.assertEqual(self.journal.prune(max_age=-1), 1)
+        self.assertEqual(len(self.journal), 0)
+
+    def test_client(self):
+        client = Client("key", "secret", journal=self.journal)
+        with mock.patch.object(Client, "_post", return_value={"result": "success"}) as post, \
+                mock.patch.object(Client, "_put", return_value={"result": "success"}) as put:
+            client.add_to_cart({"modelId": 1})
+            client.add_to_cart({"modelId": 1})
+            client.update_model_info(1, {"title": "Cube"})
+            client.update_model_info(1, {"title": "Cube"}, idempotency_key="rename-2")
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(put.call_count, 2)
+        self.assertEqual(len(self.journal), 3)
+
+        with mock.patch.object(Client, "_post", return_value={"result": "success"}) as post:
+            Client("key", "secret").add_to_cart({"modelId": 1})
+            Client("key", "secret").add_to_cart({"modelId": 1})
+        self.assertEqual(post.call_count, 2)
+
+        # the calls of another account are not suppressed
+        other = Client("key", "secret", oauth_token="other", journal=self.journal)
+        with mock.patch.object(Client, "_post", return_value={"result": "success"}) as post:
+            other.add_to_cart({"modelId": 1})
+        self.assertEqual(post.call_count, 1)
+
+    def test_order_model(self):
+        client = ShapewaysOauth2Client(journal=self.journal)
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_post",
+                               return_value={"result": "success", "orderId": 5}) as post:
+            for _ in range(2):
+                client.order_model("pv", "First", "Last", "US", "NYC", "1 St", "", "10001",
+                                   "555", model_id=1, material_id=6)
+        self.assertEqual(post.call_count, 1)
+        entry = self.journal.entries()[0]
+        self.assertEqual(entry.method, "order_model")
+        self.assertEqual(entry.args[-2:], (1, 6))
@@ -0,0 +1,85 @@
+import mock
+import requests
+import unittest2
+
+from shapeways.oauth2_client import ShapewaysOauth2Client
+
+
+class MockResponse(object):
+    status_code = 200
+    content = None
+
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class TestOauth2Client(unittest2.TestCase):
+    def test_api_url(self):
+        client = ShapewaysOauth2Client()
+        self.assertEqual(client.api_url, "https://api.shapeways.com")
+
+        client = ShapewaysOauth2Client(api_url="http://localhost:8080")
+        self.assertEqual(client.api_url, "http://localhost:8080")
+
+    def test_session(self):
+        client = ShapewaysOauth2Client(pool_connections=2, pool_maxsize=4)
+        self.assertIsInstance(client.session, requests.Session)
+        adapter = client.session.get_adapter("https://api.shapeways.com")
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+        session = requests.Session()
+        client = ShapewaysOauth2Client(session=session)
+        self.assertIs(client.session, session)
+
+        with mock.patch.object(requests.Session, "close"):
+            with ShapewaysOauth2Client(session=session):
+                pass
+            requests.Session.close.assert_not_called()
+            with ShapewaysOauth2Client():
+                pass
+            requests.Session.close.assert_called_once_with()
+
+    def test_authenticate(self):
+        token = MockResponse({"access_token": "TOKEN"})
+        with mock.patch.object(requests.Session, "post", return_value=token):
+            client = ShapewaysOauth2Client()
+            self.assertTrue(client.authenticate("id", "secret"))
+            self.assertEqual(client.access_token, "TOKEN")
+            args = requests.Session.post.call_args[1]
+            self.assertEqual(args["url"], "https://api.shapeways.com/oauth2/token")
+            self.assertEqual(args["auth"], ("id", "secret"))
+
+    def test_execute_requires_token(self):
+        client = ShapewaysOauth2Client()
+        with self.assertRaises(RuntimeError):
+            client.get_materials()
+
+    def test_execute_reuses_headers(self):
+        response = MockResponse({"result": "success", "materials": []})
+        with mock.patch.object(requests.Session, "get", return_value=response):
+            client = ShapewaysOauth2Client()
+            client.access_token = "TOKEN"
+            client.get_materials()
+            client.get_materials()
+            first, second = requests.Session.get.call_args_list
+            self.assertEqual(first[1]["headers"], {"Authorization": "Bearer TOKEN"})
+            self.assertIs(first[1]["headers"], second[1]["headers"])
+
+            client.access_token = "OTHER"
+            client.get_materials()
+            headers = requests.Session.get.call_args[1]["headers"]
+            self.assertEqual(headers, {"Authorization": "Bearer OTHER"})
+
+    def test_execute_validates(self):
+        with mock.patch.object(requests.Session, "post", return_value=MockResponse({"result": "success"})):
+            client = ShapewaysOauth2Client()
+            client.access_token = "TOKEN"
+            self.assertEqual(client.add_to_cart(1, 2), {"result": "success"})
+
+        with mock.patch.object(requests.Session, "put", return_value=MockResponse({}, status_code=500)):
+            with self.assertRaises(RuntimeError):
+                client.cancel_order(1)
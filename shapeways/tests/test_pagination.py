@@ -0,0 +1,56 @@
+import mock
+import unittest2
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.pagination import iter_pages, iter_items
+
+PAGES = {
+    1: ["a", "b"],
+    2: ["c", "d"],
+    3: ["e"],
+}
+
+
+class TestPagination(unittest2.TestCase):
+    def setUp(self):
+        self.fetched = []
+
+    def fetch_page(self, page):
+        self.fetched.append(page)
+        return PAGES.get(page, [])
+
+    def test_iter_pages(self):
+        for prefetch in (True, False):
+            self.fetched = []
+            pages = list(iter_pages(self.fetch_page, prefetch=prefetch))
+            self.assertEqual(pages, [(1, ["a", "b"]), (2, ["c", "d"]), (3, ["e"])])
+            self.assertEqual(self.fetched, [1, 2, 3, 4])
+
+    def test_iter_items(self):
+        items = list(iter_items(self.fetch_page))
+        self.assertEqual(items, ["a", "b", "c", "d", "e"])
+
+    def test_iter_items_limit(self):
+        items = list(iter_items(self.fetch_page, limit=3, prefetch=False))
+        self.assertEqual(items, ["a", "b", "c"])
+        self.assertEqual(self.fetched, [1, 2])
+
+        self.assertEqual(list(iter_items(self.fetch_page, limit=0)), [])
+
+    def test_iter_items_start_page(self):
+        items = list(iter_items(self.fetch_page, start_page=2))
+        self.assertEqual(items, ["c", "d", "e"])
+
+    def test_client_iter_models(self):
+        def get(path, params=None):
+            return {"result": "success", "models": PAGES.get(params["page"], [])}
+
+        with mock.patch.object(Client, "_get", side_effect=get):
+            client = Client("key", "secret")
+            self.assertEqual(list(client.iter_models(limit=4)), ["a", "b", "c", "d"])
+
+    def test_oauth2_client_iter_models(self):
+        with mock.patch.object(ShapewaysOauth2Client, "get_models", side_effect=self.fetch_page):
+            client = ShapewaysOauth2Client()
+            self.assertEqual(list(client.iter_models()), ["a", "b", "c", "d", "e"])
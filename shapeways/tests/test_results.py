@@ -0,0 +1,147 @@
+import json
+import pickle
+
+import mock
+import unittest2
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.results import (
+    Model, ModelInfo, Material, Order, attribute_name, typed_response, _Packed
+)
+
+
+def model(model_id):
+    return {
+        "modelId": model_id,
+        "title": "Cube %d" % model_id,
+        "fileName": "cube.stl",
+        "isPublic": True,
+        "materials": dict(
+            (str(material), {"materialId": material, "isActive": True, "price": 10.5})
+            for material in (6, 25, 26, 62, 75, 76)
+        ),
+        "urls": {"publicProductUrl": {"address": "https://example.org/%d" % model_id}},
+        "tags": ["cube", "test"],
+        "extraField": 1,
+    }
+
+
+class TestResults(unittest2.TestCase):
+    def test_attribute_name(self):
+        self.assertEqual(attribute_name("modelId"), "model_id")
+        self.assertEqual(attribute_name("fileMd5Checksum"), "file_md5_checksum")
+        self.assertEqual(attribute_name("title"), "title")
+
+    def test_slots(self):
+        result = Model(model(1))
+        self.assertFalse(hasattr(result, "__dict__"))
+        with self.assertRaises(AttributeError):
+            result.unknown = 1
+
+    def test_attributes_and_mapping(self):
+        data = model(1)
+        result = Model(data)
+        self.assertEqual(result.model_id, 1)
+        self.assertEqual(result["title"], "Cube 1")
+        self.assertEqual(result.get("modelVersion", "missing"), "missing")
+        self.assertNotIn("modelVersion", result)
+        self.assertIn("extraField", result)
+        self.assertEqual(set(result), set(data))
+        self.assertEqual(len(result), len(data))
+        self.assertEqual(result, data)
+        self.assertEqual(result.to_dict(), data)
+        self.assertEqual(json.loads(json.dumps(result.to_dict())), data)
+        with self.assertRaises(KeyError):
+            result["modelVersion"]
+        with self.assertRaises(AttributeError):
+            result.model_version
+
+    def test_lazy_fields(self):
+        result = Model(model(1))
+        self.assertIs(type(result._materials), _Packed)
+        self.assertEqual(result.materials["6"]["price"], 10.5)
+        self.assertIsInstance(result._materials, dict)
+        # parsed once, changes stick
+        result.materials["6"]["price"] = 11
+        self.assertEqual(result["materials"]["6"]["price"], 11)
+
+    def test_set_and_delete(self):
+        result = Material({"materialId": 6})
+        result["title"] = "White Plastic"
+        result["restrictions"] = {"minimum": 1}
+        result["other"] = True
+        self.assertEqual(result.title, "White Plastic")
+        self.assertEqual(result.restrictions, {"minimum": 1})
+        del result["title"]
+        del result["other"]
+        self.assertEqual(result, {"materialId": 6, "restrictions": {"minimum": 1}})
+        with self.assertRaises(KeyError):
+            del result["title"]
+
+    def test_pickle(self):
+        result = Model(model(1))
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+
+    def test_from_json(self):
+        self.assertEqual(Order.from_json(b'{"orderId": 5}').order_id, 5)
+
+    @unittest2.skipIf(tracemalloc is None, "tracemalloc is not available")
+    def test_memory(self):
+        documents = [json.dumps(model(i)) for i in range(2000)]
+
+        def measure(build):
+            tracemalloc.start()
+            try:
+                records = [build(json.loads(document)) for document in documents]
+                return tracemalloc.get_traced_memory()[0], records
+            finally:
+                tracemalloc.stop()
+
+        plain, _ = measure(dict)
+        typed, _ = measure(Model)
+        self.assertGreater(plain / float(typed), 2.5)
+
+    def test_typed_response(self):
+        listing = typed_response("models", {"result": "success", "models": [model(1)]})
+        self.assertEqual(listing["result"], "success")
+        self.assertIsInstance(listing["models"][0], Model)
+
+        materials = typed_response("materials", {"materials": {"6": {"materialId": 6}}})
+        self.assertIsInstance(materials["materials"]["6"], Material)
+
+        self.assertIsInstance(typed_response("models", [model(1)])[0], Model)
+        self.assertIsInstance(typed_response("model", model(1)), Model)
+
+        failure = {"result": "failure", "reason": "nope"}
+        self.assertIs(typed_response("model", failure), failure)
+
+
+class TestTypedClients(unittest2.TestCase):
+    def test_client(self):
+        client = Client("key", "secret", typed=True)
+        response = {"result": "success", "models": [model(1), model(2)]}
+        with mock.patch.object(Client, "_get", return_value=response):
+            models = list(client.iter_models(prefetch=False, limit=2))
+            self.assertEqual([m.model_id for m in models], [1, 2])
+            self.assertIsInstance(client.get_model_info(1), ModelInfo)
+
+        with mock.patch.object(Client, "_get", return_value=response):
+            untyped = Client("key", "secret").get_models()
+            self.assertIs(untyped, response)
+
+    def test_oauth2_client(self):
+        client = ShapewaysOauth2Client(typed=True)
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_get",
+                               return_value={"result": "success", "orders": [{"orderId": 5}]}):
+            orders = client.get_orders()
+            self.assertEqual(orders["orders"][0].order_id, 5)
+
+        with mock.patch.object(ShapewaysOauth2Client, "_execute_get",
+                               return_value={"result": "success", "models": [model(1)]}):
+            self.assertEqual(client.get_models()[0].title, "Cube 1")
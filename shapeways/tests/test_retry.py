@@ -0,0 +1,191 @@
+import threading
+
+import mock
+import requests
+import unittest2
+from urllib3.exceptions import NewConnectionError
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.retry import (
+    TokenBucket, RetryPolicy, parse_retry_after, send_request
+)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def response(status, body=None, headers=None):
+    result = mock.MagicMock()
+    result.status_code = status
+    result.headers = headers or {}
+    if body is None:
+        result.json.side_effect = ValueError("no json")
+    else:
+        result.json.return_value = body
+    return result
+
+
+class TestTokenBucket(unittest2.TestCase):
+    def test_burst_then_throttle(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0] * 3)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.assertEqual(bucket.stats(), {"throttled": 2, "waited": 1.5})
+
+        clock.now += 10
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_thread_safe(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock)
+        delays = []
+
+        def work():
+            for _ in range(100):
+                delays.append(bucket.reserve())
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # one token, then every reservation queues one second behind the last
+        self.assertEqual(sorted(delays), [float(i) for i in range(800)])
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRetryPolicy(unittest2.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(
+            parse_retry_after("Sun, 06 Nov 1994 08:49:37 GMT", clock=lambda: 0),
+            784111777.0
+        )
+
+    def test_idempotency(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry("get", 0, status=503))
+        self.assertTrue(policy.should_retry("put", 0, status=500))
+        self.assertFalse(policy.should_retry("get", 0, status=404))
+        self.assertTrue(policy.should_retry("post", 0, status=429))
+        self.assertFalse(policy.should_retry("post", 0, status=503))
+
+        refused = requests.exceptions.ConnectionError(
+            mock.MagicMock(reason=NewConnectionError(None, "refused"))
+        )
+        self.assertTrue(policy.should_retry("post", 0, error=refused))
+        reset = requests.exceptions.ConnectionError("connection reset")
+        self.assertFalse(policy.should_retry("post", 0, error=reset))
+        self.assertTrue(policy.should_retry("get", 0, error=reset))
+
+    def test_gives_up(self):
+        policy = RetryPolicy(max_retries=1)
+        self.assertTrue(policy.should_retry("get", 0, status=503))
+        self.assertFalse(policy.should_retry("get", 1, status=503))
+        self.assertEqual(policy.stats(), {"retries": 1, "gave_up": 1})
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+        self.assertEqual(
+            [policy.delay(attempt) for attempt in range(5)], [1, 2, 4, 5, 5]
+        )
+        self.assertEqual(policy.delay(0, "2"), 2.0)
+        self.assertEqual(policy.delay(0, "120"), 5)
+
+        policy = RetryPolicy(backoff=1, max_backoff=5)
+        for attempt in range(5):
+            self.assertTrue(0 <= policy.delay(attempt) <= min(5, 2 ** attempt))
+
+
+class TestSendRequest(unittest2.TestCase):
+    def test_retries_until_success(self):
+        send = mock.MagicMock(side_effect=[
+            response(429, headers={"Retry-After": "7"}),
+            response(503),
+            response(200, {"result": "success"}),
+        ])
+        sleep = mock.MagicMock()
+        result = send_request(
+            send, "get", retry=RetryPolicy(jitter=False), sleep=sleep, url="u"
+        )
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(send.call_count, 3)
+        send.assert_called_with(url="u")
+        self.assertEqual(sleep.call_args_list, [mock.call(7.0), mock.call(1.0)])
+
+    def test_returns_last_response(self):
+        send = mock.MagicMock(return_value=response(503))
+        result = send_request(
+            send, "get", retry=RetryPolicy(max_retries=2), sleep=mock.MagicMock()
+        )
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(send.call_count, 3)
+
+    def test_post_not_replayed(self):
+        send = mock.MagicMock(return_value=response(502))
+        send_request(send, "post", retry=RetryPolicy(), sleep=mock.MagicMock())
+        self.assertEqual(send.call_count, 1)
+
+    def test_raises_connection_errors(self):
+        send = mock.MagicMock(
+            side_effect=requests.exceptions.ConnectionError("reset")
+        )
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            send_request(
+                send, "get", retry=RetryPolicy(max_retries=1),
+                sleep=mock.MagicMock()
+            )
+        self.assertEqual(send.call_count, 2)
+
+    def test_waits_on_limiter(self):
+        limiter = mock.MagicMock()
+        send_request(mock.MagicMock(), "get", limiter=limiter)
+        limiter.acquire.assert_called_once_with()
+
+
+class TestClientRetry(unittest2.TestCase):
+    @mock.patch("shapeways.retry.time.sleep")
+    @mock.patch.object(requests.Session, "get")
+    def test_client_retries_get(self, mock_get, mock_sleep):
+        mock_get.side_effect = [
+            response(429, headers={"Retry-After": "1"}),
+            response(200, {"result": "success"}),
+        ]
+        retry = RetryPolicy()
+        client = Client("key", "secret", retry=retry)
+        self.assertEqual(client.get_api_info(), {"result": "success"})
+        mock_sleep.assert_called_once_with(1.0)
+        self.assertEqual(retry.stats(), {"retries": 1, "gave_up": 0})
+
+    @mock.patch.object(requests.Session, "get")
+    def test_client_error_page(self, mock_get):
+        mock_get.return_value = response(502)
+        client = Client("key", "secret")
+        self.assertEqual(
+            client.get_api_info(), {"result": "failure", "reason": "HTTP 502"}
+        )
+
+    @mock.patch("shapeways.retry.time.sleep")
+    @mock.patch.object(requests.Session, "post")
+    def test_oauth2_client_retries(self, mock_post, mock_sleep):
+        mock_post.side_effect = [
+            response(429),
+            response(200, {"result": "success"}),
+        ]
+        client = ShapewaysOauth2Client(retry=RetryPolicy())
+        client.access_token = "TOKEN"
+        self.assertEqual(client.add_to_cart(1, 2), {"result": "success"})
+        self.assertEqual(mock_post.call_count, 2)
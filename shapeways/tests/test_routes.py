@@ -0,0 +1,98 @@
+import unittest2
+
+from shapeways import oauth2_client
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.routes import Routes, ENDPOINTS, OAUTH2_ENDPOINTS
+
+
+class TestRoutes(unittest2.TestCase):
+    def test_url(self):
+        routes = Routes("https://api.shapeways.com")
+        self.assertEqual(
+            routes.url("model_file", 86, 1),
+            "https://api.shapeways.com/models/86/files/1/v1"
+        )
+        self.assertEqual(routes.url("api"), "https://api.shapeways.com/api/v1")
+        self.assertEqual(
+            routes.url("token"), "https://api.shapeways.com/oauth2/token"
+        )
+
+    def test_path(self):
+        routes = Routes("https://api.shapeways.com")
+        self.assertEqual(routes.path("model_info", 86), "/models/86/info/")
+        self.assertEqual(routes.path("price"), "/price/")
+
+    def test_static(self):
+        routes = Routes("http://localhost:8080/%7Eapi", api_version="v2")
+        self.assertEqual(
+            routes.static["/materials/"],
+            "http://localhost:8080/%7Eapi/materials/v2"
+        )
+        self.assertNotIn("/materials/{material_id}/", routes.static)
+        self.assertEqual(
+            routes.url("material", 6),
+            "http://localhost:8080/%7Eapi/materials/6/v2"
+        )
+
+    def test_match(self):
+        routes = Routes("https://api.shapeways.com")
+        self.assertEqual(
+            routes.match("https://api.shapeways.com/models/86/files/1/v1"), "model_file"
+        )
+        self.assertEqual(routes.match("/models/86/info/"), "model_info")
+        self.assertEqual(routes.match("https://api.shapeways.com/orders/cart/v1?x=1"), "cart")
+        self.assertEqual(routes.match("https://api.shapeways.com/orders/5/v1"), "order")
+        self.assertEqual(routes.match("https://api.shapeways.com/oauth2/token"), "token")
+        self.assertIsNone(routes.match("https://example.org/models/v1"))
+        oauth2 = Routes("https://api.shapeways.com", endpoints=OAUTH2_ENDPOINTS)
+        self.assertEqual(oauth2.match("https://api.shapeways.com/model/86/v1"), "model")
+
+    def test_resolve(self):
+        routes = Routes("https://api.shapeways.com")
+        self.assertEqual(
+            routes.resolve("https://api.shapeways.com/models/86/files/1/v1?file=1"),
+            ("model_file", {"model_id": "86", "file_version": "1"})
+        )
+        self.assertEqual(routes.resolve("/orders/cart/v1"), ("cart", {}))
+        self.assertIsNone(routes.resolve("/nowhere/v1"))
+
+    def test_client_url_matches_path_assembly(self):
+        client = Client("key", "secret")
+        for name, template in ENDPOINTS.items():
+            if not template.endswith("/"):
+                continue
+            args = (1,) * template.count("{")
+            path = client._routes.path(name, *args)
+            self.assertEqual(client.url(path), client._routes.url(name, *args))
+
+    def test_client_base_url(self):
+        client = Client("key", "secret")
+        client.base_url = "http://localhost:8080"
+        self.assertEqual(client.url("/api/"), "http://localhost:8080/api/v1")
+        client.api_version = "v2"
+        self.assertEqual(client.url("/api/"), "http://localhost:8080/api/v2")
+        self.assertEqual(client.url("models"), "http://localhost:8080/models/v2")
+
+    def test_oauth2_routes_match_constants(self):
+        client = ShapewaysOauth2Client(api_url="http://localhost:8080")
+        routes = client._routes
+        self.assertIs(routes.endpoints, OAUTH2_ENDPOINTS)
+        base = "http://localhost:8080"
+        self.assertEqual(routes.url("token"), base + oauth2_client.AUTH_URL)
+        self.assertEqual(routes.url("models"), base + oauth2_client.MODEL_URL)
+        self.assertEqual(
+            routes.url("model", 5),
+            base + oauth2_client.SINGLE_MODEL_URL.format(model_id=5)
+        )
+        self.assertEqual(
+            routes.url("category", 5),
+            base + oauth2_client.SINGLE_CATEGORY_ENDPOINT.format(category_id=5)
+        )
+        self.assertEqual(
+            routes.url("order", 5),
+            base + oauth2_client.SINGLE_ORDER_URL.format(order_id=5)
+        )
+
+        client.api_url = "http://example.org"
+        self.assertEqual(client._routes.url("cart"), "http://example.org/orders/cart/v1")
@@ -0,0 +1,140 @@
+import base64
+import io
+import random
+import time
+
+import unittest2
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.cache import ValidatorCache
+from shapeways.retry import RetryPolicy
+from shapeways.testing import ApiEmulator, constant, lognormal, parse_latency, uniform
+
+UPLOAD = {
+    "file": base64.b64encode(b"solid cube").decode("ascii"), "fileName": "cube.stl",
+    "hasRightsToModel": True, "acceptTermsAndConditions": True,
+}
+
+
+class TestApiEmulator(unittest2.TestCase):
+    def start(self, **options):
+        emulator = ApiEmulator(**options).start()
+        self.addCleanup(emulator.stop)
+        return emulator
+
+    def client(self, emulator, **options):
+        client = Client("key", "secret", oauth_token="token", oauth_secret="secret", **options)
+        client.base_url = emulator.url
+        self.addCleanup(client.close)
+        return client
+
+    def test_latency_distributions(self):
+        generator = random.Random(1)
+        self.assertEqual(constant(0.5)(generator), 0.5)
+        self.assertTrue(0.1 <= uniform(0.1, 0.2)(generator) <= 0.2)
+        self.assertGreater(lognormal(0.05, 0.5)(generator), 0)
+        self.assertEqual(parse_latency("constant:0.25")(generator), 0.25)
+        with self.assertRaises(ValueError):
+            parse_latency("gamma:1")
+
+    def test_client(self):
+        emulator = self.start(page_size=2)
+        client = self.client(emulator)
+        self.assertTrue(client.connect().startswith(emulator.url + "/login"))
+        self.assertEqual(client.oauth_secret, "request-secret")
+
+        model = client.add_model(UPLOAD)
+        self.assertEqual(model["result"], "success")
+        model_id = model["modelId"]
+        self.assertEqual(model["contentLength"], 10)
+        client.add_model(UPLOAD)
+        client.add_model(UPLOAD)
+        self.assertEqual(len(client.get_models(page=1)["models"]), 2)
+        self.assertEqual(len(client.get_models(page=2)["models"]), 1)
+
+        client.update_model_info(model_id, {"title": "Cube"})
+        self.assertEqual(client.get_model_info(model_id)["title"], "Cube")
+        version = client.add_model_file(model_id, UPLOAD)["fileVersion"]
+        self.assertEqual(version, 2)
+        out = io.BytesIO()
+        client.download_model_file(model_id, version, out)
+        self.assertEqual(out.getvalue(), b"solid cube")
+        self.assertEqual(client.add_model_photo(model_id, {"file": "x"})["result"], "success")
+
+        self.assertEqual(len(client.get_materials()["materials"]), 20)
+        self.assertEqual(client.get_material(3)["materialId"], 3)
+        self.assertIn("materials", client.get_printer(1))
+        self.assertEqual(len(client.get_categories()["categories"]), 8)
+        price = client.get_price({
+            "volume": 1e-6, "area": 1e-4, "xBoundMin": 0, "xBoundMax": 0.01,
+            "yBoundMin": 0, "yBoundMax": 0.01, "zBoundMin": 0, "zBoundMax": 0.01,
+            "materials": [6],
+        })
+        self.assertEqual(list(price["prices"]), ["6"])
+
+        client.add_to_cart({"modelId": model_id, "materialId": 6, "quantity": 2})
+        self.assertEqual(client.get_cart()["numItems"], 2)
+        self.assertEqual(client.delete_model(model_id)["result"], "success")
+        self.assertEqual(client.get_model(model_id)["result"], "failure")
+
+        stats = emulator.stats()
+        self.assertEqual(stats["endpoints"]["models"], 5)
+        self.assertEqual(stats["statuses"][404], 1)
+
+    def test_oauth2_client(self):
+        emulator = self.start()
+        client = ShapewaysOauth2Client(api_url=emulator.url)
+        self.addCleanup(client.close)
+        self.assertTrue(client.authenticate("id", "secret"))
+        self.assertEqual(client.access_token, "emulated-token")
+
+        emulator.models.clear()
+        model = client.upload_model(io.BytesIO(b"solid"))
+        self.assertEqual(client.get_single_model(model["modelId"])["contentLength"], 5)
+        self.assertEqual(len(client.get_models()), 1)
+        client.add_to_cart(model["modelId"], 6)
+        order_id = client.order_model(
+            "pv", "First", "Last", "US", "NYC", "1 St", "", "10001", "555",
+            model_id=model["modelId"], material_id=6
+        )["orderId"]
+        self.assertEqual(client.get_orders()["orders"][0]["orderId"], order_id)
+        client.cancel_order(order_id)
+        self.assertEqual(client.get_single_order(order_id)["status"], "cancelled")
+        self.assertEqual(len(client.get_materials()), 20)
+
+    def test_fault_injection(self):
+        emulator = self.start(
+            error_rate=0.3, throttle_rate=0.2, retry_after=0, seed=7
+        )
+        client = self.client(emulator, retry=RetryPolicy(max_retries=10, backoff=0, jitter=False))
+        for _ in range(20):
+            self.assertEqual(client.get_materials()["result"], "success")
+        stats = emulator.stats()
+        self.assertGreater(stats["throttled"], 0)
+        self.assertGreater(stats["errors"], 0)
+        self.assertEqual(stats["statuses"][200], 20)
+        self.assertEqual(stats["statuses"][429], stats["throttled"])
+
+    def test_rate_limit(self):
+        emulator = self.start(rate_limit=5)
+        client = self.client(emulator)
+        statuses = [client.session.get(emulator.url + "/api/v1").status_code for _ in range(10)]
+        self.assertIn(429, statuses)
+        self.assertEqual(statuses[0], 200)
+
+    def test_latency(self):
+        emulator = self.start(latency=constant(0.05))
+        client = self.client(emulator)
+        start = time.time()
+        client.get_api_info()
+        self.assertGreaterEqual(time.time() - start, 0.05)
+
+    def test_payload_size_and_validators(self):
+        emulator = self.start(models=3, padding=10000)
+        client = self.client(emulator, validators=ValidatorCache())
+        models = client.get_models()["models"]
+        self.assertEqual(len(models), 3)
+        self.assertGreaterEqual(len(models[0]["description"]), 10000)
+        client.get_models()
+        self.assertEqual(emulator.stats()["statuses"][304], 1)
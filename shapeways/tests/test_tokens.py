@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import unittest2
+
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.testing import ApiEmulator
+from shapeways.tokens import TokenManager
+
+
+class FakeClock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenManager(unittest2.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fetched = []
+
+    def fetch(self, expires_in=600):
+        def fetch():
+            self.fetched.append(self.clock.now)
+            return {"access_token": "token-%d" % len(self.fetched), "expires_in": expires_in}
+        return fetch
+
+    def test_expiry(self):
+        tokens = TokenManager(refresh_margin=60, clock=self.clock)
+        self.assertEqual(tokens.get("id", self.fetch()), "token-1")
+        self.assertEqual(tokens.token.expires_at, 1600)
+        self.clock.now += 500
+        self.assertEqual(tokens.get("id", self.fetch()), "token-1")
+        self.assertEqual(tokens.current("id"), "token-1")
+        # refreshed ahead of the expiry
+        self.clock.now += 50
+        self.assertIsNone(tokens.current("id"))
+        self.assertEqual(tokens.get("id", self.fetch()), "token-2")
+        self.assertEqual(tokens.refreshes, 2)
+        # another client's token is never handed out
+        self.assertEqual(tokens.get("other", self.fetch()), "token-3")
+
+    def test_short_lifetime_and_missing_expiry(self):
+        tokens = TokenManager(refresh_margin=60, default_lifetime=100, clock=self.clock)
+        tokens.get("id", self.fetch(expires_in=30))
+        self.assertEqual(tokens.token.refresh_at - self.clock.now, 15)
+        tokens.invalidate("token-1")
+        tokens.get("id", self.fetch(expires_in=None))
+        self.assertEqual(tokens.token.expires_at - self.clock.now, 100)
+
+    def test_failed_fetch(self):
+        tokens = TokenManager()
+        with self.assertRaises(RuntimeError):
+            tokens.get("id", lambda: {"error": "invalid_client"})
+        self.assertIsNone(tokens.token)
+
+    def test_single_flight(self):
+        tokens = TokenManager()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"access_token": "shared", "expires_in": 3600}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(tokens.get("id", fetch)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["shared"] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_valid_token_used_while_refreshing(self):
+        tokens = TokenManager(refresh_margin=60, clock=self.clock)
+        tokens.get("id", self.fetch())
+        self.clock.now += 590
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return {"access_token": "new", "expires_in": 600}
+
+        refresher = threading.Thread(target=tokens.get, args=("id", slow_fetch))
+        refresher.start()
+        started.wait(5)
+        # the old token has 10 seconds left, nobody waits for the refresh
+        self.assertEqual(tokens.get("id", self.fetch()), "token-1")
+        release.set()
+        refresher.join()
+        self.assertEqual(tokens.get("id", self.fetch()), "new")
+
+
+class TestSharedTokenFile(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "token.json")
+
+    def test_shared_between_managers(self):
+        first = TokenManager(self.path)
+        second = TokenManager(self.path)
+        fetch = lambda: {"access_token": "TOKEN", "expires_in": 3600}
+        self.assertEqual(first.get("id", fetch), "TOKEN")
+        self.assertEqual(os.stat(self.path).st_mode & 0o077, 0)
+        self.assertEqual(second.get("id", lambda: self.fail("fetched twice")), "TOKEN")
+        self.assertEqual((first.refreshes, second.refreshes, second.shared), (1, 0, 1))
+
+        second.invalidate("TOKEN")
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(second.token)
+
+    def test_corrupt_file(self):
+        with open(self.path, "w") as data:
+            data.write("{not json")
+        tokens = TokenManager(self.path)
+        self.assertEqual(tokens.get("id", lambda: {"access_token": "TOKEN"}), "TOKEN")
+        self.assertEqual(TokenManager(self.path).get("id", lambda: None), "TOKEN")
+
+    def test_clients(self):
+        emulator = ApiEmulator().start()
+        self.addCleanup(emulator.stop)
+        tokens = TokenManager(self.path)
+        for _ in range(3):
+            client = ShapewaysOauth2Client(api_url=emulator.url, tokens=tokens)
+            self.addCleanup(client.close)
+            self.assertTrue(client.authenticate("id", "secret"))
+            self.assertEqual(client.access_token, "emulated-token")
+            self.assertTrue(client.get_materials())
+        self.assertEqual(tokens.refreshes, 1)
+        self.assertEqual(emulator.stats()["endpoints"]["token"], 1)
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+import unittest2
+
+if sys.version_info[0] >= 3:
+    from io import StringIO
+else:  # pragma: no cover
+    # print writes native str on python 2
+    from StringIO import StringIO
+
+from shapeways.cache import ResponseCache
+from shapeways.client import Client
+from shapeways.instrument import Instrumentation, RequestInfo
+from shapeways.testing import ApiEmulator
+from shapeways.trace import (
+    TraceRecorder, format_summary, main, percentile, read_records, summarize,
+    trace_files, trace_record
+)
+
+
+def request(duration, status=200, template="/price/", method="POST", **values):
+    info = RequestInfo(method, "https://api.shapeways.com/price/v1", "price", template)
+    info.status = status
+    info.attempts = 1
+    info.duration = duration
+    for name, value in values.items():
+        setattr(info, name, value)
+    return info
+
+
+class TestTraceRecorder(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "trace.jsonl")
+
+    def test_client(self):
+        emulator = ApiEmulator().start()
+        self.addCleanup(emulator.stop)
+        recorder = TraceRecorder(self.path, sample_rate=1.0)
+        self.addCleanup(recorder.close)
+        client = Client(
+            "key", "secret", oauth_token="token", oauth_secret="secret",
+            cache=ResponseCache(), instrumentation=Instrumentation(recorder)
+        )
+        client.base_url = emulator.url
+        self.addCleanup(client.close)
+        client.get_materials()
+        client.get_materials()
+
+        first, second = read_records([self.path])
+        self.assertEqual(
+            (first["method"], first["endpoint"], first["status"], first["retries"], first["cache"]),
+            ("GET", "/materials/", 200, 0, None)
+        )
+        self.assertGreater(first["bytes_received"], 0)
+        self.assertIsNotNone(first["decode"])
+        self.assertEqual((second["cache"], second["attempts"], second["status"]), ("hit", 0, None))
+
+    def test_sampling(self):
+        recorder = TraceRecorder(self.path, sample_rate=0.0, slow=1.0)
+        self.addCleanup(recorder.close)
+        recorder.after(request(0.1))
+        recorder.after(request(1.5))
+        error = IOError("reset")
+        recorder.after(request(0.1, status=None, error=error))
+        records = list(read_records([self.path]))
+        self.assertEqual([record["duration"] for record in records], [1.5, 0.1])
+        # IOError is an alias of OSError on python 3 only
+        self.assertEqual(records[1]["error"], "%s: reset" % type(error).__name__)
+
+    def test_rotation(self):
+        recorder = TraceRecorder(self.path, sample_rate=1.0, max_bytes=1000, backups=2)
+        self.addCleanup(recorder.close)
+        for index in range(40):
+            recorder.after(request(index))
+        self.assertEqual(recorder.recorded, 40)
+        files = trace_files(self.path)
+        self.assertEqual(files, [self.path + ".2", self.path + ".1", self.path])
+        for path in files:
+            self.assertLessEqual(os.path.getsize(path), 1000)
+        durations = [record["duration"] for record in read_records(files)]
+        self.assertEqual(durations, sorted(durations))
+        self.assertEqual(durations[-1], 39)
+
+
+class TestAnalyzer(unittest2.TestCase):
+    def records(self):
+        records = [
+            trace_record(request(
+                (index + 1) / 100.0, bytes_sent=2000, bytes_received=100, wait=0.01
+            )) for index in range(100)
+        ]
+        records.append(trace_record(request(0.5, status=502, template="/models/", attempts=3)))
+        return records
+
+    def test_percentile(self):
+        self.assertEqual(percentile(list(range(1, 101)), 0.5), 50)
+        self.assertEqual(percentile(list(range(1, 101)), 0.99), 99)
+        self.assertEqual(percentile([3], 0.95), 3)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize(self):
+        summary = summarize(self.records(), top=3)
+        price = summary["endpoints"]["POST /price/"]
+        self.assertEqual((price["count"], price["errors"]), (100, 0))
+        self.assertEqual(price["timings"]["duration"]["p50"], 0.5)
+        self.assertEqual(price["timings"]["duration"]["p95"], 0.95)
+        self.assertEqual(price["timings"]["duration"]["p99"], 0.99)
+        self.assertEqual(price["timings"]["wait"]["max"], 0.01)
+        models = summary["endpoints"]["POST /models/"]
+        self.assertEqual((models["errors"], models["retries"]), (1, 2))
+        self.assertEqual([record["duration"] for record in summary["slowest"]], [1.0, 0.99, 0.98])
+        self.assertEqual(summary["sizes"]["sent"]["<=4096"], 100)
+        self.assertEqual(summary["sizes"]["received"]["<=1024"], 100)
+        self.assertIn("POST /price/", format_summary(summary))
+
+    def test_main(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "trace.jsonl")
+        with open(path, "w") as trace:
+            for record in self.records():
+                trace.write(json.dumps(record) + "\n")
+            trace.write('{"truncated')
+        with mock.patch("sys.stdout", new_callable=StringIO) as output:
+            main([path, "--json", "--top", "1"])
+        summary = json.loads(output.getvalue())
+        self.assertEqual(summary["endpoints"]["POST /price/"]["count"], 100)
+        self.assertEqual(len(summary["slowest"]), 1)
@@ -0,0 +1,136 @@
+import base64
+import io
+import json
+import os
+import tempfile
+
+import mock
+import requests
+import unittest2
+from requests_oauthlib import OAuth1
+
+from shapeways.client import Client
+from shapeways.oauth2_client import ShapewaysOauth2Client
+from shapeways.upload import JsonUploadBody, upload_params
+
+DATA = bytes(bytearray(range(256))) * 41
+
+
+class TestJsonUploadBody(unittest2.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".stl")
+        with os.fdopen(handle, "wb") as model:
+            model.write(DATA)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_body(self):
+        progress = []
+        body = JsonUploadBody(
+            self.path, {"fileName": "a.stl", "uploadScale": 0.001},
+            chunk_size=1000, progress=lambda read, total: progress.append((read, total))
+        )
+        encoded = b"".join(body)
+        self.assertEqual(len(body), len(encoded))
+        data = json.loads(encoded.decode("utf-8"))
+        self.assertEqual(base64.b64decode(data["file"]), DATA)
+        self.assertEqual(data["fileName"], "a.stl")
+        self.assertEqual(data["uploadScale"], 0.001)
+        self.assertEqual(progress[-1], (len(DATA), len(DATA)))
+        # chunk size is rounded down to a multiple of 3
+        self.assertEqual(progress[0], (999, len(DATA)))
+
+        # can be iterated again, e.g. when a request is retried
+        self.assertEqual(b"".join(body), encoded)
+
+    def test_file_object(self):
+        source = io.BytesIO(b"header" + DATA)
+        source.read(6)
+        body = JsonUploadBody(source, {})
+        data = json.loads(b"".join(body).decode("utf-8"))
+        self.assertEqual(list(data), ["file"])
+        self.assertEqual(base64.b64decode(data["file"]), DATA)
+        self.assertEqual(b"".join(body), b"".join(body))
+
+    def test_read(self):
+        body = JsonUploadBody(self.path, {"fileName": "a.stl"}, chunk_size=1000)
+        encoded = b"".join(body)
+        parts = []
+        for part in iter(lambda: body.read(300), b""):
+            self.assertLessEqual(len(part), 300)
+            parts.append(part)
+        self.assertEqual(b"".join(parts), encoded)
+        # starts over once read to the end
+        self.assertEqual(body.read(), encoded)
+        self.assertEqual(body.read(), encoded)
+        self.assertEqual(upload_params(u"/tmp/model.stl", {})["fileName"], "model.stl")
+
+    def test_short_reads(self):
+        class ShortReads(io.BytesIO):
+            def read(self, size=-1):
+                return io.BytesIO.read(self, min(size, 1000) if size >= 0 else 1000)
+
+        body = JsonUploadBody(ShortReads(DATA), {})
+        encoded = b"".join(body)
+        self.assertEqual(len(body), len(encoded))
+        self.assertEqual(base64.b64decode(json.loads(encoded.decode("utf-8"))["file"]), DATA)
+
+    def test_empty_file(self):
+        body = JsonUploadBody(io.BytesIO(), {"a": 1})
+        self.assertEqual(json.loads(b"".join(body).decode("utf-8")), {"a": 1, "file": ""})
+        self.assertEqual(len(body), len(b"".join(body)))
+
+    def test_upload_params(self):
+        self.assertEqual(upload_params("/tmp/x/model.stl", {})["fileName"], "model.stl")
+        self.assertEqual(upload_params("/tmp/model.stl", {"fileName": "b"})["fileName"], "b")
+        self.assertNotIn("fileName", upload_params(io.BytesIO(), {}))
+
+    def test_prepared_request(self):
+        body = JsonUploadBody(self.path, {"fileName": "a.stl"})
+        request = requests.Request(
+            "POST", "https://api.shapeways.com/models/v1", data=body,
+            headers={"Content-Type": "application/json"}, auth=OAuth1("key", "secret")
+        ).prepare()
+        self.assertEqual(request.headers["Content-Length"], str(len(body)))
+        self.assertNotIn("Transfer-Encoding", request.headers)
+        self.assertTrue(request.headers["Authorization"].startswith(b"OAuth"))
+
+    def test_client(self):
+        with mock.patch.object(Client, "_post"):
+            client = Client("key", "secret")
+            client.add_model_stream(self.path, {
+                "hasRightsToModel": True, "acceptTermsAndConditions": True,
+            })
+            args = client._post.call_args
+            self.assertEqual(args[0], ("/models/",))
+            self.assertEqual(args[1]["headers"], {"Content-Type": "application/json"})
+            data = json.loads(b"".join(args[1]["body"]).decode("utf-8"))
+            self.assertEqual(data["fileName"], os.path.basename(self.path))
+
+            client.add_model_file_stream(86, io.BytesIO(DATA), {
+                "fileName": "a.stl", "hasRightsToModel": True, "acceptTermsAndConditions": True,
+            })
+            self.assertEqual(client._post.call_args[0], ("/models/86/files/",))
+
+            with self.assertRaises(Exception):
+                client.add_model_stream(self.path, {"hasRightsToModel": True})
+            with self.assertRaises(Exception):
+                client.add_model_file_stream(86, io.BytesIO(DATA), {
+                    "hasRightsToModel": True, "acceptTermsAndConditions": True,
+                })
+
+    def test_oauth2_client(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"result": "success"}
+        with mock.patch.object(requests.Session, "post", return_value=response):
+            client = ShapewaysOauth2Client()
+            client.access_token = "TOKEN"
+            client.upload_model(self.path)
+            args = requests.Session.post.call_args[1]
+            self.assertEqual(args["headers"], {
+                "Authorization": "Bearer TOKEN", "Content-Type": "application/json",
+            })
+            data = json.loads(b"".join(args["data"]).decode("utf-8"))
+            self.assertEqual(base64.b64decode(data["file"]), DATA)
+            self.assertEqual(data["fileName"], "cube.stl")
@@ -0,0 +1,221 @@
+"""Expiry aware OAuth2 bearer tokens, shared between threads and processes
+
+A :class:`TokenManager` given to
+:class:`shapeways.oauth2_client.ShapewaysOauth2Client` keeps the token
+returned by ``/oauth2/token`` together with its ``expires_in`` lifetime and
+fetches a new one shortly before it lapses. Only one thread fetches at a
+time: while the old token is still valid the other threads keep using it,
+once it expired they wait for the new one.
+
+With a ``path`` the token is also kept in a file, locked while it is
+refreshed, so every worker process on a host shares one token instead of
+each authenticating on its own.
+
+.. code:: python
+
+    tokens = TokenManager("/var/run/shapeways/token.json")
+    client = ShapewaysOauth2Client(tokens=tokens)
+    client.authenticate(client_id, client_secret)
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from shapeways.compat import replace_file
+
+#: Seconds before expiry a token is refreshed
+DEFAULT_REFRESH_MARGIN = 120
+
+#: Lifetime in seconds assumed for tokens issued without ``expires_in``
+DEFAULT_LIFETIME = 3600
+
+
+class AccessToken(namedtuple("AccessToken", [
+    "access_token", "client_id", "refresh_at", "expires_at",
+])):
+    """A bearer token issued to ``client_id``
+
+    ``expires_at`` is when the token lapses and ``refresh_at`` when it is
+    due to be replaced, both as :func:`time.time` timestamps.
+    """
+    __slots__ = ()
+
+
+class TokenManager(object):
+    """Expiry aware cache of the bearer token of a client
+
+    :param path: file the token is shared through, kept in memory only when
+        ``None``. The file holds a secret and is created readable by its
+        owner only
+    :type path: str or None
+    :param refresh_margin: seconds before expiry the token is refreshed, at
+        most half the lifetime of the token
+    :type refresh_margin: float
+    :param default_lifetime: lifetime in seconds of tokens issued without
+        ``expires_in``
+    :type default_lifetime: float
+    :param clock: function returning the current time in seconds
+    :type clock: callable
+    """
+    __slots__ = [
+        "path", "refresh_margin", "default_lifetime", "refreshes", "shared",
+        "_token", "_lock", "_clock",
+    ]
+
+    def __init__(
+            self, path=None, refresh_margin=DEFAULT_REFRESH_MARGIN,
+            default_lifetime=DEFAULT_LIFETIME, clock=time.time
+    ):
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self.default_lifetime = default_lifetime
+        #: tokens fetched from the token endpoint
+        self.refreshes = 0
+        #: tokens picked up from the file, fetched by another process
+        self.shared = 0
+        self._token = None
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    @property
+    def token(self):
+        """The current token, ``None`` before the first :meth:`get`
+
+        :rtype: :class:`shapeways.tokens.AccessToken` or None
+        """
+        return self._token
+
+    def _fresh(self, token, client_id):
+        return (
+            token is not None and token.client_id == client_id and
+            self._clock() < token.refresh_at
+        )
+
+    def current(self, client_id):
+        """The access token when it is not due for a refresh, without
+        blocking
+
+        :param client_id: the client the token is issued to
+        :type client_id: str
+        :returns: the access token, ``None`` when it must be refreshed
+        :rtype: str or None
+        """
+        token = self._token
+        return token.access_token if self._fresh(token, client_id) else None
+
+    def get(self, client_id, fetch):
+        """Get a valid access token, fetching a new one when needed
+
+        :param client_id: the client the token is issued to
+        :type client_id: str
+        :param fetch: posts the client credentials to the token endpoint and
+            returns the decoded response, with ``access_token`` and
+            ``expires_in``
+        :type fetch: callable
+        :returns: the access token
+        :rtype: str
+        :raises: :class:`RuntimeError` when no token could be fetched
+        """
+        token = self._token
+        if self._fresh(token, client_id):
+            return token.access_token
+        usable = (
+            token is not None and token.client_id == client_id and
+            self._clock() < token.expires_at
+        )
+        # a token that still works is used while another thread refreshes it
+        if not self._lock.acquire(not usable):
+            return token.access_token
+        try:
+            return self._refresh(client_id, fetch).access_token
+        finally:
+            self._lock.release()
+
+    def _refresh(self, client_id, fetch):
+        token = self._token
+        if self._fresh(token, client_id):
+            # refreshed by the thread we waited for
+            return token
+        if self.path is None:
+            token = self._fetch(client_id, fetch)
+        else:
+            with self._locked():
+                token = self._read()
+                if self._fresh(token, client_id):
+                    self.shared += 1
+                else:
+                    token = self._fetch(client_id, fetch)
+                    self._write(token)
+        self._token = token
+        return token
+
+    def _fetch(self, client_id, fetch):
+        content = fetch()
+        try:
+            access_token = content["access_token"]
+        except (KeyError, TypeError):
+            raise RuntimeError(content)
+        lifetime = float(content.get("expires_in") or self.default_lifetime)
+        now = self._clock()
+        self.refreshes += 1
+        return AccessToken(
+            access_token, client_id,
+            now + lifetime - min(self.refresh_margin, lifetime / 2.0), now + lifetime
+        )
+
+    def invalidate(self, access_token):
+        """Drop a token the API rejected, the next :meth:`get` fetches a new
+        one
+
+        :param access_token: the rejected token
+        :type access_token: str
+        """
+        with self._lock:
+            token = self._token
+            if token is not None and token.access_token == access_token:
+                self._token = None
+            if self.path is None:
+                return
+            with self._locked():
+                token = self._read()
+                if token is not None and token.access_token == access_token:
+                    os.unlink(self.path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the lock file next to :attr:`path`, shared between processes"""
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as data:
+                return AccessToken(**json.load(data))
+        except (IOError, OSError, ValueError, TypeError):
+            return None
+
+    def _write(self, token):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as out:
+                json.dump(token._asdict(), out)
+            replace_file(temporary, self.path)
+        except Exception:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,371 @@
+"""Sampled request traces and their offline analysis
+
+:class:`TraceRecorder` is an ``after`` hook (see :mod:`shapeways.instrument`)
+appending a sample of the requests a client makes to a JSON lines file,
+one record per request with its endpoint, timings, payload sizes, retries
+and cache outcome. The file is rotated once it grows past a size limit.
+Requests that are not sampled cost one random number.
+
+.. code:: python
+
+    recorder = TraceRecorder("trace.jsonl", sample_rate=0.05, slow=2.0)
+    client = Client("key", "secret", instrumentation=Instrumentation(recorder))
+
+The traces are summarised with::
+
+    python -m shapeways.trace trace.jsonl --top 20
+
+which reports the call count, errors and p50/p95/p99 latency per endpoint,
+the slowest calls and the distribution of the payload sizes.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+from shapeways.compat import replace_file
+
+#: Upper bounds of the payload size buckets of :func:`summarize`, in bytes
+SIZE_BUCKETS = (
+    1024, 4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024,
+    4 * 1024 * 1024, 16 * 1024 * 1024,
+)
+
+#: The record fields holding timings, in seconds
+TIMINGS = ("duration", "connect", "wait", "download", "decode")
+
+
+def trace_record(info, timestamp=None):
+    """The trace record of a request
+
+    :param info: the reported request
+    :type info: :class:`shapeways.instrument.RequestInfo`
+    :param timestamp: the wall clock time the request finished, now when
+        ``None``
+    :type timestamp: float or None
+    :rtype: dict
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    record = {
+        "time": timestamp - (info.duration or 0.0),
+        "method": info.method,
+        "endpoint": info.template,
+        "url": info.url,
+        "status": info.status,
+        "attempts": info.attempts,
+        "retries": max(0, info.attempts - 1),
+        "cache": info.cache,
+        "bytes_sent": info.bytes_sent,
+        "bytes_received": info.bytes_received,
+    }
+    for name in TIMINGS:
+        record[name] = getattr(info, name)
+    if info.error is not None:
+        record["error"] = "%s: %s" % (type(info.error).__name__, info.error)
+    return record
+
+
+class TraceRecorder(object):
+    """Hook appending sampled request records to a rotating JSON lines file
+
+    Every request is recorded with probability ``sample_rate``; requests
+    taking at least ``slow`` seconds and requests that raised are always
+    recorded, so the tail is kept at any sampling rate. Once the file
+    reaches ``max_bytes`` it is renamed to ``<path>.1`` (shifting older
+    files up to ``<path>.<backups>``) and a new file is started.
+
+    :param path: the trace file
+    :type path: str
+    :param sample_rate: the fraction of requests recorded
+    :type sample_rate: float
+    :param slow: seconds from which requests are always recorded, ``None``
+        to only sample
+    :type slow: float or None
+    :param max_bytes: the size at which the file is rotated
+    :type max_bytes: int
+    :param backups: the number of rotated files kept
+    :type backups: int
+    :param seed: seed of the sampling, for reproducible traces
+    :type seed: int or None
+    """
+    __slots__ = [
+        "path", "sample_rate", "slow", "max_bytes", "backups", "recorded",
+        "_random", "_lock", "_file", "_size",
+    ]
+
+    def __init__(
+            self, path, sample_rate=0.01, slow=None, max_bytes=64 * 1024 * 1024,
+            backups=3, seed=None
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow = slow
+        self.max_bytes = max_bytes
+        self.backups = backups
+        #: the number of records written
+        self.recorded = 0
+        self._random = random.Random(seed).random
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def sampled(self, info):
+        """Whether the request is recorded"""
+        if self._random() < self.sample_rate or info.error is not None:
+            return True
+        return self.slow is not None and (info.duration or 0.0) >= self.slow
+
+    def after(self, info):
+        if not self.sampled(info):
+            return
+        self.write(trace_record(info))
+
+    def write(self, record):
+        """Append a record to the trace file, rotating it when full
+
+        :param record: the record, see :func:`shapeways.trace.trace_record`
+        :type record: dict
+        """
+        line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open()
+            elif self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+            self.recorded += 1
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                source = "%s.%d" % (self.path, index)
+                if os.path.exists(source):
+                    replace_file(source, "%s.%d" % (self.path, index + 1))
+            replace_file(self.path, self.path + ".1")
+        else:
+            os.unlink(self.path)
+        self._open()
+
+    def close(self):
+        """Close the trace file, it is reopened on the next record"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def trace_files(path):
+    """The trace file and its rotated backups, oldest first
+
+    :param path: the trace file
+    :type path: str
+    :rtype: list
+    """
+    backups = []
+    index = 1
+    while os.path.exists("%s.%d" % (path, index)):
+        backups.append("%s.%d" % (path, index))
+        index += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_records(paths):
+    """Read the records of trace files, skipping lines that are not JSON
+    (e.g. a record cut short by a crash)
+
+    :param paths: the trace files
+    :type paths: list
+    :returns: a generator of records
+    :rtype: generator
+    """
+    for path in paths:
+        with open(path, "rb") as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line.decode("utf-8"))
+                except ValueError:
+                    continue
+
+
+def percentile(values, fraction):
+    """The nearest rank percentile of sorted ``values``"""
+    if not values:
+        return None
+    rank = int(math.ceil(round(fraction * len(values), 9))) - 1
+    return values[max(0, min(len(values) - 1, rank))]
+
+
+def _distribution(sizes):
+    counts = [0] * (len(SIZE_BUCKETS) + 1)
+    for size in sizes:
+        index = 0
+        while index < len(SIZE_BUCKETS) and size > SIZE_BUCKETS[index]:
+            index += 1
+        counts[index] += 1
+    return dict(
+        (("<=%d" % bound) if index < len(SIZE_BUCKETS) else (">%d" % SIZE_BUCKETS[-1]), count)
+        for index, (bound, count) in enumerate(zip(SIZE_BUCKETS + (None,), counts))
+    )
+
+
+def summarize(records, top=10):
+    """Summarise trace records
+
+    :param records: the records, see :func:`shapeways.trace.read_records`
+    :type records: iterable
+    :param top: the number of slowest calls to report
+    :type top: int
+    :returns: ``endpoints``, the count, errors, retries, cache hits and
+        p50/p95/p99 of the duration and its phases per endpoint, ``slowest``,
+        the ``top`` slowest records, and ``sizes``, the distribution of the
+        bytes sent and received
+    :rtype: dict
+    """
+    groups = {}
+    slowest = []
+    sent = []
+    received = []
+    for record in records:
+        key = "%s %s" % (record.get("method"), record.get("endpoint") or "other")
+        group = groups.setdefault(key, {
+            "count": 0, "errors": 0, "retries": 0, "cache_hits": 0,
+            "timings": dict((name, []) for name in TIMINGS),
+        })
+        group["count"] += 1
+        status = record.get("status")
+        if record.get("error") or (status is not None and status >= 400):
+            group["errors"] += 1
+        group["retries"] += record.get("retries") or 0
+        if record.get("cache") in ("hit", "not_modified"):
+            group["cache_hits"] += 1
+        for name in TIMINGS:
+            if record.get(name) is not None:
+                group["timings"][name].append(record[name])
+        if record.get("duration") is not None:
+            slowest.append(record)
+        if record.get("bytes_sent"):
+            sent.append(record["bytes_sent"])
+        if record.get("bytes_received"):
+            received.append(record["bytes_received"])
+
+    endpoints = {}
+    for key, group in groups.items():
+        timings = {}
+        for name, values in group.pop("timings").items():
+            if values:
+                values.sort()
+                timings[name] = dict(
+                    (label, percentile(values, fraction))
+                    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+                )
+                timings[name]["max"] = values[-1]
+        group["timings"] = timings
+        endpoints[key] = group
+    slowest.sort(key=lambda record: record["duration"], reverse=True)
+    return {
+        "endpoints": endpoints,
+        "slowest": slowest[:top],
+        "sizes": {
+            "sent": _distribution(sent),
+            "received": _distribution(received),
+        },
+    }
+
+
+def _seconds(value):
+    return "-" if value is None else "%.1fms" % (value * 1000)
+
+
+def format_summary(summary):
+    """Format a :func:`shapeways.trace.summarize` summary as text tables
+
+    :rtype: str
+    """
+    lines = ["%-44s %7s %6s %7s %9s %9s %9s %9s" % (
+        "endpoint", "calls", "errors", "retries", "p50", "p95", "p99", "max"
+    )]
+    endpoints = summary["endpoints"]
+    for key in sorted(
+            endpoints, key=lambda key: -endpoints[key]["timings"].get("duration", {}).get("p99", 0)
+    ):
+        group = endpoints[key]
+        duration = group["timings"].get("duration", {})
+        lines.append("%-44s %7d %6d %7d %9s %9s %9s %9s" % (
+            key, group["count"], group["errors"], group["retries"],
+            _seconds(duration.get("p50")), _seconds(duration.get("p95")),
+            _seconds(duration.get("p99")), _seconds(duration.get("max")),
+        ))
+        for phase in TIMINGS[1:]:
+            timing = group["timings"].get(phase)
+            if timing:
+                lines.append("  %-42s %7s %6s %7s %9s %9s %9s %9s" % (
+                    phase, "", "", "", _seconds(timing["p50"]), _seconds(timing["p95"]),
+                    _seconds(timing["p99"]), _seconds(timing["max"]),
+                ))
+
+    lines.append("")
+    lines.append("slowest calls:")
+    for record in summary["slowest"]:
+        lines.append("  %9s %-6s %s status=%s retries=%s cache=%s sent=%s received=%s" % (
+            _seconds(record["duration"]), record.get("method"), record.get("url"),
+            record.get("status"), record.get("retries"), record.get("cache"),
+            record.get("bytes_sent"), record.get("bytes_received"),
+        ))
+
+    lines.append("")
+    lines.append("payload sizes (bytes):")
+    labels = ["<=%d" % bound for bound in SIZE_BUCKETS] + [">%d" % SIZE_BUCKETS[-1]]
+    for direction in ("sent", "received"):
+        counts = summary["sizes"][direction]
+        lines.append("  %-8s %s" % (direction, " ".join(
+            "%s:%d" % (label, counts[label]) for label in labels if counts[label]
+        ) or "-"))
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise Shapeways request traces")
+    parser.add_argument("paths", nargs="+", metavar="TRACE",
+                        help="trace files, their rotated backups are read too")
+    parser.add_argument("--top", type=int, default=10, help="slowest calls to list")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.paths:
+        files = trace_files(path)
+        if not files:
+            parser.error("no such trace file: %s" % path)
+        paths.extend(files)
+    summary = summarize(read_records(paths), top=args.top)
+    if args.json:
+        sys.stdout.write(json.dumps(summary, indent=2, sort_keys=True) + "\n")
+    else:
+        sys.stdout.write(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
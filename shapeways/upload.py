@@ -0,0 +1,160 @@
+import base64
+import json
+import os
+
+from shapeways.compat import string_types
+
+#: Bytes of the model file read per chunk, a multiple of 3 so that every
+#: chunk base64 encodes without padding
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+
+class JsonUploadBody(object):
+    """Streaming JSON request body with a base64 encoded file field
+
+    Iterating produces the JSON encoding of ``params`` plus a ``"file"`` field
+    holding the base64 encoded contents of ``source``. The file is read and
+    encoded ``chunk_size`` bytes at a time, so peak memory does not depend on
+    the size of the file. The body length is known up front, so it is sent
+    with a ``Content-Length`` header rather than chunked. The body can also
+    be read like a file, see :meth:`read`.
+
+    .. code:: python
+
+        body = JsonUploadBody("model.stl", {"fileName": "model.stl"})
+        requests.post(url, data=body, headers={"Content-Type": "application/json"})
+
+    :param source: path to, or binary file object of, the file to upload
+    :type source: str or file
+    :param params: the other fields of the JSON body
+    :type params: dict
+    :param field: the name of the field holding the file data
+    :type field: str
+    :param chunk_size: the number of file bytes encoded per chunk, rounded
+        down to a multiple of 3
+    :type chunk_size: int
+    :param progress: called as ``progress(bytes_read, total_bytes)`` after
+        every chunk of the file is read
+    :type progress: callable or None
+    """
+    __slots__ = [
+        "source", "prefix", "suffix", "chunk_size", "progress", "size",
+        "_start", "_reader", "_chunk", "_offset",
+    ]
+
+    def __init__(
+            self, source, params, field="file", chunk_size=DEFAULT_CHUNK_SIZE,
+            progress=None
+    ):
+        self.source = source
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self.progress = progress
+        self._reader = None
+        self._chunk = b""
+        self._offset = 0
+        if isinstance(source, string_types):
+            self._start = 0
+            self.size = os.path.getsize(source)
+        else:
+            self._start = source.tell()
+            source.seek(0, os.SEEK_END)
+            self.size = source.tell() - self._start
+            source.seek(self._start)
+
+        head = json.dumps(params)[:-1]
+        if params:
+            head += ", "
+        self.prefix = ("%s%s: \"" % (head, json.dumps(field))).encode("utf-8")
+        self.suffix = b"\"}"
+
+    def __len__(self):
+        encoded = (self.size + 2) // 3 * 4
+        return len(self.prefix) + encoded + len(self.suffix)
+
+    def __iter__(self):
+        if isinstance(self.source, string_types):
+            with open(self.source, "rb") as source:
+                for chunk in self._encode(source):
+                    yield chunk
+        else:
+            self.source.seek(self._start)
+            for chunk in self._encode(self.source):
+                yield chunk
+
+    def read(self, size=-1):
+        """Read up to ``size`` bytes of the body, all of it when negative
+
+        python 2's httplib only streams bodies that are file objects. Once
+        the body has been read to the end it starts over, so a retried
+        request sends it again.
+
+        :param size: the number of bytes to read at most
+        :type size: int
+        :rtype: bytes
+        """
+        if self._reader is None:
+            self._reader = iter(self)
+        if size < 0:
+            data = self._chunk[self._offset:] + b"".join(self._reader)
+            self._reset()
+            return data
+        while self._offset >= len(self._chunk):
+            chunk = next(self._reader, None)
+            if chunk is None:
+                self._reset()
+                return b""
+            self._chunk, self._offset = chunk, 0
+        data = self._chunk[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+    def _reset(self):
+        self._reader = None
+        self._chunk = b""
+        self._offset = 0
+
+    def _encode(self, source):
+        yield self.prefix
+        read = 0
+        while True:
+            chunk = self._read(source)
+            if not chunk:
+                break
+            read += len(chunk)
+            if self.progress is not None:
+                self.progress(read, self.size)
+            yield base64.b64encode(chunk)
+        yield self.suffix
+
+    def _read(self, source):
+        """Read a full chunk, or the rest of the file
+
+        Short reads are topped up: base64 pads every encoded chunk that is not
+        a multiple of 3 bytes long, which would corrupt the stream.
+        """
+        chunk = source.read(self.chunk_size)
+        while chunk and len(chunk) < self.chunk_size:
+            more = source.read(self.chunk_size - len(chunk))
+            if not more:
+                break
+            chunk += more
+        return chunk
+
+
+def upload_params(source, params):
+    """Fill in ``fileName`` for a streaming upload of ``source``
+
+    :param source: path to, or binary file object of, the file to upload
+    :type source: str or file
+    :param params: the other fields of the upload
+    :type params: dict
+    :returns: a copy of ``params`` with ``fileName`` defaulted to the base
+        name of ``source``
+    :rtype: dict
+    """
+    params = dict(params)
+    if "fileName" not in params:
+        name = source if isinstance(source, string_types) else getattr(source, "name", None)
+        if isinstance(name, string_types):
+            params["fileName"] = os.path.basename(name)
+    return params